@@ -0,0 +1,238 @@
+import asyncio
+import socket
+import sys
+from eval_server import EvaluationServer, ConnectionClosedException
+from inference import BatchInferenceEngine, CompiledNetwork
+from metrics import GenomeCounters
+from net_cache import NetworkCache
+from protocol import PackedProtocol
+
+
+class AsyncEvaluationServer(EvaluationServer):
+    """
+    asyncio-based EvaluationServer mode.
+    Serves every emulator connection from a single event loop with StreamReader/StreamWriter
+    and dispatches genomes from an asyncio.Queue, so client count is not bound by OS threads.
+    Message handling is shared with the threaded EvaluationServer.
+    With BATCHED_INFERENCE, game states from all clients are forward-fed in micro-batches.
+    """
+    BATCHED_INFERENCE = True  # batch forward feeds across clients with compiled networks
+
+    def __init__(self, game_mode: str):
+        super().__init__(game_mode)
+        self.queue = None  # pending (index, genome ID, genome) evaluations
+        self.failure = None  # set when any client handler fails
+        self.handlers = None  # client handler tasks
+        self.engine = BatchInferenceEngine() if self.BATCHED_INFERENCE else None
+        if self.engine is not None:
+            self.net_cache = NetworkCache(CompiledNetwork.create, fallback=None)  # batchable networks
+
+    def eval_genomes(self, genomes, config, gen_id) -> bool:
+        """
+        Evaluates a population of genomes.
+        """
+        # set generation vars
+        self.logger = self._init_logger(gen_id)  # init the logger for this generation
+        self.client_ps = []
+        self.config = config
+        self.genomes = genomes
+        self.gen_id = gen_id
+
+        # initial gen logs
+        self.logger.info(f"****** Evaluating Generation {gen_id} ******")
+        self.logger.info(f"completed={len(self.evaluated_genomes)}, total={len(genomes)}")
+
+        # evaluate genomes
+        try:
+            asyncio.run(self._serve())
+            self._log_inference_stats()
+        except KeyboardInterrupt:  # TODO move outside of eval_server
+            self.logger.error("KeyboardInterrupt")
+            self.kill_clients()
+            sys.exit()
+
+        # exit program if an evaluation failure occurred
+        if self.eval_failure:
+            self.logger.error("An evaluation exception occurred!")
+            sys.exit()
+
+        # exit program if debugging
+        if self.DEBUG_ID >= 0:
+            self.logger.info("Finished debugging genome.")
+            sys.exit()
+
+        # successful generation evaluation
+        self.evaluated_genomes = set()  # reset evaluated genomes
+        return True
+
+    async def _serve(self) -> None:
+        """
+        Runs the socket server until all genomes are evaluated or a client fails.
+        """
+        # queue remaining genomes
+        self.queue = asyncio.Queue()
+        for idx, (_id, genome) in enumerate(self.genomes):
+            if _id not in self.evaluated_genomes and not (0 <= self.DEBUG_ID != _id):
+                self.queue.put_nowait((idx, _id, genome))
+        self.failure = asyncio.Event()
+        self.handlers = []
+
+        # init socket server on an ephemeral port
+        self.logger.debug("Initializing socket server...")
+        server = await asyncio.start_server(self._accept_client, self.HOST, 0)
+        self.PORT = server.sockets[0].getsockname()[1]
+        self.logger.debug(f'Socket server: listening on port {self.PORT}')
+
+        # spawn client processes; connections are accepted concurrently
+        for _ in range(self.N_CLIENTS):
+            self.spawn_client()
+
+        # wait for all genomes to finish, or for a client failure
+        finished = asyncio.ensure_future(self.queue.join())
+        failed = asyncio.ensure_future(self.failure.wait())
+        await asyncio.wait({finished, failed}, return_when=asyncio.FIRST_COMPLETED)
+        finished.cancel()
+        failed.cancel()
+        if self.failure.is_set():
+            for handler in self.handlers:
+                handler.cancel()
+
+        # let idle clients receive the finish state, then close server and clients
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        server.close()
+        await server.wait_closed()
+        self.kill_clients()
+
+    async def _accept_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Registers and handles a newly connected client.
+        """
+        self.logger.debug(f"Connected by {writer.get_extra_info('peername')}.")
+        self.handlers.append(asyncio.current_task())
+        try:
+            await self._handle_stream(reader, writer)
+        except Exception as e:
+            self.logger.error(e)
+            self.eval_failure = True
+            self.failure.set()
+        finally:
+            writer.close()
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles the client process in evaluating queued genomes.
+        """
+        while not self.failure.is_set():
+            # evaluate next genome
+            try:
+                idx, _id, genome = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                self.logger.debug("No genomes are left for client to evaluate...")
+                break
+
+            # create NN from genome
+            net = self._create_net(genome)
+            self.logger.info(
+                f"[Gen #: {self.gen_id}, Index #: {idx}/{len(self.genomes) - 1}, Genome #: {_id}]")
+
+            # wait for client to be ready
+            while True:
+                reply = self._ready_reply(await self._read_msg(reader))
+                if reply:
+                    writer.write(reply)
+                    break
+
+            # begin genome evaluation
+            self.logger.debug("Evaluating genome...")
+            genome.fitness = await self._eval_stream(reader, writer, net, GenomeCounters(_id))
+            self._record_fitness(_id, genome)  # successful evaluation
+            self.logger.info(f"Genome #{_id} fitness: {genome.fitness}")
+            self.queue.task_done()
+
+        # send finish state to client
+        writer.write(self.FINISH_STATE)
+        await writer.drain()
+
+    async def _eval_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, net,
+                           counters: GenomeCounters) -> float:
+        """
+        Evaluates a single genome over a client stream.
+        """
+        self._reset_vision(net)
+        metrics = self.metrics.client()
+        trace = self.tracer.sample_genome()
+        fitness = None
+        while fitness is None:
+            t = metrics.now()
+            msg = await self._read_msg(reader)
+            idle = metrics.stage("wait", t) - t
+            reply, fitness = await self._process_msg_async(msg, net)
+            if reply:
+                t = metrics.now()
+                writer.write(reply)
+                await writer.drain()
+                metrics.stage("send", t)
+            turn = self._is_turn(msg)
+            counters.count(msg, reply, idle, turn)
+            if msg[:self.SEED_STATE[1]] == self.SEED_STATE[0]:
+                counters.seeds += 1
+            if trace and turn:
+                self.tracer.trace(self.gen_id, counters.genome, counters.turns, msg, reply)
+        metrics.add_genome(counters)
+        self.durations[counters.genome] = counters.elapsed()
+        if counters.seeds:
+            self.seeded.add(counters.genome)
+        return fitness
+
+    async def _process_msg_async(self, msg: bytes, net):
+        """
+        Processes a single client message, batching game state forward feeds if enabled.
+        :returns (framed reply or None, fitness score or None)
+        """
+        if self.engine is None:
+            return self._process_msg(msg, net)
+
+        # is msg a battle factory input state?
+        if msg[:self.BF_STATE_HEADER[1]] == self.BF_STATE_HEADER[0]:
+            input_layer = self._encode_game_state(msg[self.BF_STATE_HEADER[1]:]).copy()
+            metrics = self.metrics.client()
+            t = metrics.now()
+            output_layer = await self.engine.activate(net, input_layer)
+            t = metrics.stage("activate", t)
+            output_msg = self._format_game_state(output_layer)
+            metrics.stage("format", t)
+            return b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'), None
+
+        # is msg a packed battle factory input state?
+        if msg[:self.BF_PACKED_HEADER[1]] == self.BF_PACKED_HEADER[0]:
+            input_layer = self._encode_packed_state(msg[self.BF_PACKED_HEADER[1]:]).copy()
+            metrics = self.metrics.client()
+            t = metrics.now()
+            output_layer = await self.engine.activate(net, input_layer)
+            t = metrics.stage("activate", t)
+            output_msg = PackedProtocol.encode_reply(output_layer)
+            metrics.stage("format", t)
+            return b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'), None
+
+        return self._process_msg(msg, net)
+
+    def _log_inference_stats(self) -> None:
+        """
+        Logs and resets the generation's batched inference statistics.
+        """
+        if self.engine is None:
+            return
+        stats = self.engine.stats()
+        self.logger.info("Batched inference: " + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items()))
+        self.engine.reset_stats()
+
+    @staticmethod
+    async def _read_msg(reader: asyncio.StreamReader) -> bytes:
+        """
+        Reads the next complete length-prefixed client message.
+        """
+        try:
+            header = await asyncio.wait_for(reader.readuntil(b" "), socket.getdefaulttimeout())
+            return await asyncio.wait_for(reader.readexactly(int(header[:-1])), socket.getdefaulttimeout())
+        except asyncio.IncompleteReadError:
+            raise ConnectionClosedException
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import numpy as np
+from inference import FlatNetwork
+from net_cache import NetworkCache
+
+
+class StateCorpus:
+    """
+    Bounded sample of the encoded input vectors seen by the server, kept by reservoir sampling so
+    every recorded state is equally likely to be held. Stored as a float32 memory-mapped file of
+    CAPACITY rows, with the number of states seen in a JSON sidecar. Thread-safe.
+    """
+    CAPACITY = 4096  # max states held
+
+    def __init__(self, path: str, capacity: int = CAPACITY):
+        self.path = path  # memory-mapped rows; path + ".json" holds the metadata
+        self.capacity = capacity
+        self.states = None  # (capacity, n_inputs) memmap, created with the first state
+        self.seen = 0  # states recorded, including those not held
+        self.lock = threading.Lock()  # acquired from client threads
+        self.load()
+
+    def __len__(self) -> int:
+        return min(self.seen, self.capacity)
+
+    def add(self, state: np.ndarray) -> None:
+        """
+        Records an input vector: held outright until the corpus fills, then replacing a random
+        row with probability capacity / seen.
+        """
+        with self.lock:
+            if self.states is None:
+                self._map(len(state), "w+")
+            elif len(state) != self.states.shape[1]:
+                return  # input vectors of another game mode
+            self.seen += 1
+            row = self.seen - 1 if self.seen <= self.capacity else random.randrange(self.seen)
+            if row < self.capacity:
+                self.states[row] = state
+
+    def sample(self, n: int) -> np.ndarray:
+        """
+        :returns up to n distinct held states, as float64 rows
+        """
+        with self.lock:
+            size = len(self)
+            if size == 0:
+                return np.zeros((0, 0))
+            rows = sorted(random.sample(range(size), min(n, size)))
+            return np.array(self.states[rows], dtype=np.float64)
+
+    def _map(self, n_inputs: int, mode: str) -> None:
+        self.states = np.memmap(self.path, dtype=np.float32, mode=mode, shape=(self.capacity, n_inputs))
+
+    def load(self) -> None:
+        if os.path.exists(self.path) and os.path.exists(self.path + ".json"):
+            with open(self.path + ".json") as f:
+                meta = json.load(f)
+            if meta["capacity"] == self.capacity:
+                self._map(meta["n_inputs"], "r+")
+                self.seen = meta["seen"]
+
+    def save(self) -> None:
+        """
+        Flushes the held states and atomically writes the metadata.
+        """
+        with self.lock:
+            if self.states is None:
+                return
+            self.states.flush()
+            meta = {"capacity": self.capacity, "n_inputs": self.states.shape[1], "seen": self.seen}
+        tmp_path = self.path + ".json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path + ".json")
+
+
+class BehaviorScreen:
+    """
+    Pre-screens genomes by behavior before dispatch. Each genome's network ranks the actions of
+    a frozen probe set of PROBES corpus states, and the rankings are hashed into a fingerprint.
+    Genomes ranking every probe like an already-scored genome under the same seed inherit its mean
+    fitness, and siblings sharing a fingerprint within a round share one emulator evaluation;
+    either is still evaluated at RESAMPLE_RATE. The probe set is redrawn from the corpus every
+    REFRESH_GENERATIONS, which forgets all fingerprints, as they only compare on the same probes.
+    """
+    PROBES = 512  # corpus states ranked per fingerprint
+    MIN_PROBES = 64  # corpus states required before screening
+    REFRESH_GENERATIONS = 10  # generations between probe set redraws
+    RESAMPLE_RATE = 0.1  # probability of evaluating a genome with a known fingerprint
+
+    def __init__(self, corpus: StateCorpus, net_cache: NetworkCache = None, probes: int = PROBES,
+                 resample_rate: float = RESAMPLE_RATE):
+        self.corpus = corpus
+        self.n_probes = probes
+        self.resample_rate = resample_rate
+        self.probes = None  # frozen (probes, n_inputs) probe states
+        self.drawn = None  # generation the probes were drawn
+        # network cache, shared with the server so dispatched genomes compile once
+        self.net_cache = net_cache or NetworkCache(FlatNetwork.create, fallback=None)
+        self.entries = {}  # "fingerprint:seed" -> [mean fitness, samples]
+        self.pending = {}  # genome ID -> key of genomes sent for evaluation
+        self.followers = {}  # genome ID -> genomes sharing its fingerprint, awaiting its fitness
+        self.inherited = 0
+        self.shared = 0
+        self.resamples = 0
+        self.unscreened = 0
+
+    def refresh(self, generation: int) -> None:
+        """
+        Draws a new probe set when due and the corpus holds enough states.
+        """
+        if self.drawn is not None and generation - self.drawn < self.REFRESH_GENERATIONS:
+            return
+        if len(self.corpus) < self.MIN_PROBES:
+            return
+        self.probes = self.corpus.sample(self.n_probes)
+        self.drawn = generation
+        self.entries = {}
+
+    def fingerprint(self, genome, config):
+        """
+        :returns hash of the genome's action rankings over the probe set, or None if unscreenable
+        """
+        try:
+            net = self.net_cache.acquire(genome, config)
+        except ValueError:
+            return None
+        if not hasattr(net, "activate_states"):
+            return None  # fallback network
+        outputs = net.activate_states(self.probes)
+        ranks = np.argsort(-outputs, axis=1, kind="stable").astype(np.uint8)
+        return hashlib.blake2b(ranks.tobytes(), digest_size=16).hexdigest()
+
+    def apply(self, genomes, seed: int, config) -> list:
+        """
+        Assigns inherited fitness to genomes behaving like scored ones, and holds back siblings of
+        genomes sent for evaluation.
+        :returns (genome ID, genome) pairs that still need an emulator evaluation
+        """
+        self.pending = {}
+        self.followers = {}
+        if self.probes is None:
+            return list(genomes)
+        leaders = {}  # key -> genome ID sent for evaluation this round
+        remaining = []
+        for _id, genome in genomes:
+            fingerprint = self.fingerprint(genome, config)
+            if fingerprint is None:
+                self.unscreened += 1
+                remaining.append((_id, genome))
+                continue
+            key = f"{fingerprint}:{seed}"
+            known = key in self.entries or key in leaders
+            if known and random.random() >= self.resample_rate:
+                if key in self.entries:
+                    genome.fitness = self.entries[key][0]
+                    self.inherited += 1
+                else:
+                    self.followers.setdefault(leaders[key], []).append(genome)
+                    self.shared += 1
+                continue
+            if known:
+                self.resamples += 1
+            leaders.setdefault(key, _id)
+            self.pending[_id] = key
+            remaining.append((_id, genome))
+        return remaining
+
+    def update(self, genomes) -> None:
+        """
+        Records the fitness of genomes evaluated since the last apply(), and passes it on to
+        their held-back siblings.
+        """
+        for _id, genome in genomes:
+            key = self.pending.get(_id)
+            if key is None or genome.fitness is None:
+                continue
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = [genome.fitness, 1]
+            else:
+                self.entries[key] = [(entry[0] * entry[1] + genome.fitness) / (entry[1] + 1), entry[1] + 1]
+        for _id, followers in self.followers.items():
+            entry = self.entries.get(self.pending[_id])
+            for genome in followers:
+                genome.fitness = entry[0] if entry is not None else None
+        self.pending = {}
+        self.followers = {}
+
+    def summary(self) -> str:
+        """
+        Summarizes and resets this generation's screening statistics.
+        """
+        msg = (f"Behavior screen: runs saved={self.inherited + self.shared} (inherited={self.inherited}, "
+               f"shared={self.shared}), resamples={self.resamples}, unscreened={self.unscreened}, "
+               f"fingerprints={len(self.entries)}, probes={0 if self.probes is None else len(self.probes)}, "
+               f"corpus={len(self.corpus)}/{self.corpus.capacity}")
+        self.inherited, self.shared, self.resamples, self.unscreened = 0, 0, 0, 0
+        return msg
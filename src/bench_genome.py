@@ -0,0 +1,70 @@
+"""
+Benchmarks ArrayGenome against neat.DefaultGenome on the battle factory config: time to create the
+population and to reproduce each generation, and memory and checkpoint size of the evolved population.
+Usage: python src/bench_genome.py [generations] [pop_size]
+"""
+import gzip
+import os
+import pickle
+import random
+import time
+import tracemalloc
+import neat
+from neat_config import load_config
+from genome import ArrayGenome
+from speciation import VectorizedSpeciesSet
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "neat_battlefactory.cfg")
+
+
+def bench(genome_type, generations: int, pop_size: int) -> dict:
+    random.seed(0)
+    config = load_config(CONFIG_PATH, VectorizedSpeciesSet, genome_type)
+    config.pop_size = pop_size
+
+    start = time.perf_counter()
+    p = neat.Population(config)
+    create_s = time.perf_counter() - start
+
+    # time reproduction alone, with random fitness
+    reproduce = p.reproduction.reproduce
+    reproduce_s = []
+
+    def timed(*args):
+        t = time.perf_counter()
+        population = reproduce(*args)
+        reproduce_s.append(time.perf_counter() - t)
+        return population
+    p.reproduction.reproduce = timed
+
+    def evaluate(genomes, _config):
+        for _id, g in genomes:
+            g.fitness = random.random()
+    p.run(evaluate, generations)
+
+    genomes = {key: pickle.dumps(g, protocol=pickle.HIGHEST_PROTOCOL) for key, g in p.population.items()}
+    checkpoint = gzip.compress(pickle.dumps(genomes, protocol=pickle.HIGHEST_PROTOCOL), compresslevel=5)
+
+    # memory held by the evolved genomes, loaded as a restored checkpoint would
+    tracemalloc.start()
+    population = [pickle.loads(data) for data in genomes.values()]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del population
+    sizes = [g.size()[1] for g in p.population.values()]
+    return {"create_s": create_s, "memory": memory, "reproduce_s": sum(reproduce_s) / len(reproduce_s),
+            "pickle": sum(map(len, genomes.values())), "checkpoint": len(checkpoint),
+            "connections": sum(sizes) / len(sizes)}
+
+
+if __name__ == "__main__":
+    import sys
+    n_generations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_genomes = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    print(f"{n_genomes} genomes, {n_generations} generations")
+    print(f"{'genome':>14}  {'create':>8}  {'memory':>10}  {'reproduce/gen':>13}  {'pickled':>10}  {'checkpoint':>10}")
+    for _genome_type in (neat.DefaultGenome, ArrayGenome):
+        r = bench(_genome_type, n_generations, n_genomes)
+        print(f"{_genome_type.__name__:>14}  {r['create_s']:7.2f}s  {r['memory'] / 2 ** 20:7.1f}MiB  "
+              f"{r['reproduce_s']:12.3f}s  {r['pickle'] / 2 ** 20:7.1f}MiB  {r['checkpoint'] / 2 ** 20:7.1f}MiB"
+              f"  ({r['connections']:.0f} enabled connections/genome)")
@@ -0,0 +1,150 @@
+"""
+End-to-end load benchmark of the evaluation server against headless mock Battle Factory clients.
+Reports genomes/s, turns/s and p50/p95/p99 per-turn server round-trip latency.
+Usage: python src/bench_server.py [--mode pool|asyncio|process|threaded] [--clients N] [--genomes N]
+                                  [--generations N] [--turns N] [--think-time S] [--packed] [--buffer-logs]
+                                  [--variable-turns] [--schedule fifo|lpt] [--transport tcp|shm]
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import neat
+import numpy as np
+from eval_server import EvaluationServer
+from async_server import AsyncEvaluationServer
+from pool_server import PooledEvaluationServer
+from process_server import ProcessEvaluationServer
+from mock_client import MockClient
+from scheduler import LPTScheduler
+from neat_config import load_config
+from speciation import VectorizedSpeciesSet
+from genome import ArrayGenome
+
+SERVERS = {
+    "pool": PooledEvaluationServer,
+    "asyncio": AsyncEvaluationServer,
+    "process": ProcessEvaluationServer,
+    "threaded": EvaluationServer,
+}
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'neat_battlefactory.cfg')
+MOCK_CLIENT = os.path.join(os.path.dirname(__file__), 'mock_client.py')
+EXIT_TIMEOUT = 10.0  # seconds to wait for a finished mock client to exit
+
+
+def mock_server(args):
+    """
+    Creates an evaluation server of the benchmarked mode that spawns mock clients instead of emulators.
+    """
+    class MockEvaluationServer(SERVERS[args.mode]):
+        N_CLIENTS = args.clients
+        TRANSPORT = args.transport
+        CONSOLE_LOG_LEVEL = logging.WARNING  # quiet per-genome console logs
+
+        def __init__(self, game_mode: str):
+            super().__init__(game_mode)
+            self.outputs = []  # stats output file of every spawned mock client
+
+        def spawn_client(self, mmf: str = None):
+            output = tempfile.TemporaryFile()
+            cmd = [sys.executable, MOCK_CLIENT, "--turns", str(args.turns), "--think-time", str(args.think_time)]
+            cmd += ["--shm", mmf] if mmf else ["--port", str(self.PORT)]
+            cmd += ["--packed"] if args.packed else []
+            cmd += ["--buffer-logs"] if args.buffer_logs else []
+            cmd += ["--variable-turns"] if args.variable_turns else []
+            ps = subprocess.Popen(cmd, stdout=output)
+            self.client_ps.append(ps)
+            self.outputs.append(output)
+            return ps
+
+        def kill_client(self, ps):
+            try:
+                ps.wait(EXIT_TIMEOUT)  # clients exit on their own after FINISHED
+            except subprocess.TimeoutExpired:
+                ps.terminate()
+
+        def client_stats(self) -> list:
+            stats = []
+            for output in self.outputs:
+                output.seek(0)
+                data = output.read()
+                if data:
+                    stats.append(json.loads(data))
+            return stats
+
+    return MockEvaluationServer("battle_factory")
+
+
+def run(args) -> dict:
+    config = load_config(CONFIG_PATH, VectorizedSpeciesSet, ArrayGenome)
+    config.pop_size = args.genomes
+    genomes = list(neat.Population(config).population.items())
+
+    server = mock_server(args)
+    scheduler = LPTScheduler(os.path.join(tempfile.mkdtemp(), "durations.json"))  # fresh, never saved
+    start = time.perf_counter()
+    for gen_id in range(args.generations):
+        for _, genome in genomes:
+            genome.fitness = None
+        ordered = scheduler.order(genomes, {}, lambda _id: None) if args.schedule == "lpt" else genomes
+        gen_start = time.perf_counter()
+        server.eval_genomes(ordered, config, gen_id)
+        durations, server.durations = server.durations, {}
+        scheduler.update(genomes, durations, lambda _id: None)
+        print(scheduler.summary(durations, time.perf_counter() - gen_start, server.emulator_slots()))
+    elapsed = time.perf_counter() - start
+    print(server.net_cache_summary())
+    server.close()
+    perf_summary = server.metrics.report(args.generations - 1)
+    if perf_summary:
+        print(perf_summary)
+
+    stats = server.client_stats()
+    latencies = np.array([x for s in stats for x in s["latencies"]]) * 1000
+    return {
+        "mode": args.mode,
+        "transport": args.transport,
+        "clients": args.clients,
+        "genomes": sum(s["genomes"] for s in stats),
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "genomes_per_s": sum(s["genomes"] for s in stats) / elapsed,
+        "turns_per_s": len(latencies) / elapsed,
+        "latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if len(latencies) else None,
+        "latency_p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluation server load benchmark.")
+    parser.add_argument("--mode", choices=SERVERS, default="pool")
+    parser.add_argument("--clients", type=int, default=EvaluationServer.N_CLIENTS)
+    parser.add_argument("--genomes", type=int, default=100, help="genomes per generation")
+    parser.add_argument("--generations", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=MockClient.TURNS, help="turns per genome")
+    parser.add_argument("--think-time", type=float, default=MockClient.THINK_TIME,
+                        help="seconds of simulated emulation per turn")
+    parser.add_argument("--packed", action="store_true", help="use the packed wire protocol")
+    parser.add_argument("--buffer-logs", action="store_true", help="flush client logs with the fitness message")
+    parser.add_argument("--variable-turns", action="store_true", help="vary battle length per genome")
+    parser.add_argument("--schedule", choices=("fifo", "lpt"), default="lpt",
+                        help="dispatch genomes in population order or longest-expected-first")
+    parser.add_argument("--transport", choices=("tcp", "shm"), default="tcp",
+                        help="client transport of the threaded and process modes")
+    _args = parser.parse_args()
+    if _args.transport == "shm" and _args.mode not in ("threaded", "process"):
+        parser.error("--transport shm requires --mode threaded or process")
+
+    os.makedirs("./logs", exist_ok=True)
+    result = run(_args)
+    print(f"{result['mode']} ({result['transport']}): {result['clients']} clients, {result['genomes']} genomes, "
+          f"{result['turns']} turns in {result['seconds']:.1f}s")
+    print(f"  {result['genomes_per_s']:.2f} genomes/s, {result['turns_per_s']:.1f} turns/s")
+    if result["turns"]:
+        print(f"  turn latency: p50={result['latency_p50']:.2f}ms, p95={result['latency_p95']:.2f}ms, "
+              f"p99={result['latency_p99']:.2f}ms")
@@ -0,0 +1,74 @@
+"""
+Benchmarks the screenshot vision front-end: the original PIL/scipy/skimage pipeline over PNG screenshots
+against VisionPipeline over the same PNGs and over raw BGRA framebuffers. Output equivalence is checked
+by tests/test_vision.py.
+Usage: python src/bench_vision.py [frames] [stack]
+"""
+import io
+import time
+import numpy as np
+from PIL import Image
+from scipy.signal import correlate
+from skimage.measure import block_reduce
+from eval_server import EvaluationServer
+from vision import VisionPipeline
+
+WIDTH, HEIGHT = EvaluationServer.SCREEN_SIZE
+KERNEL = EvaluationServer.KERNEL
+
+
+def legacy_pipeline(png: bytes) -> np.ndarray:
+    """
+    The original _ff_screenshot front-end: grayscale, full 2-D correlation, 4x4 average pooling.
+    """
+    im = np.array(Image.open(io.BytesIO(png)).convert('L'))
+    im = correlate(im, KERNEL)
+    im = block_reduce(im, block_size=(4, 4), func=np.average)
+    return im.reshape(-1)
+
+
+def synthetic_frames(n: int, seed: int = 0) -> list:
+    """
+    Generates screen-like BGRA frames: gradients with moving sprites and a little noise.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    frames = []
+    for i in range(n):
+        rgb = np.stack([(x + i) % 256, (y * 2) % 256, (x + y) // 3 % 256], axis=-1).astype(np.uint8)
+        for _ in range(8):
+            top, left = rng.integers(0, HEIGHT - 32), rng.integers(0, WIDTH - 32)
+            rgb[top:top + 32, left:left + 32] = rng.integers(0, 256, 3)
+        rgb ^= rng.integers(0, 4, rgb.shape, dtype=np.uint8)
+        bgra = np.concatenate([rgb[..., ::-1], np.full((HEIGHT, WIDTH, 1), 255, np.uint8)], axis=-1)
+        frames.append(bgra)
+    return frames
+
+
+def fps(process, inputs) -> float:
+    start = time.perf_counter()
+    for x in inputs:
+        process(x)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    import sys
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    stack = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    frames = synthetic_frames(n_frames)
+    raws = [f.tobytes() for f in frames]
+    pngs = []
+    for f in frames:
+        buffer = io.BytesIO()
+        Image.fromarray(f[..., [2, 1, 0]]).save(buffer, "PNG")
+        pngs.append(buffer.getvalue())
+
+    vision = VisionPipeline(WIDTH, HEIGHT, KERNEL)
+    print(f"{n_frames} frames of {WIDTH}x{HEIGHT}, {vision.n_inputs} inputs")
+
+    print(f"legacy PNG pipeline:   {fps(legacy_pipeline, pngs):8.1f} frames/s")
+    print(f"fused PNG pipeline:    {fps(vision.from_png, pngs):8.1f} frames/s")
+    print(f"fused raw pipeline:    {fps(vision.from_raw, raws):8.1f} frames/s")
+    stacked = VisionPipeline(WIDTH, HEIGHT, KERNEL, stack)
+    print(f"fused raw, {stack} stacked: {fps(stacked.from_raw, raws):8.1f} frames/s ({stacked.n_inputs} inputs)")
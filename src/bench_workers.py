@@ -0,0 +1,76 @@
+"""
+Benchmarks server-side turn throughput (decode + encode + forward feed) of in-process client
+threads against ActivationWorkerPool worker processes, for increasing worker counts.
+Usage: python src/bench_workers.py [turns per client]
+"""
+import json
+import os
+import random
+import threading
+import time
+import neat
+from encoder import StateEncoder
+from inference import FlatNetwork
+from net_cache import NetworkCache
+from process_server import ActivationWorkerPool
+from mock_client import random_state
+from neat_config import load_config
+from speciation import VectorizedSpeciesSet
+from genome import ArrayGenome
+
+N_CLIENTS = 10  # concurrent client threads
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'neat_battlefactory.cfg')
+
+
+def run_threads(target, n_turns: int) -> float:
+    """
+    Runs target(client index) on N_CLIENTS threads.
+    :returns turns per second
+    """
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(N_CLIENTS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return N_CLIENTS * n_turns / (time.perf_counter() - start)
+
+
+def bench_in_process(genomes, config, states, n_turns: int) -> float:
+    net_cache = NetworkCache(FlatNetwork.create)  # same networks as the worker processes build
+    nets = [net_cache.acquire(g, config) for g in genomes]
+
+    def client(i):
+        encoder = StateEncoder()
+        for turn in range(n_turns):
+            nets[i].activate(encoder.vectorize_state(json.loads(states[turn % len(states)])))
+    return run_threads(client, n_turns)
+
+
+def bench_workers(genomes, config, states, n_turns: int, n_workers: int) -> float:
+    pool = ActivationWorkerPool(config, n_workers)
+    nets = [pool.load(g) for g in genomes]
+    nets[0].activate_state(states[0])  # wait for workers to start
+
+    def client(i):
+        for turn in range(n_turns):
+            nets[i].activate_state(states[turn % len(states)])
+    try:
+        return run_threads(client, n_turns)
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    import sys
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    _config = load_config(CONFIG_PATH, VectorizedSpeciesSet, ArrayGenome)
+    _genomes = list(neat.Population(_config).population.values())[:N_CLIENTS]
+    _states = [random_state(random.Random(i)) for i in range(50)]
+
+    print(f"{N_CLIENTS} clients x {turns} turns, {os.cpu_count()} cores")
+    print(f"in-process threads: {bench_in_process(_genomes, _config, _states, turns):10.1f} turns/s")
+    n = 1
+    while n <= os.cpu_count():
+        print(f"{n: >3} worker process(es): {bench_workers(_genomes, _config, _states, turns, n):10.1f} turns/s")
+        n *= 2
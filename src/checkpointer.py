@@ -0,0 +1,383 @@
+import atexit
+import gzip
+import io
+import json
+import os
+import pickle
+import queue
+import random
+import threading
+import numpy as np
+from neat.genes import DefaultConnectionGene, DefaultNodeGene
+from neat.genome import DefaultGenome
+from neat.population import Population
+from neat.reporting import BaseReporter
+from genome import ArrayGenome
+
+
+class IncrementalCheckpointer(BaseReporter):
+    """
+    Reporter that checkpoints the population off the generation boundary.
+    Each generation is serialized on the training thread (so later generations cannot mutate it),
+    then compressed and written by a background writer thread. Every FULL_INTERVAL generations a
+    full snapshot is written; the generations in between are stored as deltas against the previous
+    checkpoint, with each genome encoded as gene-level column diffs (GeneDelta) from itself if it
+    survived, or else from its fitter parent in reproduction.ancestors. Fitness is stored apart
+    from the genes. A manifest lists the retained checkpoints, so the latest one is found without
+    listing the checkpoint directory.
+    Restoring a generation reproduces the population neat.Checkpointer.restore_checkpoint would.
+    """
+    FULL_INTERVAL = 10  # generations between full snapshots
+    RETAINED_FULLS = 3  # full snapshots (and their deltas) kept on disk
+    QUEUE_SIZE = 2  # pending checkpoints before the training thread waits for the writer
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, generation_interval: int = 1, full_interval: int = FULL_INTERVAL,
+                 retained_fulls: int = RETAINED_FULLS, reproduction=None):
+        self.directory = directory
+        self.generation_interval = generation_interval
+        self.full_interval = full_interval
+        self.retained_fulls = retained_fulls
+        self.reproduction = reproduction  # population's reproduction, whose ancestors pick diff references
+        self.current_generation = None
+        self.last_generation_checkpoint = -1
+        self.manifest = self.load_manifest(directory)
+        self.base = None  # generation of the last full snapshot
+        self.previous = None  # (generation, genome key -> (genome, gene columns)) of the last checkpoint
+        self.error = None  # last exception raised by the writer thread
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def start_generation(self, generation):
+        self.current_generation = generation
+
+    def end_generation(self, config, population, species_set):
+        if self.current_generation - self.last_generation_checkpoint >= self.generation_interval:
+            self.save_checkpoint(config, population, species_set, self.current_generation)
+            self.last_generation_checkpoint = self.current_generation
+
+    def save_checkpoint(self, config, population, species_set, generation) -> None:
+        """
+        Serializes the current simulation state and hands it to the writer thread.
+        """
+        if self.error is not None:
+            raise CheckpointException(f"Checkpoint writer failed: {self.error!r}")
+        state = self._dumps_state(population, (generation, config, species_set, random.getstate()))
+        columns = {key: (genome, GeneDelta.columns(genome, config.genome_config)) for key, genome in population.items()}
+
+        if self.base is None or generation - self.base >= self.full_interval:
+            self.base = generation
+            genomes = {key: pickle.dumps(genome, protocol=pickle.HIGHEST_PROTOCOL) for key, genome in population.items()}
+            record = {"keys": list(genomes), "genomes": genomes, "state": state}
+            self.queue.put((generation, None, None, record))
+        else:
+            parent_gen, previous = self.previous
+            ancestors = self.reproduction.ancestors if self.reproduction is not None else {}
+            genomes = {}  # genome key -> pickled genome, without a diff reference
+            diffs = {}  # genome key -> (reference key, node diff, connection diff)
+            for key, (genome, cols) in columns.items():
+                ref = self._reference(key, previous, ancestors)
+                if cols is None or ref is None or previous[ref][1] is None or previous[ref][1][0] != cols[0]:
+                    genomes[key] = pickle.dumps(genome, protocol=pickle.HIGHEST_PROTOCOL)
+                else:
+                    ref_cols = previous[ref][1]
+                    diffs[key] = (ref, GeneDelta.diff(ref_cols[1], cols[1]), GeneDelta.diff(ref_cols[2], cols[2]))
+            record = {"keys": list(population), "genomes": genomes, "diffs": diffs, "parent": parent_gen,
+                      "fitness": {key: population[key].fitness for key in diffs}, "state": state}
+            self.queue.put((generation, self.base, parent_gen, record))
+        self.previous = (generation, columns)
+
+    @staticmethod
+    def _reference(key, previous: dict, ancestors: dict):
+        """
+        :returns key of the genome in the previous checkpoint that a genome's genes derive from, or None
+        """
+        if key in previous:
+            return key  # survived reproduction
+        parents = ancestors.get(key)
+        if not parents or any(p not in previous for p in parents):
+            return None
+        # crossover keeps the genes of the fitter parent, as in DefaultGenome.configure_crossover()
+        parent1, parent2 = previous[parents[0]][0], previous[parents[-1]][0]
+        if parent1.fitness is None or parent2.fitness is None:
+            return None
+        return parent1.key if parent1.fitness > parent2.fitness else parent2.key
+
+    def __getstate__(self):
+        # pickled along with the species set's reporters; the writer thread and the manifest it
+        # mutates stay behind
+        state = self.__dict__.copy()
+        for attr in ("manifest", "reproduction", "base", "previous", "error", "queue", "writer"):
+            state[attr] = None
+        return state
+
+    def close(self) -> None:
+        """
+        Waits for pending checkpoints to be written and stops the writer thread.
+        """
+        if self.writer is not None and self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.error = e
+
+    def _write(self, generation: int, base_gen, parent_gen, record: dict) -> None:
+        """
+        Writes a checkpoint file, then publishes it in the manifest and prunes expired snapshots.
+        """
+        kind = "full" if base_gen is None else "delta"
+        filename = f"neat-{kind}-{generation}"
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=5) as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._write_atomic(filename, buffer.getvalue())
+
+        checkpoints = self.manifest["checkpoints"]
+        checkpoints[str(generation)] = {"file": filename, "base": generation if base_gen is None else base_gen,
+                                        "parent": parent_gen}
+        self.manifest["latest"] = generation
+
+        # drop checkpoints based on expired full snapshots
+        fulls = sorted(int(g) for g, c in checkpoints.items() if c["base"] == int(g))
+        expired = set(fulls[:-self.retained_fulls]) if self.retained_fulls else set()
+        removed = [checkpoints.pop(g)["file"] for g, c in list(checkpoints.items()) if c["base"] in expired]
+        self._write_atomic(self.MANIFEST, json.dumps(self.manifest).encode())
+
+        # delete files only once the manifest no longer references them
+        for filename in removed:
+            path = os.path.join(self.directory, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_atomic(self, filename: str, data: bytes) -> None:
+        path = os.path.join(self.directory, filename)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _dumps_state(population, state) -> bytes:
+        """
+        Pickles state with references to population genomes, preserving their shared identity.
+        """
+        genome_ids = {id(genome): key for key, genome in population.items()}
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: genome_ids.get(id(obj))
+        pickler.dump(state)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _read(directory: str, filename: str) -> dict:
+        with gzip.open(os.path.join(directory, filename)) as f:
+            return pickle.load(f)
+
+    @classmethod
+    def load_manifest(cls, directory: str) -> dict:
+        path = os.path.join(directory, cls.MANIFEST)
+        if not os.path.exists(path):
+            return {"latest": -1, "checkpoints": {}}
+        with open(path) as f:
+            return json.load(f)
+
+    @classmethod
+    def latest_checkpoint(cls, directory: str) -> int:
+        """
+        :returns generation of the latest checkpoint, or -1 if there is none
+        """
+        return cls.load_manifest(directory)["latest"]
+
+    @classmethod
+    def restore_checkpoint(cls, directory: str, generation: int = None) -> Population:
+        """
+        Resumes the simulation from a saved generation (default: the latest).
+        """
+        manifest = cls.load_manifest(directory)
+        generation = manifest["latest"] if generation is None else generation
+
+        # rebuild the generation's genomes from its full snapshot and deltas
+        record, population = cls._read_genomes(directory, manifest, generation)
+        unpickler = pickle.Unpickler(io.BytesIO(record["state"]))
+        unpickler.persistent_load = population.__getitem__
+        generation, config, species_set, rndstate = unpickler.load()
+        random.setstate(rndstate)
+        return Population(config, (population, species_set, generation))
+
+
+    @classmethod
+    def _read_genomes(cls, directory: str, manifest: dict, generation: int):
+        """
+        :returns (checkpoint record, genome key -> genome) of a checkpointed generation
+        """
+        entry = manifest["checkpoints"].get(str(generation))
+        if entry is None:
+            raise CheckpointException(f"No checkpoint for generation {generation} in {directory}")
+        record = cls._read(directory, entry["file"])
+        if entry["base"] == generation:
+            return record, {key: pickle.loads(record["genomes"][key]) for key in record["keys"]}
+        if "diffs" not in record:
+            # delta of whole genomes against the full snapshot
+            full = cls._read(directory, manifest["checkpoints"][str(entry["base"])]["file"])
+            genomes = {**full["genomes"], **record["genomes"]}
+            return record, {key: pickle.loads(genomes[key]) for key in record["keys"]}
+
+        _, previous = cls._read_genomes(directory, manifest, record["parent"])
+        population = {}
+        for key in record["keys"]:
+            if key in record["genomes"]:
+                population[key] = pickle.loads(record["genomes"][key])
+                continue
+            ref_key, node_diff, conn_diff = record["diffs"][key]
+            ref = previous[ref_key]
+            kind, nodes, conns = GeneDelta.columns(ref)
+            genome = GeneDelta.build(type(ref), key, GeneDelta.patch(nodes, node_diff), GeneDelta.patch(conns, conn_diff))
+            genome.fitness = record["fitness"][key]
+            population[key] = genome
+        return record, population
+
+
+class GeneDelta:
+    """
+    Gene-level delta encoding of genomes as column diffs. A genome's node and connection genes are
+    read into columns (gene keys plus one array per attribute, in the genome's gene order), and a
+    genome is stored as a diff from a reference genome's columns: which reference genes it kept,
+    the keys of its added genes, and per attribute a bit mask of the kept genes' changed values with
+    just those values. Supports neat.DefaultGenome with the default gene types and ArrayGenome.
+    """
+    NODE_ATTRS = ("bias", "response", "activation", "aggregation")
+    CONNECTION_ATTRS = ("weight", "enabled")
+    KEEP = "keep"  # genome's genes are the kept reference genes followed by the added ones
+    SORTED = "sorted"  # genome's genes are sorted by key
+
+    @classmethod
+    def columns(cls, genome, genome_config=None):
+        """
+        :returns (genome type name, (node keys, attribute columns), (connection IDs, attribute columns)),
+            or None if the genome type is not supported
+        """
+        if isinstance(genome, ArrayGenome):
+            return ("array", (genome.node_keys, [genome.bias, genome.response, genome.activation, genome.aggregation]),
+                    (genome.conn_ids, [genome.weight, genome.enabled]))
+        if type(genome) is not DefaultGenome:
+            return None
+        if genome_config is not None and (genome_config.node_gene_type is not DefaultNodeGene or
+                                          genome_config.connection_gene_type is not DefaultConnectionGene):
+            return None
+        nodes = list(genome.nodes.values())
+        node_cols = [np.array([n.bias for n in nodes], dtype=np.float64),
+                     np.array([n.response for n in nodes], dtype=np.float64),
+                     np.array([n.activation for n in nodes], dtype=ArrayGenome.NAME_DTYPE),
+                     np.array([n.aggregation for n in nodes], dtype=ArrayGenome.NAME_DTYPE)]
+        conns = list(genome.connections.values())
+        conn_ids = np.array([ArrayGenome.innovation(*c.key) for c in conns], dtype=np.int64)
+        conn_cols = [np.array([c.weight for c in conns], dtype=np.float64),
+                     np.array([c.enabled for c in conns], dtype=bool)]
+        return ("default", (np.array(list(genome.nodes), dtype=np.int64), node_cols), (conn_ids, conn_cols))
+
+    @classmethod
+    def build(cls, genome_type, key, nodes, conns):
+        """
+        :returns a genome of genome_type with the given node and connection columns
+        """
+        genome = genome_type(key)
+        node_keys, (bias, response, activation, aggregation) = nodes
+        conn_ids, (weight, enabled) = conns
+        if isinstance(genome, ArrayGenome):
+            genome.node_keys, genome.bias, genome.response = node_keys, bias, response
+            genome.activation, genome.aggregation = activation, aggregation
+            genome.conn_ids, genome.weight, genome.enabled = conn_ids, weight, enabled
+            return genome
+        for k, b, r, a, g in zip(node_keys.tolist(), bias.tolist(), response.tolist(), activation.tolist(),
+                                 aggregation.tolist()):
+            node = DefaultNodeGene(k)
+            node.bias, node.response, node.activation, node.aggregation = b, r, a, g
+            genome.nodes[k] = node
+        inputs = (conn_ids >> ArrayGenome.KEY_SHIFT).tolist()
+        outputs = (conn_ids & ((1 << ArrayGenome.KEY_SHIFT) - 1)).tolist()
+        for k, w, e in zip(zip(inputs, outputs), weight.tolist(), enabled.tolist()):
+            conn = DefaultConnectionGene(k)
+            conn.weight, conn.enabled = w, e
+            genome.connections[k] = conn
+        return genome
+
+    @classmethod
+    def diff(cls, ref, new) -> tuple:
+        """
+        Encodes a genome's genes (keys, attribute columns) as a diff from reference genes; empty
+        parts are None.
+        :returns (packed kept-gene mask, added keys, order, per-column (packed changed mask,
+            changed values, added values))
+        """
+        ref_keys, ref_cols = ref
+        keys, cols = new
+        keep = np.isin(ref_keys, keys)
+        kept = ref_keys[keep]
+        added = keys[~np.isin(keys, kept)]
+        merged = np.concatenate([kept, added])
+
+        # genome position of each kept then added gene
+        by_key = np.argsort(keys, kind="stable")
+        pos = by_key[np.searchsorted(keys, merged, sorter=by_key)]
+        if np.array_equal(merged, keys):
+            order = cls.KEEP
+        elif np.all(keys[1:] > keys[:-1]):
+            order = cls.SORTED
+        else:
+            order = np.empty(len(keys), dtype=np.int32)
+            order[pos] = np.arange(len(keys), dtype=np.int32)
+
+        columns = []
+        n_kept = len(kept)
+        for ref_col, col in zip(ref_cols, cols):
+            values = col[pos]
+            changed = values[:n_kept] != ref_col[keep]
+            column = (np.packbits(changed) if changed.any() else None,
+                      values[:n_kept][changed] if changed.any() else None,
+                      values[n_kept:] if len(added) else None)
+            columns.append(column if any(part is not None for part in column) else None)
+        return np.packbits(keep) if not keep.all() else None, added if len(added) else None, order, columns
+
+    @classmethod
+    def patch(cls, ref, diff) -> tuple:
+        """
+        Decodes a diff() against the same reference genes.
+        :returns (keys, attribute columns)
+        """
+        ref_keys, ref_cols = ref
+        keep_bits, added, order, columns = diff
+        keep = np.unpackbits(keep_bits, count=len(ref_keys)).astype(bool) if keep_bits is not None else slice(None)
+        kept = ref_keys[keep]
+        keys = np.concatenate([kept, added]) if added is not None else kept.copy()
+        cols = []
+        for ref_col, column in zip(ref_cols, columns):
+            values = ref_col[keep].copy()
+            if column is not None:
+                changed_bits, changed, added_values = column
+                if changed_bits is not None:
+                    values[np.unpackbits(changed_bits, count=len(kept)).astype(bool)] = changed
+                if added_values is not None:
+                    values = np.concatenate([values, added_values])
+            cols.append(values)
+        if isinstance(order, str):
+            if order == cls.KEEP:
+                return keys, cols
+            order = np.argsort(keys, kind="stable")
+        return keys[order], [col[order] for col in cols]
+
+
+class CheckpointException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,377 @@
+import asyncio
+import pickle
+import socket
+import sys
+import threading
+from collections import deque
+from eval_server import EvaluationServer, ConnectionClosedException
+from framing import FramedReader
+
+
+class WorkerLink:
+    """
+    Coordinator-side state of one connected worker agent.
+    """
+    __slots__ = ("name", "slots", "writer", "assigned", "started", "revoking", "leaving", "genomes", "eval_s", "steals",
+                 "lost")
+
+    def __init__(self, name: str, slots: int, writer: asyncio.StreamWriter):
+        self.name = name
+        self.slots = slots  # emulator clients run by the worker
+        self.writer = writer
+        self.assigned = {}  # genome ID -> unit sent but not yet started
+        self.started = {}  # genome ID -> unit being evaluated
+        self.revoking = set()  # genome IDs with a REVOKE in flight
+        self.leaving = False  # worker is finishing its started units before leaving
+        self.genomes = 0  # genomes evaluated this generation
+        self.eval_s = 0.0  # evaluation seconds reported this generation
+        self.steals = 0  # units stolen from this worker this generation
+        self.lost = 0  # units requeued after this worker lost them this generation
+
+    def held(self) -> int:
+        return len(self.assigned) + len(self.started)
+
+    def capacity(self, prefetch: int) -> int:
+        """
+        :returns number of further units the worker should be sent
+        """
+        return 0 if self.leaving else self.slots + prefetch - self.held()
+
+
+class CoordinatorServer(EvaluationServer):
+    """
+    Distributed EvaluationServer mode.
+    Remote worker agents (worker_agent.py) connect to the coordinator's stable port, each running
+    its own warm emulator pool and networks next to its emulators. Workers are sent pickled work
+    units (genome ID, genome) after a per-generation GENERATION message carrying the config and
+    evaluation seed, and stream back fitness and per-genome telemetry.
+    Each worker is kept filled to its emulator count plus PREFETCH units. When the queue runs dry,
+    idle workers steal units a busy worker has not started yet. Workers may join or leave at any
+    time; units held by a worker that disconnects are requeued.
+    Messages are pickled, so the coordinator port must only be reachable by trusted hosts.
+
+    Worker -> coordinator: HELLO(name, slots), STARTED(id), REVOKED(id), RESULT(gen, id, fitness,
+                           telemetry), LOST(id), LEAVING, BYE
+    Coordinator -> worker: GENERATION(gen, config, seed, population size), UNIT(gen, (index, id, genome)), REVOKE(id),
+                           FINISHED
+    """
+    HOST = "0.0.0.0"  # accept workers from other hosts
+    PORT = 7085  # stable coordinator port
+    PREFETCH = 1  # units queued on a worker beyond its emulator count
+    MAX_REQUEUES = 2  # max times a genome is requeued after losing its worker
+    CLOSE_TIMEOUT = 30.0  # seconds to wait for workers to receive FINISHED on close
+
+    def __init__(self, game_mode: str):
+        super().__init__(game_mode)
+        self.client_ps = []  # emulators are run by the workers
+        self.loop = None  # coordinator event loop
+        self.loop_thread = None  # thread running the coordinator event loop
+        self.server = None  # persistent socket server
+        self.workers = {}  # worker name -> WorkerLink
+        self.queue = deque()  # units waiting for a worker
+        self.remaining = set()  # genome IDs of the generation without a fitness
+        self.units = {}  # genome ID -> unit of the generation
+        self.requeues = {}  # genome ID -> number of requeues this generation
+        self.generation = None  # GENERATION message of the generation being evaluated
+        self.done = None  # set when the generation is evaluated or has failed
+        self.handlers = []  # worker handler tasks
+        self.closing = False
+
+    def eval_genomes(self, genomes, config, gen_id) -> bool:
+        """
+        Evaluates a population of genomes on the connected workers.
+        """
+        # set generation vars
+        self.logger = self._init_logger(gen_id)  # init the logger for this generation
+        self.config = config
+        self.genomes = genomes
+        self.gen_id = gen_id
+
+        # initial gen logs
+        self.logger.info(f"****** Evaluating Generation {gen_id} ******")
+        self.logger.info(f"completed={len(self.evaluated_genomes)}, total={len(genomes)}")
+
+        # start coordinator on first use
+        if self.loop is None:
+            self._start_coordinator()
+
+        # evaluate genomes
+        future = asyncio.run_coroutine_threadsafe(self._eval_generation(), self.loop)
+        try:
+            future.result()
+        except KeyboardInterrupt:  # TODO move outside of eval_server
+            self.logger.error("KeyboardInterrupt")
+            self.close()
+            sys.exit()
+
+        # exit program if an evaluation failure occurred
+        if self.eval_failure:
+            self.logger.error("An evaluation exception occurred!")
+            self.close()
+            sys.exit()
+
+        # successful generation evaluation
+        self.evaluated_genomes = set()  # reset evaluated genomes
+        return True
+
+    def close(self) -> None:
+        """
+        Sends the finish state to all workers and stops the coordinator.
+        """
+        if self.loop is None:
+            return
+        self.logger.debug("Closing coordinator...")
+        future = asyncio.run_coroutine_threadsafe(self._close_coordinator(), self.loop)
+        try:
+            future.result(self.CLOSE_TIMEOUT)
+        except Exception as e:
+            self.logger.error(f"Coordinator did not close cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop = None
+
+    def emulator_slots(self) -> int:
+        """
+        Number of genomes evaluated concurrently by the connected workers.
+        """
+        return sum(link.slots for link in self.workers.values()) or self.N_CLIENTS
+
+    @staticmethod
+    def frame_message(msg: tuple) -> bytes:
+        """
+        Pickles and length-prefixes a coordinator protocol message.
+        """
+        return FramedReader.frame(pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    async def read_message(reader: asyncio.StreamReader) -> tuple:
+        """
+        Reads the next coordinator protocol message. Idle links may wait indefinitely.
+        """
+        try:
+            header = await reader.readuntil(b" ")
+            return pickle.loads(await reader.readexactly(int(header[:-1])))
+        except asyncio.IncompleteReadError:
+            raise ConnectionClosedException("Worker link closed.")
+
+    def _start_coordinator(self) -> None:
+        """
+        Starts the coordinator event loop thread and socket server.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_server(), self.loop).result()
+
+    async def _start_server(self) -> None:
+        """
+        Binds the persistent coordinator socket server.
+        """
+        self.server = await asyncio.start_server(self._accept_worker, self.HOST, self.PORT)
+        self.PORT = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"Coordinator: listening for workers on port {self.PORT}")
+
+    async def _eval_generation(self) -> None:
+        """
+        Queues the generation's units and waits until all are evaluated or evaluation fails.
+        """
+        self.done = asyncio.Event()
+        self.requeues = {}
+        self.units = {}
+        self.queue.clear()
+        for idx, (_id, genome) in enumerate(self.genomes):
+            if _id not in self.evaluated_genomes:
+                self.units[_id] = (idx, _id, genome)
+                self.queue.append(self.units[_id])
+        self.remaining = set(self.units)
+        if not self.remaining:
+            return
+
+        # announce the generation to connected workers, then fill them
+        self.generation = ("GENERATION", self.gen_id, self.config, self.eval_seed(self.gen_id), len(self.genomes))
+        for link in self.workers.values():
+            self._reset_link(link)
+            self._send(link, self.generation)
+        if not self.workers:
+            self.logger.info("Waiting for workers to connect...")
+        self._dispatch()
+        await self.done.wait()
+        self._log_workers()
+
+    async def _close_coordinator(self) -> None:
+        """
+        Sends the finish state to all workers and closes the socket server.
+        """
+        self.closing = True
+        for link in list(self.workers.values()):
+            self._send(link, ("FINISHED",))
+        await asyncio.wait_for(asyncio.gather(*self.handlers, return_exceptions=True), self.CLOSE_TIMEOUT)
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _accept_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Registers and serves a worker for the lifetime of its connection.
+        """
+        sock = writer.get_extra_info("socket")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)  # detect vanished hosts
+        link = None
+        task = asyncio.current_task()
+        self.handlers.append(task)
+        try:
+            kind, name, slots = await self.read_message(reader)
+            if kind != "HELLO" or name in self.workers:
+                self.logger.warning(f"Rejecting worker {name!r} from {writer.get_extra_info('peername')}.")
+                return
+            link = self.workers[name] = WorkerLink(name, slots, writer)
+            self.logger.info(f"Worker {name} joined with {slots} emulators.")
+            if self.remaining:
+                self._send(link, self.generation)
+                self._dispatch()
+            await self._serve_worker(link, reader)
+        except (ConnectionClosedException, ConnectionError) as e:
+            if not self.closing:
+                self.logger.warning(f"Worker {link.name if link else '?'} connection lost: {e!r}")
+        finally:
+            self.handlers.remove(task)
+            if link is not None:
+                self._drop_worker(link)
+            writer.close()
+
+    async def _serve_worker(self, link: WorkerLink, reader: asyncio.StreamReader) -> None:
+        """
+        Handles a worker's messages until it says BYE.
+        """
+        while True:
+            msg = await self.read_message(reader)
+            kind = msg[0]
+            if kind == "STARTED":
+                link.revoking.discard(msg[1])
+                unit = link.assigned.pop(msg[1], None)
+                if unit is not None:
+                    link.started[msg[1]] = unit
+            elif kind == "REVOKED":
+                link.revoking.discard(msg[1])
+                unit = link.assigned.pop(msg[1], None)
+                if unit is not None and msg[1] in self.remaining:
+                    self.queue.appendleft(unit)  # returned unstarted; dispatch next
+                self._dispatch()
+            elif kind == "RESULT":
+                self._record_result(link, *msg[1:])
+                self._dispatch()
+            elif kind == "LOST":
+                unit = link.started.pop(msg[1], None) or link.assigned.pop(msg[1], None)
+                if unit is not None:
+                    self._requeue(link, unit)
+                self._dispatch()
+            elif kind == "LEAVING":
+                self.logger.info(f"Worker {link.name} is leaving...")
+                link.leaving = True
+            elif kind == "BYE":
+                self.logger.info(f"Worker {link.name} left.")
+                return
+
+    def _record_result(self, link: WorkerLink, gen_id: int, _id: int, fitness: float, telemetry: dict) -> None:
+        """
+        Records a worker's fitness result for a genome of the current generation.
+        """
+        link.started.pop(_id, None)
+        link.assigned.pop(_id, None)
+        if gen_id != self.gen_id or _id not in self.remaining:
+            return  # stale or duplicate result
+        _, _, genome = self.units[_id]
+        genome.fitness = fitness
+        self.remaining.discard(_id)
+        self._record_fitness(_id, genome)
+        link.genomes += 1
+        link.eval_s += telemetry.get("eval_s", 0.0)
+        self.durations[_id] = telemetry.get("eval_s", 0.0)
+        if telemetry.get("seeds"):
+            self.seeded.add(_id)
+        self.metrics.client().add_remote_genome(telemetry)
+        self.logger.info(f"Genome #{_id} fitness: {fitness} (worker {link.name})")
+        if not self.remaining:
+            self.done.set()
+
+    def _dispatch(self) -> None:
+        """
+        Fills every worker up to its emulator count plus PREFETCH units, stealing unstarted units
+        for idle workers once the queue is empty.
+        """
+        for link in sorted(self.workers.values(), key=WorkerLink.held):  # idlest first
+            while self.queue and link.capacity(self.PREFETCH) > 0:
+                unit = self.queue.popleft()
+                if unit[1] not in self.remaining:
+                    continue
+                link.assigned[unit[1]] = unit
+                self._send(link, ("UNIT", self.gen_id, unit))
+            if not self.queue and link.capacity(self.PREFETCH) > self.PREFETCH:
+                self._steal(link)
+
+    def _steal(self, thief: WorkerLink) -> None:
+        """
+        Revokes an unstarted unit from the worker with the most waiting units, for an idle worker.
+        """
+        victims = [(len(link.assigned) - len(link.revoking), link) for link in self.workers.values() if link is not thief]
+        waiting, victim = max(victims, key=lambda v: v[0], default=(0, None))
+        if waiting <= 0:
+            return
+        _id = next(_id for _id in victim.assigned if _id not in victim.revoking)
+        victim.revoking.add(_id)
+        victim.steals += 1
+        self.logger.debug(f"Stealing genome #{_id} from worker {victim.name} for worker {thief.name}.")
+        self._send(victim, ("REVOKE", _id))
+
+    def _requeue(self, link: WorkerLink, unit) -> None:
+        """
+        Requeues a unit lost with its worker, failing the generation after MAX_REQUEUES.
+        """
+        _, _id, _ = unit
+        if _id not in self.remaining:
+            return
+        link.lost += 1
+        self.requeues[_id] = self.requeues.get(_id, 0) + 1
+        if self.requeues[_id] > self.MAX_REQUEUES:
+            self.logger.error(f"Genome #{_id} lost its worker {self.requeues[_id]} times.")
+            self.eval_failure = True
+            self.done.set()
+        else:
+            self.logger.warning(f"Requeueing genome #{_id} after losing it on worker {link.name}...")
+            self.queue.appendleft(unit)
+
+    def _drop_worker(self, link: WorkerLink) -> None:
+        """
+        Unregisters a departed worker, requeueing its unstarted and lost units.
+        """
+        self.workers.pop(link.name, None)
+        for unit in link.assigned.values():
+            if unit[1] in self.remaining:
+                self.queue.appendleft(unit)
+        for unit in link.started.values():
+            self._requeue(link, unit)
+        link.assigned.clear()
+        link.started.clear()
+        self._dispatch()
+
+    def _send(self, link: WorkerLink, msg: tuple) -> None:
+        if not link.writer.is_closing():
+            link.writer.write(self.frame_message(msg))
+
+    @staticmethod
+    def _reset_link(link: WorkerLink) -> None:
+        link.assigned.clear()
+        link.started.clear()
+        link.revoking.clear()
+        link.genomes = 0
+        link.eval_s = 0.0
+        link.steals = 0
+        link.lost = 0
+
+    def _log_workers(self) -> None:
+        """
+        Logs the generation's per-worker throughput.
+        """
+        for link in self.workers.values():
+            self.logger.info(f"Worker {link.name}: genomes={link.genomes}, eval={link.eval_s:.1f}s, "
+                             f"stolen={link.steals}, lost={link.lost}")
@@ -3,6 +3,7 @@ import re
 from collections.abc import MutableMapping
 from pandas.core.common import flatten
 import numpy as np
+from protocol import PackedProtocol
 
 
 class Encoder:
@@ -90,6 +91,188 @@ class Encoder:
         return dict(items)
 
 
+class StateEncoder:
+    """
+    Schema-compiled game state encoder.
+    Compiles the input state schema once into a fixed key-to-slot layout, then fills a reused
+    input buffer with direct indexed writes. Produces the same vectors as Encoder.vectorize_state().
+    Instances are not thread-safe; use one encoder per client.
+    """
+    # feature kinds
+    RAW = 0  # value as-is
+    FLAG = 1  # 1 if value > 0
+    SCALED = 2  # rounded value / max
+    BINARY = 3  # n-bit binary expansion
+
+    # precomputed table size for scaled features
+    TABLE_SIZE = 1024
+
+    # feature rules, in Encoder.vectorize_state() match order (pattern, kind, param)
+    FEATURES = (
+        (Encoder.ACTIVE_PTN, RAW, None),
+        (Encoder.ID_PTN, BINARY, Encoder.POKEMON[1]),
+        (Encoder.MOVE_PP_PTN, FLAG, None),
+        (Encoder.BOOST_PTN, SCALED, Encoder.BOOST_MAX),
+        (Encoder.STATS_PTN, SCALED, Encoder.STAT_MAX),
+        (Encoder.STATUS_PTN, BINARY, 8),
+        (Encoder.CONFUSED_PTN, BINARY, 8),
+        (Encoder.HP_PTN, SCALED, Encoder.HP_MAX),
+    )
+
+    # input state schema (mirrors INPUTSTATE_STRUCT in eval_battlefactory.lua)
+    POKEMON_SCHEMA = {
+        "ID": 0, "HeldItem": 0, "Ability": 0, "Active": 0,
+        "Moves": {str(i): {"ID": 0, "PP": 0} for i in range(1, 5)},
+        "Stats": {
+            "Status": 0, "HP": 0, "MaxHP": 0, "ATK": 0, "DEF": 0, "SPEED": 0, "SPA": 0, "SPD": 0,
+            "ATK_Boost": 0, "DEF_Boost": 0, "SPA_Boost": 0, "SPD_Boost": 0, "EVA_Boost": 0,
+            "SPEED_Boost": 0, "Confused": 0,
+        },
+    }
+    STATE_SCHEMA = {
+        "State": 0,
+        "AllyParty": dict.fromkeys(("1", "2", "3", "4", "5", "6"), POKEMON_SCHEMA),
+        "EnemyParty": dict.fromkeys(("1", "2", "3"), POKEMON_SCHEMA),
+    }
+
+    _layout = None  # compiled (size, groups), shared by all instances
+
+    def __init__(self):
+        self.size, self.groups = self.compile()
+        self.buffer = np.zeros(self.size)
+        self.packed = np.zeros(len(PackedProtocol.PARTY_ROWS) * len(PackedProtocol.POKEMON_FIELDS) + 1, dtype=np.int64)
+
+    @classmethod
+    def compile(cls):
+        """
+        Compiles the state schema into feature groups of
+        (kind, param, key paths, buffer slots, table, packed record indices).
+        """
+        if cls._layout is not None:
+            return cls._layout
+
+        # assign buffer slots in sorted key order
+        fields = {}
+        slot = 0
+        for key in Encoder.flatten_dict(cls._sort_schema(cls.STATE_SCHEMA)):
+            feature = cls._match_feature(key)
+            if feature is None:
+                continue
+            kind, param = feature
+            width = param if kind == cls.BINARY else 1
+            fields.setdefault(feature, []).append((tuple(key.split('.')), range(slot, slot + width)))
+            slot += width
+
+        # group fields by feature
+        groups = []
+        for (kind, param), items in fields.items():
+            paths = tuple(path for path, _ in items)
+            if kind == cls.BINARY:
+                slots = np.array([list(r) for _, r in items])
+                table = cls._binary_table(param)
+            else:
+                slots = np.array([r.start for _, r in items])
+                table = cls._scaled_table(param) if kind == cls.SCALED else None
+            packed = np.array([cls._packed_index(path) for path in paths])
+            groups.append((kind, param, paths, slots, table, packed))
+
+        cls._layout = (slot, tuple(groups))
+        return cls._layout
+
+    def vectorize_state(self, state: dict) -> np.ndarray:
+        """
+        Encodes the given game input state into the reused input buffer.
+        :returns the input buffer, valid until the next call
+        """
+        buffer = self.buffer
+        for kind, param, paths, slots, table, _ in self.groups:
+            values = [self._lookup(state, path) for path in paths]
+            if kind == self.RAW:
+                buffer[slots] = values
+            elif kind == self.FLAG:
+                buffer[slots] = [1 if v > 0 else 0 for v in values]
+            elif kind == self.SCALED:
+                if all(type(v) is int and 0 <= v < self.TABLE_SIZE for v in values):
+                    buffer[slots] = table[values]
+                else:
+                    buffer[slots] = [round(v / param, Encoder.ERR_DIGITS) for v in values]
+            else:
+                if not all(type(v) is int and 0 <= v < len(table) for v in values):
+                    raise EncodingMatchException(f"Value out of {param}-bit range: {values}")
+                buffer[slots] = table[values]
+        return buffer
+
+    def vectorize_packed(self, state: int, parties: np.ndarray) -> np.ndarray:
+        """
+        Encodes a decoded PackedProtocol state into the reused input buffer.
+        :returns the input buffer, valid until the next call
+        """
+        packed = self.packed
+        packed[:-1] = parties.reshape(-1)
+        packed[-1] = state
+        buffer = self.buffer
+        for kind, param, _, slots, table, idx in self.groups:
+            values = packed[idx]
+            if kind == self.RAW:
+                buffer[slots] = values
+            elif kind == self.FLAG:
+                buffer[slots] = values > 0
+            elif kind == self.SCALED:
+                if values.min() >= 0 and values.max() < self.TABLE_SIZE:
+                    buffer[slots] = table[values]
+                else:
+                    buffer[slots] = [round(int(v) / param, Encoder.ERR_DIGITS) for v in values]
+            else:
+                if values.min() < 0 or values.max() >= len(table):
+                    raise EncodingMatchException(f"Value out of {param}-bit range: {values}")
+                buffer[slots] = table[values]
+        return buffer
+
+    @classmethod
+    def _packed_index(cls, path: tuple) -> int:
+        """
+        Maps a state key path to its index in the flattened packed records (game state last).
+        """
+        if path == (Encoder.STATE_PTN,):
+            return len(PackedProtocol.PARTY_ROWS) * len(PackedProtocol.POKEMON_FIELDS)
+        row = PackedProtocol.PARTY_ROWS.index(path[:2])
+        col = [field for field, _ in PackedProtocol.POKEMON_FIELDS].index(path[2:])
+        return row * len(PackedProtocol.POKEMON_FIELDS) + col
+
+    @classmethod
+    def _match_feature(cls, key: str):
+        """
+        Matches a flattened state key to its (kind, param) feature, or None if the key is not encoded.
+        """
+        if key == Encoder.STATE_PTN:
+            return cls.BINARY, Encoder.GAME_STATE[1]
+        for ptn, kind, param in cls.FEATURES:
+            if ptn.match(key):
+                return kind, param
+        return None
+
+    @classmethod
+    def _binary_table(cls, n: int) -> np.ndarray:
+        return np.array([Encoder.encode_binary(x, n) for x in range(2 ** n)], dtype=float)
+
+    @classmethod
+    def _scaled_table(cls, max_value: int) -> np.ndarray:
+        return np.array([round(x / max_value, Encoder.ERR_DIGITS) for x in range(cls.TABLE_SIZE)])
+
+    @classmethod
+    def _sort_schema(cls, item: dict) -> dict:
+        return {k: cls._sort_schema(v) if isinstance(v, dict) else v for k, v in sorted(item.items())}
+
+    @staticmethod
+    def _lookup(state: dict, path: tuple):
+        try:
+            for k in path:
+                state = state[k]
+        except (KeyError, TypeError):
+            raise EncodingMatchException(f"Missing state key: {'.'.join(path)}")
+        return state
+
+
 class EncodingMatchException(Exception):
     def __init__(self, message):
         self.message = message
@@ -48,6 +48,8 @@ local has_battled
 local input_state
 local turn
 local turn_failure
+local frame_count  -- frames emulated this genome
+local stalled  -- a press_until hit PRESS_FRAME_CAP; the run is ended in an unknown screen
 
 -- game loop options
 local FORCE_MOVES = false  -- forces move actions
@@ -55,6 +57,40 @@ local LOAD_SLOT = 2  -- the emulator save slot to load
 local PUNISH_ACTION_FAILURES = true  -- ends run after an action failure
 local DISABLE_GRAPHICS = true
 local ADD_RNG = false
+local PACKED_PROTOCOL = true  -- requests the packed wire protocol at the READY handshake
+local BUFFER_LOGS = true  -- buffers LOG lines and flushes them with the FITNESS message
+local LOG_BUFFER_MAX = 500  -- buffered LOG lines flushed early in a single LOG message
+local PRESS_FRAME_CAP = 3000  -- cap on tapping through dialogue and transitions
+local SNAPSHOTS = true  -- branches genomes from an in-memory savestate taken at the first decision point
+
+-- shared-memory transport state
+local shm_name = comm.mmfGetFilename()
+local shm = shm_name ~= nil and shm_name ~= ""  -- started with --mmf?
+local SHM_REQUEST = shm and shm_name.."_req"
+local SHM_RESPONSE = shm and shm_name.."_resp"
+local shm_req_seq = 0  -- last request sequence written
+local shm_resp_seq = 0  -- last response sequence read
+
+-- packed wire protocol consts (see protocol.py)
+local PACKED_VERSION = 1
+local PACKED_HEADER_FORMAT = "<c2I1I1I1I1"
+local PACKED_POKEMON_FORMAT = "<I2I2I1I1I2I2I2I2I1I1I1I1I1I1I2I2I2I2I2I2I2I1I1I1I1I1I1"
+local packed_protocol = false  -- negotiated with the server
+local log_buffer = {}  -- buffered LOG lines
+local eval_seed  -- evaluation seed of the current genome (0 without ADD_RNG)
+local snapshot  -- memorysavestate id at the first decision point, or nil
+local snapshot_seed  -- evaluation seed the snapshot was taken under
+local snapshot_ttl  -- ttl remaining when the snapshot was taken
+
+-- decrypted party cache
+local PARTY_CACHE_MAX = 64  -- cached pokemon (and keystreams) before the caches are cleared
+local MOVE_KEYS = {"1", "2", "3", "4"}
+local party_cache = {}  -- "pid:checksum" -> {data = encrypted data block, fields = decoded data block}
+local party_cache_count = 0
+local party_cache_hits = 0  -- per genome
+local party_cache_misses = 0  -- per genome
+local keystreams = {}  -- decryption seed -> keystream words
+local keystream_count = 0
 
 -- orderings of shuffled pokemon data blocks from shift-values
 local SHUFFLE_ORDER = {
@@ -128,6 +164,7 @@ local POKEMON_STRUCT = {
 -- unencrypted pokemon memory block offsets
 local BLOCK_A = {  -- 56 bytes
     SIZE = 0x38,
+    READ_SIZE = 0x21,  -- bytes spanning the fields below
     ID = 0x0,
     HELD_ITEM = 0x2,
     MOVE1_ID = 0x4,
@@ -138,6 +175,7 @@ local BLOCK_A = {  -- 56 bytes
 }
 local BLOCK_B = {  -- 192 bytes
     SIZE = 0xC0,
+    READ_SIZE = 0x71,  -- bytes spanning the fields below
     ID = 0x0,
     HP = 0x4C,
     MAXHP = 0x50,
@@ -156,8 +194,47 @@ local BLOCK_B = {  -- 192 bytes
     CONFUSED = 0x70,
 }
 
+-- shared-memory transport (see shm_transport.py), used instead of the socket when started with --mmf
+local function send_msg(msg)
+    if not shm then
+        comm.socketServerSend(msg)
+        return
+    end
+    -- wait until the server has read the previous request, which may have had no reply
+    while tonumber(comm.mmfRead(SHM_RESPONSE, 8), 16) ~= shm_req_seq do end
+    shm_req_seq = (shm_req_seq + 1) % 0x100000000
+    local seq = string.format("%08X", shm_req_seq)
+    comm.mmfWrite(SHM_REQUEST, seq..string.format("%08X", #msg)..msg..seq)
+end
+
+local function recv_msg()
+    if not shm then
+        return comm.socketServerResponse()
+    end
+    local expected = (shm_resp_seq + 1) % 0x100000000
+    local header = comm.mmfRead(SHM_RESPONSE, 24)
+    while tonumber(header:sub(9, 16), 16) ~= expected do
+        header = comm.mmfRead(SHM_RESPONSE, 24)
+    end
+    shm_resp_seq = expected
+    return comm.mmfRead(SHM_RESPONSE, 24 + tonumber(header:sub(17, 24), 16)):sub(25)
+end
+
+local function flush_logs()
+    local logs = table.concat(log_buffer, "\n")
+    log_buffer = {}
+    return logs
+end
+
 local function log(msg)
-    comm.socketServerSend("LOG:"..tostring(msg))
+    if not BUFFER_LOGS then
+        send_msg("LOG:"..tostring(msg))
+        return
+    end
+    log_buffer[#log_buffer+1] = tostring(msg)
+    if #log_buffer >= LOG_BUFFER_MAX then
+        send_msg("LOG:"..flush_logs())
+    end
 end
 
 -- copy table data structures
@@ -204,141 +281,175 @@ local function mult32(a, b)
 	return i
 end
 
--- decrypt pokemon bytes
-local function decrypt(seed, addr, words)
-	local X = { seed }
-	local D = {}
-	for n = 1, words+1, 1 do
-		X[n+1] = mult32(X[n], 0x41C64E6D) + 0x6073
-		D[n] = memory.read_u16_le(addr + ((n - 1) * 0x02))
-		D[n] = D[n] ~ (X[n+1] >> 16)
-		-- log(n, string.format("%X", D[n]))
+-- decryption keystream for a seed: the high words of successive PRNG states
+local function keystream(seed, words)
+	local K = keystreams[seed]
+	if K and #K >= words then
+		return K
 	end
-	return D
+	if keystream_count >= PARTY_CACHE_MAX then
+		keystreams = {}
+		keystream_count = 0
+	end
+	K = {}
+	local x = seed
+	for n = 1, words, 1 do
+		x = mult32(x, 0x41C64E6D) + 0x6073
+		K[n] = (x >> 16) & 0xFFFF
+	end
+	keystreams[seed] = K
+	keystream_count = keystream_count + 1
+	return K
 end
 
--- read encrypted pokemon data
-local function read_pokemon(ptr, party_idx)
-	-- offset pokemon pointer for party index
-	ptr = ptr + (0xEC * party_idx)
-
-	-- pokemon decryption vars
-	local pid = memory.read_u32_le(ptr + 0x0)
-	local checksum = memory.read_u16_le(ptr + 0x06)
+-- decodes the static fields of a pokemon's encrypted data block
+local function decode_data_block(bytes, pid, checksum)
+	local K = keystream(checksum, 64)
 	local shift = tostring(((pid & 0x3E000) >> 0xD) % 24)
-	-- log("PID:", pid)
-	-- log("Checksum:", checksum)
-	-- log("Shift:", shift)
-
-	-- decrypt pokemon bytes
-	local D = decrypt(checksum, ptr + 0x08, 64) -- data
-	local B = decrypt(pid, ptr + 0x88, 50) -- battle stats
 
+	-- decrypts the data word at an offset from the start of the data block
 	local function fetch_Dv(block_offset, var_offset)
-		return D[((block_offset + var_offset) / 2) + 1]
-	end
-
-	local function fetch_Bv(var_offset)
-		return B[((var_offset - 0x88) / 2) + 1]
+		local n = ((block_offset + var_offset) // 2) + 1
+		local i = 0x08 + (n - 1) * 2 + 1
+		return (bytes[i] | (bytes[i + 1] << 8)) ~ K[n]
 	end
 
 	-- calculate shuffled block offsets
 	local a_offset = (SHUFFLE_ORDER[shift]["A"] - 1) * 0x20
 	local b_offset = (SHUFFLE_ORDER[shift]["B"] - 1) * 0x20
-	-- local c_offset = (SHUFFLE_ORDER[shift]["C"] - 1) * 0x20
-	-- local d_offset = (SHUFFLE_ORDER[shift]["D"] - 1) * 0x20
-
-	-- instantiate new pokemon obj and populate vars
-	local pokemon = table.shallow_copy(POKEMON_STRUCT)
-	pokemon.ID = fetch_Dv(a_offset, 0x08 - 0x08) & 0x0FFF
-	pokemon.HeldItem = fetch_Dv(a_offset, 0x0A - 0x08) & 0x0FFF
-	pokemon.Ability = (fetch_Dv(a_offset, 0x14 - 0x08) & 0xFF00) >> 8
-	pokemon.Moves = {
-		["1"] = {
-			ID = fetch_Dv(b_offset, 0x28 - 0x28) & 0xFFFF,
-			PP = fetch_Dv(b_offset, 0x30 - 0x28) & 0x00FF,
-		};
-		["2"] = {
-			ID = fetch_Dv(b_offset, 0x2A - 0x28) & 0xFFFF,
-			PP = (fetch_Dv(b_offset, 0x30 - 0x28) & 0xFF00) >> 8,
-		};
-		["3"] = {
-			ID = fetch_Dv(b_offset, 0x2C - 0x28) & 0xFFFF,
-			PP = fetch_Dv(b_offset, 0x32 - 0x28) & 0x00FF,
-		};
-		["4"] = {
-			ID = fetch_Dv(b_offset, 0x2E - 0x28) & 0xFFFF,
-			PP = (fetch_Dv(b_offset, 0x32 - 0x28) & 0xFF00) >> 8,
-		};
+	return {
+		ID = fetch_Dv(a_offset, 0x08 - 0x08) & 0x0FFF,
+		HeldItem = fetch_Dv(a_offset, 0x0A - 0x08) & 0x0FFF,
+		Ability = (fetch_Dv(a_offset, 0x14 - 0x08) & 0xFF00) >> 8,
+		MoveIDs = {
+			fetch_Dv(b_offset, 0x28 - 0x28) & 0xFFFF,
+			fetch_Dv(b_offset, 0x2A - 0x28) & 0xFFFF,
+			fetch_Dv(b_offset, 0x2C - 0x28) & 0xFFFF,
+			fetch_Dv(b_offset, 0x2E - 0x28) & 0xFFFF,
+		},
+		PPs = {
+			fetch_Dv(b_offset, 0x30 - 0x28) & 0x00FF,
+			(fetch_Dv(b_offset, 0x30 - 0x28) & 0xFF00) >> 8,
+			fetch_Dv(b_offset, 0x32 - 0x28) & 0x00FF,
+			(fetch_Dv(b_offset, 0x32 - 0x28) & 0xFF00) >> 8,
+		},
 	}
-	-- pokemon.IVs = {  -- TODO
-	--	HP = 0x0,
-	--	ATK = 0x0,
-	--	DEF = 0x0,
-	--	SPEED = 0x0,
-	--	SPA = 0x0,
-	--	SPD = 0x0,
-	--}
-	-- pokemon.EVs = {
-	--	HP = fetch_Dv(a_offset, 0x18 - 0x08) & 0x00FF,
-	--	ATK = (fetch_Dv(a_offset, 0x18 - 0x08) & 0xFF00) >> 8,
-	--	DEF = fetch_Dv(a_offset, 0x1A - 0x08) & 0x00FF,
-	--	SPEED = (fetch_Dv(a_offset, 0x1A - 0x08) & 0xFF00) >> 8,
-	--	SPA = fetch_Dv(a_offset, 0x1C - 0x08) & 0x00FF,
-	--	SPD = (fetch_Dv(a_offset, 0x1C - 0x08) & 0xFF00) >> 8,
-	-- }
-	pokemon.Stats = {
-		Status = fetch_Bv(0x88) & 0x00FF, -- TODO test
-		Confused = 0x0,
-		-- Level = fetch_Bv(0x8C) & 0x00FF,
-		HP = fetch_Bv(0x8E) & 0xFFFF,
-		MaxHP = fetch_Bv(0x90) & 0xFFFF,
-		ATK = fetch_Bv(0x92) & 0xFFFF,
-		DEF = fetch_Bv(0x94) & 0xFFFF,
-		SPEED = fetch_Bv(0x96) & 0xFFFF,
-		SPA = fetch_Bv(0x98) & 0xFFFF,
-		SPD = fetch_Bv(0x9A) & 0xFFFF,
-		ATK_Boost = 0x6,
-		DEF_Boost = 0x6,
-		SPA_Boost = 0x6,
-		SPD_Boost = 0x6,
-		SPEED_Boost = 0x6,
-		EVA_Boost = 0x6,
-	}
-	return pokemon
+end
+
+-- read encrypted pokemon data into pk (or a new pokemon)
+-- the decoded data block is cached by PID and checksum; battle stats are re-read every call
+local function read_pokemon(ptr, party_idx, pk)
+	-- offset pokemon pointer for party index
+	ptr = ptr + (0xEC * party_idx)
+	local bytes = memory.read_bytes_as_array(ptr, 0xEC)  -- single bulk read, 1-indexed
+
+	-- pokemon decryption vars
+	local pid = bytes[1] | (bytes[2] << 8) | (bytes[3] << 16) | (bytes[4] << 24)
+	local checksum = bytes[7] | (bytes[8] << 8)
+
+	-- look up the decoded data block, validated against the encrypted bytes
+	local data = string.char(table.unpack(bytes, 0x09, 0x88))
+	local key = pid..":"..checksum
+	local entry = party_cache[key]
+	if entry and entry.data == data then
+		party_cache_hits = party_cache_hits + 1
+	else
+		party_cache_misses = party_cache_misses + 1
+		if party_cache_count >= PARTY_CACHE_MAX then
+			party_cache = {}
+			party_cache_count = 0
+		end
+		entry = {data = data, fields = decode_data_block(bytes, pid, checksum)}
+		party_cache[key] = entry
+		party_cache_count = party_cache_count + 1
+	end
+
+	-- decrypts the battle stat word at an absolute offset
+	local K = keystream(pid, 10)
+	local function fetch_Bv(var_offset)
+		local n = ((var_offset - 0x88) // 2) + 1
+		return (bytes[var_offset + 1] | (bytes[var_offset + 2] << 8)) ~ K[n]
+	end
+
+	-- populate pokemon vars
+	local fields = entry.fields
+	pk = pk or table.shallow_copy(POKEMON_STRUCT)
+	pk.ID = fields.ID
+	pk.HeldItem = fields.HeldItem
+	pk.Ability = fields.Ability
+	pk.Active = 0x0
+	for i = 1, 4, 1 do
+		local move = pk.Moves[MOVE_KEYS[i]]
+		move.ID = fields.MoveIDs[i]
+		move.PP = fields.PPs[i]
+	end
+	local stats = pk.Stats
+	stats.Status = fetch_Bv(0x88) & 0x00FF -- TODO test
+	stats.Confused = 0x0
+	stats.HP = fetch_Bv(0x8E) & 0xFFFF
+	stats.MaxHP = fetch_Bv(0x90) & 0xFFFF
+	stats.ATK = fetch_Bv(0x92) & 0xFFFF
+	stats.DEF = fetch_Bv(0x94) & 0xFFFF
+	stats.SPEED = fetch_Bv(0x96) & 0xFFFF
+	stats.SPA = fetch_Bv(0x98) & 0xFFFF
+	stats.SPD = fetch_Bv(0x9A) & 0xFFFF
+	stats.ATK_Boost = 0x6
+	stats.DEF_Boost = 0x6
+	stats.SPA_Boost = 0x6
+	stats.SPD_Boost = 0x6
+	stats.SPEED_Boost = 0x6
+	stats.EVA_Boost = 0x6
+	return pk
+end
+
+-- reads consecutive encrypted pokemon into a party's members first..last, reusing their tables
+local function read_party(party, ptr, first, last)
+    for i = first, last, 1 do
+        local k = tostring(i)
+        party[k] = read_pokemon(ptr, i - first, party[k])
+    end
 end
 
 -- reads unencrypted pokemon data from memory
+-- fields are decoded from a single bulk read spanning the block's used fields
 local function read_unencrypted_pokemon(ptr, offsets, party_idx, pk)
     party_idx = party_idx or 0
 	ptr = ptr + (offsets.SIZE * party_idx) -- offset pokemon pointer for party index
     pk = pk or table.shallow_copy(POKEMON_STRUCT) -- use existing pokemon or create new one
 
-    pk.ID = memory.read_u16_le(ptr + offsets.ID)
+    local bytes = memory.read_bytes_as_array(ptr, offsets.READ_SIZE) -- 1-indexed
+    local function u8(offset)
+        return bytes[offset + 1]
+    end
+    local function u16(offset)
+        return bytes[offset + 1] | (bytes[offset + 2] << 8)
+    end
+
+    pk.ID = u16(offsets.ID)
     if offsets == BLOCK_A then
-        pk.HeldItem = memory.read_u16_le(ptr + offsets.HELD_ITEM)
-    	pk.Ability = memory.read_u8(ptr + offsets.ABILITY)
-    	pk.Moves["1"].ID = memory.read_u16_le(ptr + offsets.MOVE1_ID)
-    	pk.Moves["2"].ID = memory.read_u16_le(ptr + offsets.MOVE2_ID)
-    	pk.Moves["3"].ID = memory.read_u16_le(ptr + offsets.MOVE3_ID)
-    	pk.Moves["4"].ID = memory.read_u16_le(ptr + offsets.MOVE4_ID)
+        pk.HeldItem = u16(offsets.HELD_ITEM)
+    	pk.Ability = u8(offsets.ABILITY)
+    	pk.Moves["1"].ID = u16(offsets.MOVE1_ID)
+    	pk.Moves["2"].ID = u16(offsets.MOVE2_ID)
+    	pk.Moves["3"].ID = u16(offsets.MOVE3_ID)
+    	pk.Moves["4"].ID = u16(offsets.MOVE4_ID)
     end
     if offsets == BLOCK_B then
-    	pk.Stats.HP = memory.read_u16_le(ptr + offsets.HP)
-    	pk.Stats.MaxHP = memory.read_u16_le(ptr + offsets.MAXHP)
-    	pk.Stats.Status = memory.read_u8(ptr + offsets.STATUS)
-    	pk.Stats.Confused = memory.read_u8(ptr + offsets.CONFUSED)
-    	pk.Stats.ATK_Boost = memory.read_u8(ptr + offsets.ATK_BOOST)
-    	pk.Stats.DEF_Boost = memory.read_u8(ptr + offsets.DEF_BOOST)
-    	pk.Stats.SPA_Boost = memory.read_u8(ptr + offsets.SPA_BOOST)
-    	pk.Stats.SPD_Boost = memory.read_u8(ptr + offsets.SPD_BOOST)
-    	pk.Stats.SPEED_Boost = memory.read_u8(ptr + offsets.SPEED_BOOST)
-    	pk.Stats.EVA_Boost = memory.read_u8(ptr + offsets.EVA_BOOST)
+    	pk.Stats.HP = u16(offsets.HP)
+    	pk.Stats.MaxHP = u16(offsets.MAXHP)
+    	pk.Stats.Status = u8(offsets.STATUS)
+    	pk.Stats.Confused = u8(offsets.CONFUSED)
+    	pk.Stats.ATK_Boost = u8(offsets.ATK_BOOST)
+    	pk.Stats.DEF_Boost = u8(offsets.DEF_BOOST)
+    	pk.Stats.SPA_Boost = u8(offsets.SPA_BOOST)
+    	pk.Stats.SPD_Boost = u8(offsets.SPD_BOOST)
+    	pk.Stats.SPEED_Boost = u8(offsets.SPEED_BOOST)
+    	pk.Stats.EVA_Boost = u8(offsets.EVA_BOOST)
     	-- TODO pk.HeldItem
-    	pk.Moves["1"].PP = memory.read_u8(ptr + offsets.MOVE1_PP)
-    	pk.Moves["2"].PP = memory.read_u8(ptr + offsets.MOVE2_PP)
-    	pk.Moves["3"].PP = memory.read_u8(ptr + offsets.MOVE3_PP)
-    	pk.Moves["4"].PP = memory.read_u8(ptr + offsets.MOVE4_PP)
+    	pk.Moves["1"].PP = u8(offsets.MOVE1_PP)
+    	pk.Moves["2"].PP = u8(offsets.MOVE2_PP)
+    	pk.Moves["3"].PP = u8(offsets.MOVE3_PP)
+    	pk.Moves["4"].PP = u8(offsets.MOVE4_PP)
     end
     return pk
 end
@@ -363,10 +474,28 @@ local function advance_frames(instruct, cnt)
         emu.frameadvance()
         joypad.set(instruct)
         ttl = ttl - 1
-        refresh_gui()
+        frame_count = frame_count + 1
+        if not DISABLE_GRAPHICS then
+            refresh_gui()
+        end
     end
 end
 
+-- taps a button (held 1 frame, released 5) until predicate holds, for at most max_frames
+-- :returns whether the predicate held
+local function press_until(predicate, button, max_frames)
+    local start = frame_count
+    while not predicate() do
+        if frame_count - start >= max_frames then
+            log("Gave up pressing "..button.." after "..(frame_count - start).." frames.")
+            return false
+        end
+        advance_frames({[button] = "True"}, 1)
+        advance_frames({}, 5)
+    end
+    return true
+end
+
 local function serialize_table(tabl, indent, nl)
     nl = nl or string.char(10) -- newline
     indent = indent and (indent.."  ") or ""
@@ -387,6 +516,41 @@ local function serialize_table(tabl, indent, nl)
     return str
 end
 
+-- packs a pokemon into a fixed-layout binary record
+local function pack_pokemon(pk)
+    local m = pk.Moves
+    local s = pk.Stats
+    return string.pack(PACKED_POKEMON_FORMAT,
+        pk.ID, pk.HeldItem, pk.Ability, pk.Active,
+        m["1"].ID, m["2"].ID, m["3"].ID, m["4"].ID,
+        m["1"].PP, m["2"].PP, m["3"].PP, m["4"].PP,
+        s.Status, s.Confused, s.HP, s.MaxHP, s.ATK, s.DEF, s.SPEED, s.SPA, s.SPD,
+        s.ATK_Boost, s.DEF_Boost, s.SPA_Boost, s.SPD_Boost, s.EVA_Boost, s.SPEED_Boost
+    )
+end
+
+-- packs the input state into a hex-armoured binary message
+local function pack_inputstate(state)
+    local parts = {string.pack(PACKED_HEADER_FORMAT, "BF", PACKED_VERSION, state.State, 6, 3)}
+    for i=1,6,1 do
+        parts[#parts+1] = pack_pokemon(state.AllyParty[tostring(i)])
+    end
+    for i=1,3,1 do
+        parts[#parts+1] = pack_pokemon(state.EnemyParty[tostring(i)])
+    end
+    return (table.concat(parts):gsub(".", function(c) return string.format("%02X", string.byte(c)) end))
+end
+
+-- converts hex-armoured ranked action indices into action weights
+local function ranks_to_weights(hex)
+    local weights = {}
+    local n = #hex // 2
+    for r=1,n,1 do
+        weights[tonumber(hex:sub(2 * r - 1, 2 * r), 16)] = n - r + 1
+    end
+    return weights
+end
+
 local function reset_ttl()
     ttl = 50000
 end
@@ -473,14 +637,7 @@ local function read_inputstate()
     if input_state.State == STATE_INIT then
         -- init state
         local allyparty_ptr = gp + ALLY_OFFSET -- encrypted party of 6
-        input_state.AllyParty = {
-            ["1"] = read_pokemon(allyparty_ptr, 0),
-            ["2"] = read_pokemon(allyparty_ptr, 1),
-            ["3"] = read_pokemon(allyparty_ptr, 2),
-            ["4"] = read_pokemon(allyparty_ptr, 3),
-            ["5"] = read_pokemon(allyparty_ptr, 4),
-            ["6"] = read_pokemon(allyparty_ptr, 5),
-        }
+        read_party(input_state.AllyParty, allyparty_ptr, 1, 6)
         local enemyparty_ptr = gp + FUTURE_ENEMY_OFFSET -- BLOCK_A party of 3
         input_state.EnemyParty = {
             ["1"] = read_unencrypted_pokemon(enemyparty_ptr, BLOCK_A, 0),
@@ -496,19 +653,11 @@ local function read_inputstate()
         local enemyparty_ptr = gp + ENEMY_OFFSET -- encrypted party of 3
         -- init battle pokemon states
         if in_battle_room() then
-        	input_state.AllyParty = {
-                ["1"] = read_pokemon(allyparty_ptr, 0),
-                ["2"] = read_pokemon(allyparty_ptr, 1),
-                ["3"] = read_pokemon(allyparty_ptr, 2),
-                ["4"] = table.shallow_copy(POKEMON_STRUCT),
-                ["5"] = table.shallow_copy(POKEMON_STRUCT),
-                ["6"] = table.shallow_copy(POKEMON_STRUCT),
-            }
-            input_state.EnemyParty = {
-                ["1"] = read_pokemon(enemyparty_ptr, 0),
-                ["2"] = read_pokemon(enemyparty_ptr, 1),
-                ["3"] = read_pokemon(enemyparty_ptr, 2),
-            }
+            read_party(input_state.AllyParty, allyparty_ptr, 1, 3)
+            input_state.AllyParty["4"] = table.shallow_copy(POKEMON_STRUCT)
+            input_state.AllyParty["5"] = table.shallow_copy(POKEMON_STRUCT)
+            input_state.AllyParty["6"] = table.shallow_copy(POKEMON_STRUCT)
+            read_party(input_state.EnemyParty, enemyparty_ptr, 1, 3)
         end
         -- update active party member state
         local active_ally_id = memory.read_u16_le(active_ally_ptr) -- ID only
@@ -553,14 +702,8 @@ local function read_inputstate()
         -- trade state
         local allyparty_ptr = gp + ALLY_OFFSET -- encrypted party of 3
         local tradeparty_ptr = gp + ENEMY_OFFSET -- encrypted party of 3
-        input_state.AllyParty = {
-            ["1"] = read_pokemon(allyparty_ptr, 0),
-            ["2"] = read_pokemon(allyparty_ptr, 1),
-            ["3"] = read_pokemon(allyparty_ptr, 2),
-            ["4"] = read_pokemon(tradeparty_ptr, 0),
-            ["5"] = read_pokemon(tradeparty_ptr, 1),
-            ["6"] = read_pokemon(tradeparty_ptr, 2),
-        }
+        read_party(input_state.AllyParty, allyparty_ptr, 1, 3)
+        read_party(input_state.AllyParty, tradeparty_ptr, 4, 6)
         local enemyparty_ptr = gp + FUTURE_ENEMY_OFFSET -- BLOCK_A party of 3
         input_state.EnemyParty = {
             ["1"] = read_unencrypted_pokemon(enemyparty_ptr, BLOCK_A, 0),
@@ -624,8 +767,12 @@ end
 -- sends input state to server for evaluation
 local function eval_state()
     read_inputstate()
-    comm.socketServerSend("BF_STATE"..serialize_table(input_state))  -- send state to eval server
-    return str_to_table(comm.socketServerResponse())
+    if packed_protocol then
+        send_msg("BF_BIN"..pack_inputstate(input_state))  -- send packed state to eval server
+        return ranks_to_weights(recv_msg())
+    end
+    send_msg("BF_STATE"..serialize_table(input_state))  -- send state to eval server
+    return str_to_table(recv_msg())
 end
 
 -- selects initial pokemon in trade menu
@@ -836,6 +983,11 @@ end
 
 -- check if evaluation is finished
 local function finished_check()
+    -- did tapping through a screen give up?
+    if stalled then
+        log("Tapping gave up at PRESS_FRAME_CAP: frame_count="..frame_count)
+        return true
+    end
     -- did the last battle turn fail?
     if turn_failure then
     	log("Battle turn failure occurred: turn="..turn)
@@ -863,9 +1015,10 @@ local function finished_check()
         end
 
         -- buffer while battle finishes
-        while not in_battle_room() do
-            advance_frames({A = "True"}, 1)
-            advance_frames({}, 5)
+        if not press_until(in_battle_room, "A", PRESS_FRAME_CAP) then
+            stalled = true
+            log("Event wait gave up: frame_count="..frame_count)
+            return true
         end
         battle_number = battle_number + 1
         ally_deaths = 0
@@ -880,26 +1033,59 @@ local function randomize_seed()
     if ADD_RNG and is_outside() then
     	-- math.randomseed(os.time())
     	-- local rng = math.random(1, 250)
-    	comm.socketServerSend("SEED")
-        local rng = comm.socketServerResponse()
-    	log("Randomizing seed: waiting "..rng.." frames...")
-        advance_frames({}, rng)
+    	log("Randomizing seed: waiting "..eval_seed.." frames...")
+        advance_frames({}, eval_seed)
+    end
+end
+
+-- requests the evaluation seed of the current genome
+local function request_seed()
+    if not ADD_RNG then
+        return 0 -- the opening is deterministic
+    end
+    send_msg("SEED")
+    return tonumber(recv_msg())
+end
+
+-- loads the genome's starting state: the cached first decision point snapshot for the seed, if any
+local function load_start_state()
+    if snapshot ~= nil and snapshot_seed ~= eval_seed then
+        log("Seed changed: discarding snapshot for seed "..snapshot_seed)
+        memorysavestate.removestate(snapshot)
+        snapshot = nil
+    end
+    if SNAPSHOTS and snapshot ~= nil then
+        log("Branching from snapshot for seed "..eval_seed.."...")
+        memorysavestate.loadcorestate(snapshot)
+        ttl = snapshot_ttl
+    else
+        log("Loading save slot "..LOAD_SLOT.."...")
+        savestate.loadslot(LOAD_SLOT)
+    end
+    gp = memory.read_u32_le(0x02101D2C)
+end
+
+-- snapshots the first decision point once per seed
+local function snapshot_check()
+    if SNAPSHOTS and snapshot == nil and game_state() == STATE_INIT then
+        log("Saving snapshot for seed "..eval_seed.."...")
+        snapshot = memorysavestate.savecorestate()
+        snapshot_seed = eval_seed
+        snapshot_ttl = ttl
     end
 end
 
 -- manually move out of trivial states
 local function trivial_state_check()
     if is_outside() or is_trading() then
-        while not (in_trade_menu() or in_battle_room()) do
-            advance_frames({A = "True"}, 1)
-            advance_frames({}, 5)
-        end
+        stalled = not press_until(function() return in_trade_menu() or in_battle_room() end, "A", PRESS_FRAME_CAP)
     end
 end
 
 -- select pokemon from trade menu
 local function trade_menu_check()
     if is_trading() and in_trade_menu() then
+        snapshot_check()
         local output = eval_state()
         local team_weights = sort_actions({table.unpack(output, 5, #output)})  -- sort 6 team selection weights
         advance_frames({}, 200) -- buffer while menu loads
@@ -938,10 +1124,7 @@ local function trade_menu_check()
         end
         -- exit trade menu
         -- while in_trade_menu() do
-        while not in_battle_room() do
-            advance_frames({A = "True"}, 1)
-            advance_frames({}, 5)
-        end
+        stalled = not press_until(in_battle_room, "A", PRESS_FRAME_CAP)
     end
 end
 
@@ -949,10 +1132,7 @@ end
 local function battle_room_check()
     if in_battle_room() then
         read_inputstate() -- encrypted enemy team now available in memory
-        while in_battle_room() do
-            advance_frames({A = "True"}, 1)
-            advance_frames({}, 5)
-        end
+        stalled = not press_until(function() return not in_battle_room() end, "A", PRESS_FRAME_CAP)
     end
 end
 
@@ -1050,13 +1230,16 @@ function GameLoop()
     fitness = 0.0
     turn = 1
     turn_failure = false
+    stalled = false
     has_battled = 0  -- reset each round
+    party_cache_hits = 0
+    party_cache_misses = 0
+    frame_count = 0
     input_state = table.shallow_copy(INPUTSTATE_STRUCT)
 
     -- load save state
-    log("Loading save slot "..LOAD_SLOT.."...")
-    savestate.loadslot(LOAD_SLOT)
-    gp = memory.read_u32_le(0x02101D2C)
+    eval_seed = request_seed()
+    load_start_state()
     -- client.invisibleemulation(true)
     refresh_gui()
 
@@ -1076,29 +1259,42 @@ function GameLoop()
         -- state advancement
         randomize_seed()
         trivial_state_check()
-        trade_menu_check()
-        battle_room_check()
-        turn_failure = battle_turn_check()
+        if not stalled then trade_menu_check() end
+        if not stalled then battle_room_check() end
+        if not stalled then turn_failure = battle_turn_check() end
         -- advance single frame
         advance_frames({}, 1)
     end
 
     -- end game loop
     log("Finished game loop.")
-    comm.socketServerSend("FITNESS:"..fitness)
+    log("Party cache: "..party_cache_hits.." hits, "..party_cache_misses.." misses")
+    log("Emulated "..frame_count.." frames.")
+    local fitness_msg = "FITNESS:"..fitness..";party_cache_hits="..party_cache_hits..";party_cache_misses="..party_cache_misses
+        ..";frames="..frame_count
+    if #log_buffer > 0 then
+        send_msg(fitness_msg.."\n"..flush_logs())  -- flush buffered logs
+    else
+        send_msg(fitness_msg)
+    end
     advance_frames({}, 250) -- buffer while server prepares
     return fitness
 end
 
 -- repeat game loop until evaluation server finishes
-print("Is client connected to socket server?")
-print(comm.socketServerIsConnected())
-print(comm.socketServerGetInfo())
+if shm then
+    print("Communicating over shared memory: "..shm_name)
+else
+    print("Is client connected to socket server?")
+    print(comm.socketServerIsConnected())
+    print(comm.socketServerGetInfo())
+end
 while true do
-    comm.socketServerSend("READY")
-    local server_state = comm.socketServerResponse()
+    send_msg(PACKED_PROTOCOL and "READY:BIN"..PACKED_VERSION or "READY")
+    local server_state = recv_msg()
     print("Server State: "..server_state)
-    if server_state == "READY" then
+    packed_protocol = server_state == "READY:BIN"..PACKED_VERSION
+    if server_state == "READY" or packed_protocol then
         -- start game loop
     	GameLoop()
     elseif server_state == "FINISHED" then
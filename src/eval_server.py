@@ -4,17 +4,20 @@ import platform
 import os
 import signal
 import socket
-import PIL
-import neat
+import weakref
 import numpy as np
-from scipy.signal import correlate
-from skimage.measure import block_reduce
 from neat.nn import FeedForwardNetwork
 import subprocess
-from PIL import Image
-import io
 import sys
-from encoder import Encoder
+from encoder import StateEncoder
+from protocol import PackedProtocol
+from framing import FramedReader
+from shm_transport import SharedMemoryChannel
+from vision import VisionPipeline
+from inference import FlatNetwork
+from net_cache import NetworkCache
+from metrics import Instrumentation, GenomeCounters
+from log_pipeline import TraceFormatter, TraceSampler, queue_logging
 import threading
 
 
@@ -25,10 +28,22 @@ class EvaluationServer:
     EMU_PATH = './emu/BizHawk-2.9.1/'
     N_CLIENTS = 10  # number of concurrent clients to evaluate genomes
     DEBUG_ID = -1  # for debugging specific genomes
+    N_SEEDS = 5  # number of distinct evaluation seeds, cycled by generation
     KERNEL = np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]])  # Edge Detection Kernel
     PNG_HEADER = (b"\x89PNG", 7)
+    FRAME_HEADER = (b"FRAME", 5)  # raw framebuffer: SCREEN_SIZE BGRA pixels
+    SCREEN_SIZE = (256, 384)  # width, height of screenshots (both DS screens)
+    VISION_STACK = 1  # screenshots stacked as network input; num_inputs must match
     BF_STATE_HEADER = (b"BF_STATE", 8)
+    BF_PACKED_HEADER = (b"BF_BIN", 6)
     READY_STATE = b"5 READY"
+    READY_PACKED_STATE = b"10 READY:" + PackedProtocol.READY_TAG.encode()
+    PACKED_PROTOCOL = True  # accept the packed wire protocol when requested by clients
+    METRICS = True  # per-turn latency instrumentation, reported per generation
+    TRANSPORT = "tcp"  # tcp, or shm for shared-memory request/response slots (threaded and process modes)
+    CONSOLE_LOG_LEVEL = logging.INFO
+    TRACE_GENOME_RATE = 0.05  # fraction of genomes whose turns are traced
+    TRACE_TURN_RATE = 0.2  # fraction of a traced genome's turns written to the trace log
     SEED_STATE = (b"SEED", 4)
     FINISH_STATE = b"8 FINISHED"
     FITNESS_HEADER = (b"FITNESS:", 8)
@@ -39,8 +54,14 @@ class EvaluationServer:
         socket.setdefaulttimeout(300)
 
         # gen evaluation vars
-        self.evaluated_genomes = []  # track evaluated genomes if socket timeout occurs
+        self.evaluated_genomes = set()  # keys of evaluated genomes, kept if socket timeout occurs
+        self.journal = None  # optional durable evaluation journal
+        self.durations = {}  # genome ID -> evaluation seconds, collected by the trainer's scheduler
+        self.race_seed = None  # evaluation seed of the trainer's current racing round, if any
+        self.seeded = set()  # genome IDs whose client requested its evaluation seed, checked by the trainer's race
+        self.corpus = None  # optional state corpus recording encoded input vectors
         self.client_ps = None  # emulator client process ID(s)
+        self.channels = []  # shared-memory channels of the generation's clients
         self.eval_idx = None  # thread-safe evaluation index
         self.genomes = None  # list of genomes to evaluate
         self.config = None  # config obj for creating networks
@@ -48,6 +69,11 @@ class EvaluationServer:
         self.logger = None  # evaluation server logger
         self.gen_id = None  # generation ID
         self.eval_failure = False
+        self.encoders = threading.local()  # per-client state encoders
+        self.visions = weakref.WeakKeyDictionary()  # network -> screenshot vision pipeline
+        self.net_cache = NetworkCache(FlatNetwork.create)  # compiled networks, reused across generations
+        self.metrics = Instrumentation(self.METRICS)  # per-generation performance instrumentation
+        self.tracer = TraceSampler(logging.getLogger("eval_trace"), self.TRACE_GENOME_RATE, self.TRACE_TURN_RATE)
 
         # evaluation mode parameters
         if game_mode == "open_world":
@@ -71,6 +97,7 @@ class EvaluationServer:
         self.logger = self._init_logger(gen_id)  # init the logger for this generation
         self.mutex = threading.Lock()
         self.client_ps = []
+        self.channels = []
         self.eval_idx = 0
         self.config = config
         self.genomes = genomes
@@ -103,12 +130,15 @@ class EvaluationServer:
         # spawn client processes and evaluate genomes
         client_threads = []
         for _ in range(self.N_CLIENTS):
-            # create client process and record pid
-            self.spawn_client()
+            if self.TRANSPORT == "shm":
+                client = self._open_channel()
+            else:
+                # create client process and record pid
+                self.spawn_client()
 
-            # wait for agent process to connect to socket
-            client, addr = server.accept()
-            self.logger.debug(f"Connected by {addr}.")
+                # wait for agent process to connect to socket
+                client, addr = server.accept()
+                self.logger.debug(f"Connected by {addr}.")
 
             # start a new thread to handle the client process
             t = threading.Thread(target=self._handle_client, args=(client,))
@@ -137,13 +167,35 @@ class EvaluationServer:
 
         # successful generation evaluation
         self.close_server(server)
-        self.evaluated_genomes = []  # reset evaluated genomes
+        self.evaluated_genomes = set()  # reset evaluated genomes
         return True
 
+    def eval_seed(self, gen_id: int) -> int:
+        """
+        Evaluation seed sent to clients for the given generation, or for the current racing round.
+        """
+        if self.race_seed is not None:
+            return self.race_seed
+        return gen_id % self.N_SEEDS
+
+    def close(self) -> None:
+        """
+        Releases any server resources held across generations.
+        """
+        return
+
+    def emulator_slots(self) -> int:
+        """
+        Number of genomes evaluated concurrently.
+        """
+        return self.N_CLIENTS
+
     def _handle_client(self, client) -> None:
         """
         Handles the client process in asynchronously evaluating genomes.
         """
+        # per-connection message reassembly; shared-memory channels deliver whole messages
+        reader = client if isinstance(client, SharedMemoryChannel) else FramedReader()
         while True:
             # evaluate next genome
             idx, _id, genome = self._get_next(self.genomes)
@@ -152,82 +204,188 @@ class EvaluationServer:
                 break
 
             # create NN from genome
-            net = neat.nn.FeedForwardNetwork.create(genome, self.config)
+            net = self._create_net(genome)
             self.logger.info(
                 f"[Gen #: {self.gen_id}, Index #: {idx}/{len(self.genomes) - 1}, Genome #: {_id}]")
 
             # wait for client to be ready
             while True:
-                data = client.recv(1024)
-                if not data:
-                    raise ConnectionClosedException
-                if data == self.READY_STATE:
-                    self.logger.debug("Client is ready to evaluate next genome.")
-                    client.sendall(self.READY_STATE)
+                reply = self._ready_reply(self._recv_msg(client, reader))
+                if reply:
+                    client.sendall(reply)
                     break
 
             # begin genome evaluation
-            genome.fitness = self._eval(client, net)
-            self.evaluated_genomes.append(_id)  # successful evaluation
+            counters = GenomeCounters(_id)
+            genome.fitness = self._eval(client, reader, net, counters)
+            self._release_net(net)
+            self._record_fitness(_id, genome)  # successful evaluation
             self.logger.info(f"Genome #{_id} fitness: {genome.fitness}")
 
         # send finish state to client
         # data = client.recv(1024)
         client.sendall(self.FINISH_STATE)
 
-    def _eval(self, client, net: FeedForwardNetwork) -> float:
+    def _record_fitness(self, _id: int, genome) -> None:
+        """
+        Marks a genome as evaluated and journals its fitness.
+        """
+        self.evaluated_genomes.add(_id)
+        if self.journal is not None:
+            self.journal.record(self.gen_id, _id, genome)
+
+    def _open_channel(self) -> SharedMemoryChannel:
+        """
+        Creates a shared-memory channel and spawns an emulator client attached to it.
+        """
+        channel = SharedMemoryChannel.create()
+        self.channels.append(channel)
+        channel.ps = self.spawn_client(mmf=channel.name)
+        self.logger.debug(f"Attached client to shared memory {channel.name}.")
+        return channel
+
+    def net_cache_summary(self) -> str:
+        """
+        Summarizes and resets the generation's network cache statistics.
+        """
+        return self.net_cache.summary()
+
+    def _create_net(self, genome):
+        """
+        Creates the genome's network, compiled once per distinct genome.
+        """
+        return self.net_cache.acquire(genome, self.config)
+
+    def _release_net(self, net) -> None:
+        """
+        Releases the genome's network after its evaluation.
+        """
+        return
+
+    def _eval(self, client, reader: FramedReader, net: FeedForwardNetwork, counters: GenomeCounters) -> float:
         """
         Evaluates a single genome.
         """
         self.logger.debug("Evaluating genome...")
-        # init fitness
-        fitness = 0.0
-        genome_finished = False
-
+        self._reset_vision(net)
+        metrics = self.metrics.client()
+        trace = self.tracer.sample_genome()
         # repeat game loop
-        while not genome_finished:
-            # receive client buffered message
-            data = client.recv(8192)
-
-            # client finished sending data
-            if not data:
-                raise ConnectionClosedException
-
-            # Parse received data into individual message(s) and process
-            for msg in self._parse_msgs(data):
-
-                # is msg a fitness score?
-                if msg[:self.FITNESS_HEADER[1]] == self.FITNESS_HEADER[0]:
-                    self.logger.debug("Client is finished evaluating genome.")
-                    fitness = float(msg[self.FITNESS_HEADER[1]:])
-                    genome_finished = True
-
-                # is msg a log?
-                elif msg[:self.LOG_HEADER[1]] == self.LOG_HEADER[0]:
-                    self.logger.debug(msg[self.LOG_HEADER[1]:])
-
-                # is msg a battle factory input state?
-                elif msg[:self.BF_STATE_HEADER[1]] == self.BF_STATE_HEADER[0]:
-                    output_msg = self._ff_game_state(
-                        msg[self.BF_STATE_HEADER[1]:], net
-                    )
-                    # respond with output message
-                    client.sendall(b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'))
-
-                # is msg a seed request?
-                elif msg[:self.SEED_STATE[1]] == self.SEED_STATE[0]:
-                    output_msg = str(self.gen_id % 5)  # seed the evaluation
-                    client.sendall(b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'))
-
-                # is msg a state screenshot?
-                elif msg[:self.PNG_HEADER[1]] == self.PNG_HEADER[0]:
-                    decision = self._ff_screenshot(msg, net)
-                    # respond to client with decision
-                    client.sendall(b'' + bytes(f"{len(decision)} {decision}", 'utf-8'))
+        fitness = None
+        while fitness is None:
+            # receive and process next complete client message
+            t = metrics.now()
+            msg = self._recv_msg(client, reader)
+            idle = metrics.stage("wait", t) - t
+            reply, fitness = self._process_msg(msg, net)
+            if reply:
+                t = metrics.now()
+                client.sendall(reply)
+                metrics.stage("send", t)
+            turn = self._is_turn(msg)
+            counters.count(msg, reply, idle, turn)
+            if msg[:self.SEED_STATE[1]] == self.SEED_STATE[0]:
+                counters.seeds += 1
+            if trace and turn:
+                self.tracer.trace(self.gen_id, counters.genome, counters.turns, msg, reply)
+        metrics.add_genome(counters)
+        self.durations[counters.genome] = counters.elapsed()
+        if counters.seeds:
+            self.seeded.add(counters.genome)
 
         # return fitness score
         return fitness
 
+    def _is_turn(self, msg: bytes) -> bool:
+        """
+        Is msg a game state to forward-feed?
+        """
+        return msg[:3] == self.BF_STATE_HEADER[0][:3] or msg[:self.PNG_HEADER[1]] == self.PNG_HEADER[0] or \
+            msg[:self.FRAME_HEADER[1]] == self.FRAME_HEADER[0]
+
+    def _ready_reply(self, msg: bytes):
+        """
+        Negotiates the READY handshake for a client message.
+        :returns framed READY reply, or None if msg is not a READY state
+        """
+        data = FramedReader.frame(msg)
+        if data != self.READY_STATE and data != self.READY_PACKED_STATE:
+            return None
+        self.logger.debug("Client is ready to evaluate next genome.")
+        # negotiate the packed protocol if requested by client
+        if data == self.READY_PACKED_STATE and self.PACKED_PROTOCOL:
+            return self.READY_PACKED_STATE
+        return self.READY_STATE
+
+    def _process_msg(self, msg: bytes, net: FeedForwardNetwork):
+        """
+        Processes a single client message during genome evaluation.
+        :returns (framed reply or None, fitness score or None)
+        """
+        # is msg a fitness score, possibly with ;-separated client counters and the client's buffered logs?
+        if msg[:self.FITNESS_HEADER[1]] == self.FITNESS_HEADER[0]:
+            line, _, logs = msg[self.FITNESS_HEADER[1]:].partition(b"\n")
+            fitness, *stats = line.split(b";")
+            if stats:
+                self.metrics.client().add_client_stats(self._parse_client_stats(stats))
+            if logs:
+                self.logger.debug(logs.decode(errors="replace"))
+            self.logger.debug("Client is finished evaluating genome.")
+            return None, float(fitness)
+
+        # is msg a log?
+        elif msg[:self.LOG_HEADER[1]] == self.LOG_HEADER[0]:
+            self.logger.debug(msg[self.LOG_HEADER[1]:])
+
+        # is msg a battle factory input state?
+        elif msg[:self.BF_STATE_HEADER[1]] == self.BF_STATE_HEADER[0]:
+            output_msg = self._ff_game_state(
+                msg[self.BF_STATE_HEADER[1]:], net
+            )
+            # respond with output message
+            return b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'), None
+
+        # is msg a packed battle factory input state?
+        elif msg[:self.BF_PACKED_HEADER[1]] == self.BF_PACKED_HEADER[0]:
+            output_msg = self._ff_packed_state(
+                msg[self.BF_PACKED_HEADER[1]:], net
+            )
+            # respond with packed output message
+            return b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'), None
+
+        # is msg a seed request?
+        elif msg[:self.SEED_STATE[1]] == self.SEED_STATE[0]:
+            output_msg = str(self.eval_seed(self.gen_id))  # seed the evaluation
+            return b'' + bytes(f"{len(output_msg)} {output_msg}", 'utf-8'), None
+
+        # is msg a state screenshot?
+        elif msg[:self.PNG_HEADER[1]] == self.PNG_HEADER[0]:
+            decision = self._ff_screenshot(msg, net)
+            # respond to client with decision
+            return b'' + bytes(f"{len(decision)} {decision}", 'utf-8'), None
+
+        # is msg a raw framebuffer?
+        elif msg[:self.FRAME_HEADER[1]] == self.FRAME_HEADER[0]:
+            self.logger.debug("Evaluating game framebuffer...")
+            decision = self._ff_vision(self._get_vision(net).from_raw(memoryview(msg)[self.FRAME_HEADER[1]:]), net)
+            return b'' + bytes(f"{len(decision)} {decision}", 'utf-8'), None
+
+        return None, None
+
+    def _parse_client_stats(self, stats: list) -> dict:
+        """
+        Parses client counters of a fitness message, e.g. [b"party_cache_hits=120"].
+        :returns counter name -> value
+        """
+        counters = {}
+        for stat in stats:
+            name, _, value = stat.partition(b"=")
+            try:
+                counters[name.decode(errors="replace")] = float(value)
+            except ValueError:
+                self.logger.debug(f"Ignoring malformed client counter: {stat}")
+        return counters
+
     def _get_next(self, genomes):
         """
         Retrieves the next genome to evaluate in a thread-safe way.
@@ -238,7 +396,7 @@ class EvaluationServer:
         while genome is None and self.eval_idx < len(genomes):
             t_id, t_genome = genomes[self.eval_idx]
             # find next available genome
-            if t_genome not in self.evaluated_genomes and not (0 <= self.DEBUG_ID != t_id):
+            if t_id not in self.evaluated_genomes and not (0 <= self.DEBUG_ID != t_id):
                 idx, _id, genome = self.eval_idx, t_id, t_genome
                 # if debug genome was found, prevent other evaluations
                 if 0 <= self.DEBUG_ID == t_id:
@@ -247,60 +405,120 @@ class EvaluationServer:
         self.mutex.release()
         return idx, _id, genome
 
-    @classmethod
-    def _parse_msgs(cls, _msg) -> [bytes]:
+    @staticmethod
+    def _recv_msg(client, reader: FramedReader) -> bytes:
         """
-        Parse received client data into individual message(s).
+        Receives the next complete client message.
         """
-        if not _msg:
-            return []
-        split = _msg.split(b" ", 1)
-        size = int(split[0])
-        return [split[1][:size]] + cls._parse_msgs(split[1][size:])
+        msg = reader.recv_msg(client)
+        if msg is None:
+            raise ConnectionClosedException
+        return msg
 
     def _ff_game_state(self, state: bytes, net: FeedForwardNetwork) -> str:
         """
         Forward-feeds game state bytes through genome neural network.
         """
+        input_layer = self._encode_game_state(state)
+        metrics = self.metrics.client()
+        t = metrics.now()
+        output_layer = net.activate(input_layer)
+        t = metrics.stage("activate", t)
+        output_msg = self._format_game_state(output_layer)
+        metrics.stage("format", t)
+        return output_msg
+
+    def _encode_game_state(self, state: bytes) -> np.ndarray:
+        """
+        Reads and vectorizes game state bytes into the client's input buffer.
+        """
         self.logger.debug("Evaluating game state...")
-        # read and sort input state
+        metrics = self.metrics.client()
+        # read input state
+        t = metrics.now()
         bf_state = json.loads(state)
-        bf_state = self.sort_dict(bf_state)
-        self.logger.debug(bf_state)
+        t = metrics.stage("decode", t)
 
         # vectorize input state
-        input_layer = Encoder.vectorize_state(bf_state)
-        # self.logger.debug(input_layer)
+        input_layer = self._get_encoder().vectorize_state(bf_state)
+        metrics.stage("encode", t)
+        if self.corpus is not None:
+            self.corpus.add(input_layer)
+        return input_layer
+
+    def _format_game_state(self, output_layer) -> str:
+        """
+        Formats network outputs as a text output message.
+        """
+        return "{ " + ", ".join(["{:.32f}".format(x) for x in output_layer]) + " }"
 
-        # forward feed
+    def _ff_packed_state(self, state: bytes, net: FeedForwardNetwork) -> str:
+        """
+        Forward-feeds packed game state bytes through genome neural network.
+        """
+        input_layer = self._encode_packed_state(state)
+        metrics = self.metrics.client()
+        t = metrics.now()
         output_layer = net.activate(input_layer)
-        output_msg = "{ " + ", ".join(["{:.32f}".format(x) for x in output_layer]) + " }"
-        self.logger.debug(output_msg)
+        t = metrics.stage("activate", t)
+        output_msg = PackedProtocol.encode_reply(output_layer)
+        metrics.stage("format", t)
         return output_msg
 
+    def _encode_packed_state(self, state: bytes) -> np.ndarray:
+        """
+        Decodes and vectorizes packed game state bytes into the client's input buffer.
+        """
+        metrics = self.metrics.client()
+        t = metrics.now()
+        game_state, parties = PackedProtocol.decode_state(state)
+        t = metrics.stage("decode", t)
+        input_layer = self._get_encoder().vectorize_packed(game_state, parties)
+        metrics.stage("encode", t)
+        if self.corpus is not None:
+            self.corpus.add(input_layer)
+        return input_layer
+
+    def _get_encoder(self) -> StateEncoder:
+        """
+        Retrieves the calling client thread's state encoder.
+        """
+        encoder = getattr(self.encoders, "encoder", None)
+        if encoder is None:
+            encoder = self.encoders.encoder = StateEncoder()
+        return encoder
+
     def _ff_screenshot(self, png: bytes, net: FeedForwardNetwork):
         """
         Forward-feeds screenshot data through genome neural network.
         """
         self.logger.debug("Evaluating game screenshot...")
-        # read image and convert to grayscale
-        img = PIL.Image.open(io.BytesIO(png)).convert('L')
-        # img.show()
-        im = np.array(img)
+        return self._ff_vision(self._get_vision(net).from_png(png), net)
 
-        # convolve image
-        im = correlate(im, self.KERNEL)
-        # PIL.Image.fromarray(np.uint8(im * 255)).show()
+    def _ff_vision(self, input_layer: np.ndarray, net: FeedForwardNetwork) -> str:
+        """
+        Forward-feeds a vision input vector through genome neural network.
+        :returns the decided action
+        """
+        outputs = net.activate(input_layer)
+        return self.ACTIONS[int(np.argmax(outputs))]
 
-        # reduce image dimensions
-        im = block_reduce(im, block_size=(4, 4), func=np.average)
-        # PIL.Image.fromarray(im).show()
+    def _get_vision(self, net) -> VisionPipeline:
+        """
+        Retrieves the vision pipeline of a genome's network, so each evaluation stacks its own frames.
+        """
+        vision = self.visions.get(net)
+        if vision is None:
+            vision = self.visions[net] = VisionPipeline(*self.SCREEN_SIZE, self.KERNEL, self.VISION_STACK)
+        return vision
 
-        # forward feed
-        im = im.reshape(-1)
-        outputs = net.activate(im)
-        decision = self.ACTIONS[outputs.index(max(outputs))]
-        return decision
+    def _reset_vision(self, net) -> None:
+        """
+        Forgets the frames stacked by an earlier evaluation with the same network object.
+        """
+        vision = self.visions.get(net)
+        if vision is not None:
+            vision.reset()
 
     @classmethod
     def sort_dict(cls, item: dict):
@@ -314,27 +532,31 @@ class EvaluationServer:
     @classmethod
     def _init_logger(cls, gen_id: int):
         """
-        Initializes the EvaluationServer logger.
-        Logs NEAT training results to logs/trainer.log and debug logs to console.
+        Initializes the EvaluationServer logger and the sampled turn trace logger.
+        Logs info to console, debug logs to logs/eval_server-<gen>.log and traces to logs/eval_trace-<gen>.jsonl.
+        Records are formatted and written by listener threads, off the client threads.
         """
         logger = logging.getLogger("eval_server")
         logger.setLevel(logging.DEBUG)
         log_format = logging.Formatter('%(asctime)s %(levelname)s %(message)s', datefmt='%H:%M:%S')
 
-        # remove any existing handlers
-        if logger.hasHandlers():
-            logger.handlers.clear()
-
-        # create and add handlers
+        # create handlers
         stream_handler = logging.StreamHandler()
         stream_handler.setFormatter(log_format)
-        stream_handler.setLevel(logging.INFO)
-        logger.addHandler(stream_handler)
+        stream_handler.setLevel(cls.CONSOLE_LOG_LEVEL)
 
         info_handler = logging.FileHandler(f"./logs/eval_server-{gen_id}.log")
         info_handler.setFormatter(log_format)
         info_handler.setLevel(logging.DEBUG)
-        logger.addHandler(info_handler)
+        queue_logging(logger, stream_handler, info_handler)
+
+        # sampled turn traces
+        trace_logger = logging.getLogger("eval_trace")
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+        trace_handler = logging.FileHandler(f"./logs/eval_trace-{gen_id}.jsonl", delay=True)
+        trace_handler.setFormatter(TraceFormatter())
+        queue_logging(trace_logger, trace_handler)
 
         return logger
 
@@ -345,17 +567,18 @@ class EvaluationServer:
         """
         return data.find(b" ") + 1
 
-    def spawn_client(self):
+    def spawn_client(self, mmf: str = None):
         """
         Spawns the emulator process and starts the eval_client.lua script.
+        :param mmf: shared-memory channel name to communicate over instead of the socket server
         :return: Process object
         """
         self.logger.debug("Spawning emulator client process...")
+        comm_args = [f'--mmf={mmf}'] if mmf else [f'--socket_port={self.PORT}', f'--socket_ip={self.HOST}']
         ps = subprocess.Popen([
                 self.EMU_PATH,
                 f'--chromeless',
-                f'--socket_port={self.PORT}',
-                f'--socket_ip={self.HOST}',
+                *comm_args,
                 f'--lua={os.path.abspath(self.EVAL_SCRIPT)}'
             ],
             preexec_fn=os.setsid if platform.system() != 'Windows' else None,
@@ -376,6 +599,16 @@ class EvaluationServer:
             # ps.send_signal(signal.CTRL_BREAK_EVENT)
             ps.send_signal(signal.SIGTERM)
 
+    def kill_clients(self) -> None:
+        """
+        Kills all spawned emulator client processes.
+        """
+        for ps in self.client_ps:
+            try:
+                self.kill_client(ps)
+            except Exception:
+                continue
+
     def close_server(self, s):
         """
         Forcibly closes the socket server and client process.
@@ -384,6 +617,9 @@ class EvaluationServer:
         try:
             for pid in self.client_ps:
                 self.kill_client(pid)
+            for channel in self.channels:
+                channel.close()
+            self.channels = []
             s.shutdown(socket.SHUT_RDWR)
             s.close()
         except Exception:
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import random
+import weakref
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    Content-addressed fitness cache for unchanged genomes (elites and structural clones).
+    Keyed by a canonical hash of the genome's expressed network plus the evaluation seed, so
+    cache hits can skip the emulator. Hits are re-sampled at RESAMPLE_RATE, and each entry keeps
+    the running mean of its samples. Persisted as JSON with least-recently-used eviction.
+    """
+    MAX_ENTRIES = 20000  # max cached (genome, seed) entries
+    RESAMPLE_RATE = 0.05  # probability of re-evaluating a cache hit
+    digests = weakref.WeakKeyDictionary()  # genome -> digest; neat never mutates a genome once created
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES, resample_rate: float = RESAMPLE_RATE):
+        self.path = path
+        self.max_entries = max_entries
+        self.resample_rate = resample_rate
+        self.entries = OrderedDict()  # "digest:seed" -> [mean fitness, samples], least recent first
+        self.pending = {}  # genome ID -> cache key of genomes sent for evaluation
+        self.hits = 0
+        self.misses = 0
+        self.resamples = 0
+        self.load()
+
+    @classmethod
+    def genome_digest(cls, genome) -> str:
+        """
+        Canonical hash of a genome's enabled connections, weights, node biases, responses,
+        activations and aggregations. Independent of genome ID, fitness and gene insertion order.
+        Memoized per genome object, as it is looked up by several components per evaluation.
+        """
+        digest = cls.digests.get(genome)
+        if digest is None:
+            connections = sorted((k[0], k[1], cg.weight) for k, cg in genome.connections.items() if cg.enabled)
+            nodes = sorted((k, ng.bias, ng.response, ng.activation, ng.aggregation) for k, ng in genome.nodes.items())
+            digest = hashlib.blake2b(repr((connections, nodes)).encode(), digest_size=16).hexdigest()
+            cls.digests[genome] = digest
+        return digest
+
+    def apply(self, genomes, seed: int) -> list:
+        """
+        Assigns cached fitness to unchanged genomes.
+        :returns (genome ID, genome) pairs that still need an emulator evaluation
+        """
+        self.pending = {}
+        remaining = []
+        for _id, genome in genomes:
+            key = f"{self.genome_digest(genome)}:{seed}"
+            entry = self.entries.get(key)
+            if entry is not None and random.random() >= self.resample_rate:
+                genome.fitness = entry[0]
+                self.entries.move_to_end(key)
+                self.hits += 1
+                continue
+            if entry is not None:
+                self.resamples += 1
+            else:
+                self.misses += 1
+            self.pending[_id] = key
+            remaining.append((_id, genome))
+        return remaining
+
+    def update(self, genomes) -> None:
+        """
+        Records the fitness of genomes evaluated since the last apply().
+        """
+        for _id, genome in genomes:
+            key = self.pending.get(_id)
+            if key is None or genome.fitness is None:
+                continue
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                entry = [genome.fitness, 1]
+            else:
+                entry = [(entry[0] * entry[1] + genome.fitness) / (entry[1] + 1), entry[1] + 1]
+                genome.fitness = entry[0]
+            self.entries[key] = entry
+
+        # evict least recently used entries
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.pending = {}
+
+    def summary(self) -> str:
+        """
+        Summarizes and resets this generation's cache statistics.
+        """
+        total = self.hits + self.misses + self.resamples
+        rate = self.hits / total if total else 0.0
+        msg = (f"Fitness cache: hits={self.hits}, misses={self.misses}, resamples={self.resamples}, "
+               f"hit rate={rate:.1%}, entries={len(self.entries)}")
+        self.hits, self.misses, self.resamples = 0, 0, 0
+        return msg
+
+    def load(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = OrderedDict(json.load(f))
+
+    def save(self) -> None:
+        """
+        Atomically writes the cache to disk.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self.entries.items()), f)
+        os.replace(tmp_path, self.path)
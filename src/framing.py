@@ -0,0 +1,83 @@
+class FramedReader:
+    """
+    Reassembles length-prefixed `<len> <payload>` messages from a client byte stream.
+    Keeps a growable buffer with a read cursor, so frames split across or coalesced within
+    recv() chunks are parsed iteratively and only complete messages are returned.
+    """
+    RECV_SIZE = 8192  # bytes per recv() call
+    MAX_HEADER = 10  # max digits in a length prefix
+    COMPACT_SIZE = 65536  # consumed bytes before the buffer is compacted
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.cursor = 0  # start of the next unparsed frame
+
+    def feed(self, data: bytes) -> None:
+        """
+        Appends received bytes to the buffer, compacting consumed bytes first.
+        """
+        if self.cursor == len(self.buffer):
+            self.buffer.clear()
+            self.cursor = 0
+        elif self.cursor >= self.COMPACT_SIZE:
+            del self.buffer[:self.cursor]
+            self.cursor = 0
+        self.buffer += data
+
+    def next_msg(self):
+        """
+        Parses the next complete message from the buffer.
+        :returns message payload bytes, or None if no complete message is buffered
+        """
+        buffer = self.buffer
+        sep = buffer.find(b" ", self.cursor, self.cursor + self.MAX_HEADER + 1)
+        if sep < 0:
+            if len(buffer) - self.cursor > self.MAX_HEADER:
+                raise FramingException(f"Invalid length prefix: {bytes(buffer[self.cursor:self.cursor + 16])}")
+            return None
+        with memoryview(buffer) as view:
+            header = view[self.cursor:sep]
+            if not header or not bytes(header).isdigit():
+                raise FramingException(f"Invalid length prefix: {bytes(header)}")
+            end = sep + 1 + int(bytes(header))
+            if end > len(buffer):
+                return None
+            msg = bytes(view[sep + 1:end])
+        self.cursor = end
+        return msg
+
+    def messages(self):
+        """
+        Yields all complete messages currently buffered.
+        """
+        msg = self.next_msg()
+        while msg is not None:
+            yield msg
+            msg = self.next_msg()
+
+    def recv_msg(self, sock):
+        """
+        Receives the next complete message from the socket.
+        :returns message payload bytes, or None if the connection was closed
+        """
+        msg = self.next_msg()
+        while msg is None:
+            data = sock.recv(self.RECV_SIZE)
+            if not data:
+                return None
+            self.feed(data)
+            msg = self.next_msg()
+        return msg
+
+    @staticmethod
+    def frame(payload: bytes) -> bytes:
+        """
+        Length-prefixes a message payload.
+        """
+        return b"%d %s" % (len(payload), payload)
+
+
+class FramingException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,538 @@
+import random
+from collections.abc import Mapping
+import numpy as np
+from neat.genome import DefaultGenome
+
+
+class ArrayGenome:
+    """
+    Drop-in replacement for neat.DefaultGenome that keeps its genes in contiguous NumPy columns
+    instead of one gene object per node and connection. Connections are sorted by an innovation ID
+    packing their (input, output) key, so crossover aligns parents with a binary search, and
+    attribute mutation and crossover are vectorized over all genes. Follows DefaultGenome's
+    mutation and crossover rules and config parameters, with gene draws from a NumPy generator
+    seeded by the random module, so runs stay reproducible from checkpointed random state.
+    The nodes and connections attributes are dict-like views yielding gene proxies, for neat's
+    FeedForwardNetwork.create and other code written against DefaultGenome.
+    """
+    KEY_SHIFT = 32  # innovation ID = input key << KEY_SHIFT + output key
+    NAME_DTYPE = "<U32"  # activation and aggregation names
+
+    @classmethod
+    def parse_config(cls, param_dict):
+        return DefaultGenome.parse_config(param_dict)
+
+    @classmethod
+    def write_config(cls, f, config):
+        config.save(f)
+
+    def __init__(self, key):
+        self.key = key
+        self.fitness = None
+
+        # node columns, sorted by node key
+        self.node_keys = np.zeros(0, dtype=np.int64)
+        self.bias = np.zeros(0)
+        self.response = np.zeros(0)
+        self.activation = np.zeros(0, dtype=self.NAME_DTYPE)
+        self.aggregation = np.zeros(0, dtype=self.NAME_DTYPE)
+
+        # connection columns, sorted by innovation ID
+        self.conn_ids = np.zeros(0, dtype=np.int64)
+        self.weight = np.zeros(0)
+        self.enabled = np.zeros(0, dtype=bool)
+
+    @property
+    def nodes(self):
+        return NodeGenes(self)
+
+    @property
+    def connections(self):
+        return ConnectionGenes(self)
+
+    def __getstate__(self):
+        return {"key": self.key, "fitness": self.fitness,
+                "nodes": (self.node_keys, self.bias, self.response, self.activation, self.aggregation),
+                "connections": (self.conn_ids, self.weight, self.enabled)}
+
+    def __setstate__(self, state):
+        self.key = state["key"]
+        self.fitness = state["fitness"]
+        self.node_keys, self.bias, self.response, self.activation, self.aggregation = state["nodes"]
+        self.conn_ids, self.weight, self.enabled = state["connections"]
+
+    # innovation IDs
+
+    @classmethod
+    def innovation(cls, input_key: int, output_key: int) -> int:
+        return (input_key << cls.KEY_SHIFT) + output_key
+
+    def connection_keys(self) -> list:
+        """
+        :returns (input, output) keys of the connections, in innovation order
+        """
+        inputs = (self.conn_ids >> self.KEY_SHIFT).tolist()
+        outputs = (self.conn_ids & ((1 << self.KEY_SHIFT) - 1)).tolist()
+        return list(zip(inputs, outputs))
+
+    # genome creation
+
+    def configure_new(self, config):
+        """
+        Configure a new genome based on the given configuration.
+        """
+        rng = self._rng()
+        keys = list(config.output_keys)
+        for _ in range(config.num_hidden):
+            keys.append(config.get_new_node_key(dict.fromkeys(keys)))
+        self._add_nodes(np.array(keys, dtype=np.int64), config, rng)
+
+        # connections by initial connectivity type, as DefaultGenome
+        initial = config.initial_connection
+        if 'fs_neat' in initial:
+            input_id = random.choice(config.input_keys)
+            targets = config.output_keys if initial != 'fs_neat_hidden' else self.node_keys.tolist()
+            pairs = [(input_id, output_id) for output_id in targets]
+        elif 'full' in initial:
+            pairs = DefaultGenome.compute_full_connections(self, config, initial == 'full_direct')
+        elif 'partial' in initial:
+            pairs = DefaultGenome.compute_full_connections(self, config, initial == 'partial_direct')
+            random.shuffle(pairs)
+            pairs = pairs[:int(round(len(pairs) * config.connection_fraction))]
+        else:
+            pairs = []
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        ids = (pairs[:, 0] << self.KEY_SHIFT) + pairs[:, 1]
+        self._add_connections(ids, self._init_float(config, "weight", len(ids), rng),
+                              self._init_bool(config, "enabled", len(ids), rng))
+
+    def configure_crossover(self, genome1, genome2, config):
+        """
+        Configure a new genome by crossover from two parent genomes: genes of the fitter parent,
+        with each attribute of homologous genes drawn from either parent.
+        """
+        assert isinstance(genome1.fitness, (int, float))
+        assert isinstance(genome2.fitness, (int, float))
+        if genome1.fitness > genome2.fitness:
+            parent1, parent2 = genome1, genome2
+        else:
+            parent1, parent2 = genome2, genome1
+        rng = self._rng()
+
+        matched, pos = self._align(parent1.conn_ids, parent2.conn_ids)
+        self.conn_ids = parent1.conn_ids.copy()
+        self.weight = self._cross(parent1.weight, parent2.weight, matched, pos, rng)
+        self.enabled = self._cross(parent1.enabled, parent2.enabled, matched, pos, rng)
+
+        matched, pos = self._align(parent1.node_keys, parent2.node_keys)
+        self.node_keys = parent1.node_keys.copy()
+        self.bias = self._cross(parent1.bias, parent2.bias, matched, pos, rng)
+        self.response = self._cross(parent1.response, parent2.response, matched, pos, rng)
+        self.activation = self._cross(parent1.activation, parent2.activation, matched, pos, rng)
+        self.aggregation = self._cross(parent1.aggregation, parent2.aggregation, matched, pos, rng)
+
+    # mutation
+
+    def mutate(self, config):
+        """
+        Mutates this genome: structural mutations as DefaultGenome, then every gene's attributes.
+        """
+        if config.single_structural_mutation:
+            div = max(1, (config.node_add_prob + config.node_delete_prob +
+                          config.conn_add_prob + config.conn_delete_prob))
+            r = random.random()
+            if r < (config.node_add_prob / div):
+                self.mutate_add_node(config)
+            elif r < ((config.node_add_prob + config.node_delete_prob) / div):
+                self.mutate_delete_node(config)
+            elif r < ((config.node_add_prob + config.node_delete_prob + config.conn_add_prob) / div):
+                self.mutate_add_connection(config)
+            elif r < ((config.node_add_prob + config.node_delete_prob +
+                       config.conn_add_prob + config.conn_delete_prob) / div):
+                self.mutate_delete_connection()
+        else:
+            if random.random() < config.node_add_prob:
+                self.mutate_add_node(config)
+            if random.random() < config.node_delete_prob:
+                self.mutate_delete_node(config)
+            if random.random() < config.conn_add_prob:
+                self.mutate_add_connection(config)
+            if random.random() < config.conn_delete_prob:
+                self.mutate_delete_connection()
+
+        rng = self._rng()
+        self.weight = self._mutate_float(config, "weight", self.weight, rng)
+        self.enabled = self._mutate_bool(config, "enabled", self.enabled, rng)
+        self.bias = self._mutate_float(config, "bias", self.bias, rng)
+        self.response = self._mutate_float(config, "response", self.response, rng)
+        self.activation = self._mutate_string(config, "activation", self.activation, rng)
+        self.aggregation = self._mutate_string(config, "aggregation", self.aggregation, rng)
+
+    def mutate_add_node(self, config):
+        if not len(self.conn_ids):
+            if config.check_structural_mutation_surer():
+                self.mutate_add_connection(config)
+            return
+
+        # split a random connection with a new node
+        row = random.randrange(len(self.conn_ids))
+        i, o = self.connection_keys()[row]
+        weight = float(self.weight[row])
+        new_node_id = config.get_new_node_key(self.nodes)
+        self._add_nodes(np.array([new_node_id], dtype=np.int64), config, self._rng())
+        self.enabled[row] = False
+        self.add_connection(config, i, new_node_id, 1.0, True)
+        self.add_connection(config, new_node_id, o, weight, True)
+
+    def add_connection(self, config, input_key, output_key, weight, enabled):
+        assert isinstance(input_key, int)
+        assert isinstance(output_key, int)
+        assert output_key >= 0
+        assert isinstance(enabled, bool)
+        self._remove_connections(self.conn_ids == self.innovation(input_key, output_key))
+        self._add_connections(np.array([self.innovation(input_key, output_key)], dtype=np.int64),
+                              np.array([weight], dtype=np.float64), np.array([enabled]))
+
+    def mutate_add_connection(self, config):
+        """
+        Attempt to add a new connection, the only restriction being that the output
+        node cannot be one of the network input pins.
+        """
+        possible_outputs = self.node_keys.tolist()
+        out_node = random.choice(possible_outputs)
+        in_node = random.choice(possible_outputs + config.input_keys)
+
+        # don't duplicate connections
+        innovation = self.innovation(in_node, out_node)
+        row = np.searchsorted(self.conn_ids, innovation)
+        if row < len(self.conn_ids) and self.conn_ids[row] == innovation:
+            if config.check_structural_mutation_surer():
+                self.enabled[row] = True
+            return
+
+        # don't allow connections between two output nodes, or cycles in feed-forward networks
+        if in_node in config.output_keys and out_node in config.output_keys:
+            return
+        if config.feed_forward and self.creates_cycle(in_node, out_node):
+            return
+        rng = self._rng()
+        self._add_connections(np.array([innovation], dtype=np.int64), self._init_float(config, "weight", 1, rng),
+                              self._init_bool(config, "enabled", 1, rng))
+
+    def mutate_delete_node(self, config):
+        # do nothing if there are no non-output nodes
+        available_nodes = [k for k in self.node_keys.tolist() if k not in config.output_keys]
+        if not available_nodes:
+            return -1
+        del_key = random.choice(available_nodes)
+        inputs = self.conn_ids >> self.KEY_SHIFT
+        outputs = self.conn_ids & ((1 << self.KEY_SHIFT) - 1)
+        self._remove_connections((inputs == del_key) | (outputs == del_key))
+        keep = self.node_keys != del_key
+        self.node_keys, self.bias, self.response, self.activation, self.aggregation = (
+            self.node_keys[keep], self.bias[keep], self.response[keep], self.activation[keep], self.aggregation[keep])
+        return del_key
+
+    def mutate_delete_connection(self):
+        if len(self.conn_ids):
+            mask = np.zeros(len(self.conn_ids), dtype=bool)
+            mask[random.randrange(len(self.conn_ids))] = True
+            self._remove_connections(mask)
+
+    def creates_cycle(self, input_key: int, output_key: int) -> bool:
+        """
+        :returns whether adding the connection would create a cycle, as neat.graphs.creates_cycle
+        """
+        if input_key == output_key:
+            return True
+        inputs = self.conn_ids >> self.KEY_SHIFT
+        outputs = self.conn_ids & ((1 << self.KEY_SHIFT) - 1)
+        visited = np.array([output_key], dtype=np.int64)
+        while True:
+            frontier = np.unique(outputs[np.isin(inputs, visited) & ~np.isin(outputs, visited)])
+            if not len(frontier):
+                return False
+            if input_key in frontier:
+                return True
+            visited = np.concatenate([visited, frontier])
+
+    # genome properties
+
+    def distance(self, other, config):
+        """
+        Returns the genetic distance between this genome and the other, as DefaultGenome.distance().
+        Homologous gene distances are summed in this genome's gene order.
+        """
+        node_distance = self._distance_component(
+            self.node_keys, other.node_keys, config,
+            lambda row, pos: (np.abs(self.bias[row] - other.bias[pos]) +
+                              np.abs(self.response[row] - other.response[pos]) +
+                              (self.activation[row] != other.activation[pos]) +
+                              (self.aggregation[row] != other.aggregation[pos])))
+        connection_distance = self._distance_component(
+            self.conn_ids, other.conn_ids, config,
+            lambda row, pos: (np.abs(self.weight[row] - other.weight[pos]) +
+                              (self.enabled[row] != other.enabled[pos])))
+        return node_distance + connection_distance
+
+    def size(self):
+        """
+        Returns genome 'complexity', taken to be
+        (number of nodes, number of enabled connections)
+        """
+        return len(self.node_keys), int(np.count_nonzero(self.enabled))
+
+    def __str__(self):
+        s = "Key: {0}\nFitness: {1}\nNodes:".format(self.key, self.fitness)
+        for k, ng in self.nodes.items():
+            s += "\n\t{0} {1!s}".format(k, ng)
+        s += "\nConnections:"
+        for c in self.connections.values():
+            s += "\n\t" + str(c)
+        return s
+
+    # column helpers
+
+    def _rng(self) -> np.random.Generator:
+        return np.random.default_rng(random.getrandbits(64))
+
+    def _add_nodes(self, keys: np.ndarray, config, rng) -> None:
+        n = len(keys)
+        node_keys = np.concatenate([self.node_keys, keys])
+        order = np.argsort(node_keys, kind="stable")
+        self.node_keys = node_keys[order]
+        self.bias = np.concatenate([self.bias, self._init_float(config, "bias", n, rng)])[order]
+        self.response = np.concatenate([self.response, self._init_float(config, "response", n, rng)])[order]
+        self.activation = np.concatenate([self.activation, self._init_string(config, "activation", n, rng)])[order]
+        self.aggregation = np.concatenate([self.aggregation, self._init_string(config, "aggregation", n, rng)])[order]
+
+    def _add_connections(self, ids: np.ndarray, weight: np.ndarray, enabled: np.ndarray) -> None:
+        conn_ids = np.concatenate([self.conn_ids, ids])
+        order = np.argsort(conn_ids, kind="stable")
+        self.conn_ids = conn_ids[order]
+        self.weight = np.concatenate([self.weight, weight])[order]
+        self.enabled = np.concatenate([self.enabled, enabled])[order]
+
+    def _remove_connections(self, mask: np.ndarray) -> None:
+        if mask.any():
+            keep = ~mask
+            self.conn_ids, self.weight, self.enabled = self.conn_ids[keep], self.weight[keep], self.enabled[keep]
+
+    @staticmethod
+    def _align(ids1: np.ndarray, ids2: np.ndarray):
+        """
+        :returns (mask of ids1 also in ids2, their positions in ids2)
+        """
+        pos = np.minimum(np.searchsorted(ids2, ids1), max(len(ids2) - 1, 0))
+        matched = ids2[pos] == ids1 if len(ids2) else np.zeros(len(ids1), dtype=bool)
+        return matched, pos
+
+    @staticmethod
+    def _cross(column1, column2, matched, pos, rng) -> np.ndarray:
+        """
+        Homologous genes take the attribute from either parent with equal probability.
+        """
+        if not len(column2):
+            return column1.copy()
+        from_other = matched & ~(rng.random(len(column1)) > 0.5)
+        return np.where(from_other, column2[pos], column1)
+
+    @staticmethod
+    def _distance_component(keys0, keys1, config, terms) -> float:
+        if not len(keys0) and not len(keys1):
+            return 0.0
+        matched, pos = ArrayGenome._align(keys0, keys1)
+        d = np.zeros(len(keys0))
+        rows = np.flatnonzero(matched)
+        d[rows] = terms(rows, pos[rows])
+        d *= config.compatibility_weight_coefficient
+        total = float(np.cumsum(d)[-1]) if len(d) else 0.0  # sequential sum, as DefaultGenome
+        disjoint = len(keys0) + len(keys1) - 2 * int(np.count_nonzero(matched))
+        return (total + (config.compatibility_disjoint_coefficient * disjoint)) / max(len(keys0), len(keys1))
+
+    # vectorized gene attributes, as neat.attributes
+
+    @staticmethod
+    def _init_float(config, name: str, n: int, rng) -> np.ndarray:
+        mean = getattr(config, f"{name}_init_mean")
+        stdev = getattr(config, f"{name}_init_stdev")
+        init_type = getattr(config, f"{name}_init_type").lower()
+        min_value = getattr(config, f"{name}_min_value")
+        max_value = getattr(config, f"{name}_max_value")
+        if ('gauss' in init_type) or ('normal' in init_type):
+            return np.clip(rng.normal(mean, stdev, n), min_value, max_value)
+        if 'uniform' in init_type:
+            return rng.uniform(max(min_value, mean - 2 * stdev), min(max_value, mean + 2 * stdev), n)
+        raise RuntimeError("Unknown init_type {!r} for {!s}".format(init_type, f"{name}_init_type"))
+
+    @staticmethod
+    def _init_bool(config, name: str, n: int, rng) -> np.ndarray:
+        default = str(getattr(config, f"{name}_default")).lower()
+        if default in ('1', 'on', 'yes', 'true'):
+            return np.ones(n, dtype=bool)
+        if default in ('0', 'off', 'no', 'false'):
+            return np.zeros(n, dtype=bool)
+        if default in ('random', 'none'):
+            return rng.random(n) < 0.5
+        raise RuntimeError("Unknown default value {!r} for {!s}".format(default, name))
+
+    @classmethod
+    def _init_string(cls, config, name: str, n: int, rng) -> np.ndarray:
+        default = getattr(config, f"{name}_default")
+        if default.lower() in ('none', 'random'):
+            return rng.choice(np.array(getattr(config, f"{name}_options"), dtype=cls.NAME_DTYPE), n)
+        return np.full(n, default, dtype=cls.NAME_DTYPE)
+
+    @classmethod
+    def _mutate_float(cls, config, name: str, values: np.ndarray, rng) -> np.ndarray:
+        mutate_rate = getattr(config, f"{name}_mutate_rate")
+        replace_rate = getattr(config, f"{name}_replace_rate")
+        if not len(values) or mutate_rate + replace_rate <= 0:
+            return values
+        r = rng.random(len(values))
+        mutate = r < mutate_rate
+        replace = ~mutate & (r < replace_rate + mutate_rate)
+        values = values.copy()
+        values[mutate] = np.clip(values[mutate] + rng.normal(0.0, getattr(config, f"{name}_mutate_power"),
+                                                             np.count_nonzero(mutate)),
+                                 getattr(config, f"{name}_min_value"), getattr(config, f"{name}_max_value"))
+        values[replace] = cls._init_float(config, name, np.count_nonzero(replace), rng)
+        return values
+
+    @staticmethod
+    def _mutate_bool(config, name: str, values: np.ndarray, rng) -> np.ndarray:
+        mutate_rate = getattr(config, f"{name}_mutate_rate")
+        rates = np.where(values, mutate_rate + getattr(config, f"{name}_rate_to_false_add"),
+                         mutate_rate + getattr(config, f"{name}_rate_to_true_add"))
+        if not len(values) or not (rates > 0).any():
+            return values
+        mutate = rng.random(len(values)) < rates
+        return np.where(mutate, rng.random(len(values)) < 0.5, values)
+
+    @classmethod
+    def _mutate_string(cls, config, name: str, values: np.ndarray, rng) -> np.ndarray:
+        mutate_rate = getattr(config, f"{name}_mutate_rate")
+        if not len(values) or mutate_rate <= 0:
+            return values
+        mutate = rng.random(len(values)) < mutate_rate
+        options = np.array(getattr(config, f"{name}_options"), dtype=cls.NAME_DTYPE)
+        return np.where(mutate, rng.choice(options, len(values)), values)
+
+
+class NodeGene:
+    """
+    Proxy of an ArrayGenome node gene, valid until the genome's nodes change.
+    """
+    __slots__ = ("genome", "row", "key")
+
+    def __init__(self, genome: ArrayGenome, row: int, key: int):
+        self.genome = genome
+        self.row = row
+        self.key = key
+
+    bias = property(lambda self: float(self.genome.bias[self.row]),
+                    lambda self, value: self.genome.bias.__setitem__(self.row, value))
+    response = property(lambda self: float(self.genome.response[self.row]),
+                        lambda self, value: self.genome.response.__setitem__(self.row, value))
+    activation = property(lambda self: str(self.genome.activation[self.row]),
+                          lambda self, value: self.genome.activation.__setitem__(self.row, value))
+    aggregation = property(lambda self: str(self.genome.aggregation[self.row]),
+                           lambda self, value: self.genome.aggregation.__setitem__(self.row, value))
+
+    def __str__(self):
+        return (f"DefaultNodeGene(key={self.key}, bias={self.bias}, response={self.response}, "
+                f"activation={self.activation}, aggregation={self.aggregation})")
+
+
+class ConnectionGene:
+    """
+    Proxy of an ArrayGenome connection gene, valid until the genome's connections change.
+    """
+    __slots__ = ("genome", "row", "key")
+
+    def __init__(self, genome: ArrayGenome, row: int, key: tuple):
+        self.genome = genome
+        self.row = row
+        self.key = key
+
+    weight = property(lambda self: float(self.genome.weight[self.row]),
+                      lambda self, value: self.genome.weight.__setitem__(self.row, value))
+    enabled = property(lambda self: bool(self.genome.enabled[self.row]),
+                       lambda self, value: self.genome.enabled.__setitem__(self.row, value))
+
+    def __str__(self):
+        return f"DefaultConnectionGene(key={self.key}, weight={self.weight}, enabled={self.enabled})"
+
+
+class NodeGenes(Mapping):
+    """
+    Read-only node key -> NodeGene view of an ArrayGenome.
+    """
+
+    def __init__(self, genome: ArrayGenome):
+        self.genome = genome
+
+    def __len__(self):
+        return len(self.genome.node_keys)
+
+    def __iter__(self):
+        return iter(self.genome.node_keys.tolist())
+
+    def __contains__(self, key):
+        return self._row(key) is not None
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return NodeGene(self.genome, row, key)
+
+    def values(self):
+        return [NodeGene(self.genome, row, key) for row, key in enumerate(self.genome.node_keys.tolist())]
+
+    def items(self):
+        return [(gene.key, gene) for gene in self.values()]
+
+    def _row(self, key):
+        keys = self.genome.node_keys
+        row = int(np.searchsorted(keys, key))
+        return row if row < len(keys) and keys[row] == key else None
+
+
+class ConnectionGenes(Mapping):
+    """
+    Read-only (input, output) key -> ConnectionGene view of an ArrayGenome, in innovation order.
+    """
+
+    def __init__(self, genome: ArrayGenome):
+        self.genome = genome
+
+    def __len__(self):
+        return len(self.genome.conn_ids)
+
+    def __iter__(self):
+        return iter(self.genome.connection_keys())
+
+    def __contains__(self, key):
+        return self._row(key) is not None
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return ConnectionGene(self.genome, row, key)
+
+    def values(self):
+        return [ConnectionGene(self.genome, row, key) for row, key in enumerate(self.genome.connection_keys())]
+
+    def items(self):
+        return [(gene.key, gene) for gene in self.values()]
+
+    def _row(self, key):
+        try:
+            innovation = ArrayGenome.innovation(*key)
+        except TypeError:
+            return None
+        ids = self.genome.conn_ids
+        row = int(np.searchsorted(ids, innovation))
+        return row if row < len(ids) and ids[row] == innovation else None
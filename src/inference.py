@@ -0,0 +1,356 @@
+import asyncio
+import time
+import numpy as np
+from neat.graphs import feed_forward_layers
+
+
+class CompiledNetwork:
+    """
+    Feed-forward genome phenotype compiled into topological layers of NumPy arrays.
+    Values are kept in one flat vector (inputs first, then evaluated nodes); each layer holds its
+    incoming connections as (source index, destination index, weight) arrays.
+    Matches neat.nn.FeedForwardNetwork.activate() to floating-point tolerance.
+    """
+    # vectorized activation functions by neat activation name
+    ACTIVATIONS = {
+        "sigmoid": lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+        "tanh": lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+        "relu": lambda z: np.maximum(z, 0.0),
+        "identity": lambda z: z,
+    }
+    ACTIVATION_CODES = {name: code for code, name in enumerate(ACTIVATIONS)}
+    ACTIVATION_FUNCS = tuple(ACTIVATIONS.values())
+
+    def __init__(self, n_inputs: int, size: int, outputs: np.ndarray, layers: list):
+        self.n_inputs = n_inputs  # number of input values
+        self.size = size  # length of the value vector
+        self.outputs = outputs  # value indices of output nodes
+        self.layers = layers  # [(src, dst, weight, nodes, bias, response, activation codes)]
+
+    @classmethod
+    def create(cls, genome, config):
+        """
+        Compiles a genome into a CompiledNetwork.
+        """
+        genome_config = config.genome_config
+        weights = {cg.key: cg.weight for cg in genome.connections.values() if cg.enabled}
+        connections = list(weights)
+        layers = feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections)
+
+        # assign value indices: inputs, outputs, then evaluated hidden nodes
+        index = {key: i for i, key in enumerate(genome_config.input_keys)}
+        for key in genome_config.output_keys:
+            index[key] = len(index)
+        for layer in layers:
+            for node in sorted(layer):
+                index.setdefault(node, len(index))
+
+        # group incoming connections by destination node
+        incoming = {}
+        for key in connections:
+            incoming.setdefault(key[1], []).append(key)
+
+        compiled = []
+        for layer in layers:
+            nodes = sorted(layer)
+            src, dst, weight = [], [], []
+            bias, response, codes = [], [], []
+            for node in nodes:
+                for key in incoming.get(node, ()):
+                    src.append(index[key[0]])
+                    dst.append(index[node])
+                    weight.append(weights[key])
+                ng = genome.nodes[node]
+                if ng.aggregation != "sum":
+                    raise ValueError(f"Unsupported aggregation for compiled networks: {ng.aggregation}")
+                if ng.activation not in cls.ACTIVATION_CODES:
+                    raise ValueError(f"Unsupported activation for compiled networks: {ng.activation}")
+                bias.append(ng.bias)
+                response.append(ng.response)
+                codes.append(cls.ACTIVATION_CODES[ng.activation])
+            compiled.append((
+                np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp), np.array(weight, dtype=float),
+                np.array([index[n] for n in nodes], dtype=np.intp), np.array(bias, dtype=float),
+                np.array(response, dtype=float), np.array(codes, dtype=np.intp),
+            ))
+        outputs = np.array([index[key] for key in genome_config.output_keys], dtype=np.intp)
+        return cls(len(genome_config.input_keys), len(index), outputs, compiled)
+
+    def activate(self, inputs) -> np.ndarray:
+        """
+        Forward-feeds a single input vector.
+        """
+        return self.activate_batch([self], [inputs])[0]
+
+    def activate_states(self, states: np.ndarray) -> np.ndarray:
+        """
+        Forward-feeds a matrix of input vectors, one per row.
+        :returns output values, one row per input vector
+        """
+        values = np.zeros((len(states), self.size))
+        values[:, :self.n_inputs] = states
+        column = np.zeros(self.size, dtype=np.intp)  # value index -> position in its layer
+        for src, dst, weight, nodes, bias, response, codes in self.layers:
+            column[nodes] = np.arange(len(nodes))
+            incoming = np.zeros((len(src), len(nodes)))
+            incoming[np.arange(len(src)), column[dst]] = weight
+            z = bias + response * (values[:, src] @ incoming)
+            for code in np.unique(codes):
+                mask = codes == code
+                values[:, nodes[mask]] = self.ACTIVATION_FUNCS[code](z[:, mask])
+        return values[:, self.outputs]
+
+    @classmethod
+    def activate_batch(cls, nets: list, inputs: list) -> [np.ndarray]:
+        """
+        Forward-feeds one input vector per network through a batch of (possibly different) networks
+        in a single vectorized pass per layer depth.
+        """
+        # lay out all networks' value vectors back to back
+        offsets = np.cumsum([0] + [net.size for net in nets])
+        values = np.zeros(offsets[-1])
+        for net, off, x in zip(nets, offsets, inputs):
+            if len(x) != net.n_inputs:
+                raise RuntimeError("Expected {0:n} inputs, got {1:n}".format(net.n_inputs, len(x)))
+            values[off:off + net.n_inputs] = x
+
+        # evaluate layer depths across the batch
+        depth = max(len(net.layers) for net in nets)
+        for d in range(depth):
+            batch = [(net.layers[d], off) for net, off in zip(nets, offsets) if d < len(net.layers)]
+            if len(batch) == 1:
+                (src, dst, weight, nodes, bias, response, codes), off = batch[0]
+                if off:
+                    src, dst, nodes = src + off, dst + off, nodes + off
+            else:
+                src, dst, weight, nodes, bias, response, codes = (
+                    np.concatenate([layer[i] + off if i in (0, 1, 3) else layer[i] for layer, off in batch])
+                    for i in range(7)
+                )
+            z = np.bincount(dst, weights=values[src] * weight, minlength=len(values))[nodes]
+            z = bias + response * z
+            for code in np.unique(codes):
+                mask = codes == code
+                values[nodes[mask]] = cls.ACTIVATION_FUNCS[code](z[mask])
+
+        return [values[net.outputs + off] for net, off in zip(nets, offsets)]
+
+
+class FlatNetwork:
+    """
+    Pruned feed-forward genome phenotype with an allocation-free evaluator for single activations.
+    Evaluates the nodes required for the outputs, as neat.nn.FeedForwardNetwork does, in a fixed order
+    of layers; zero-weight connections are dropped and only inputs feeding a connection are read.
+    Each layer is a dense weight matrix over the values it reads, so an activation is a gather, a
+    matrix-vector product and an in-place activation function per layer over preallocated buffers.
+    Outputs are returned in a reused buffer and match FeedForwardNetwork.activate() to floating-point
+    tolerance. Compiled arrays are shared by clone()s, which own their buffers.
+    """
+    ACTIVATIONS = ("sigmoid", "tanh", "relu", "identity")
+
+    def __init__(self, n_inputs: int, inputs: np.ndarray, size: int, outputs: np.ndarray, layers: list):
+        self.n_inputs = n_inputs  # number of input values
+        self.inputs = inputs  # input vector positions of the inputs read, stored first in the value vector
+        self.size = size  # length of the value vector
+        self.outputs = outputs  # value indices of output nodes
+        self.layers = layers  # [(src, weight matrix, nodes, bias, response, [(activation, mask)])]
+        self._alloc()
+
+    def _alloc(self) -> None:
+        self.values = np.zeros(self.size)
+        self.out = np.zeros(len(self.outputs))
+        self.buffers = [(np.empty(len(src)), np.empty(len(nodes))) for src, _, nodes, *_ in self.layers]
+
+    def clone(self):
+        """
+        :returns a network sharing this network's compiled arrays, with its own buffers
+        """
+        net = object.__new__(FlatNetwork)
+        net.__dict__.update(self.__dict__)
+        net._alloc()
+        return net
+
+    @classmethod
+    def create(cls, genome, config):
+        """
+        Compiles and prunes a genome into a FlatNetwork.
+        """
+        genome_config = config.genome_config
+        weights = {cg.key: cg.weight for cg in genome.connections.values() if cg.enabled}
+        connections = list(weights)
+        layers = [sorted(layer) for layer in
+                  feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections)]
+
+        # group non-zero incoming connections by destination node
+        incoming = {}
+        for key in connections:
+            if weights[key] != 0.0:
+                incoming.setdefault(key[1], []).append(key)
+
+        # assign value indices: inputs read, outputs, then evaluated hidden nodes
+        position = {key: i for i, key in enumerate(genome_config.input_keys)}
+        read = {key[0] for layer in layers for node in layer for key in incoming.get(node, ()) if key[0] in position}
+        inputs = sorted(read, key=position.get)
+        index = {key: i for i, key in enumerate(inputs)}
+        for key in genome_config.output_keys:
+            index[key] = len(index)
+        for layer in layers:
+            for node in layer:
+                index.setdefault(node, len(index))
+
+        compiled = []
+        for layer in layers:
+            src = sorted({index[key[0]] for node in layer for key in incoming.get(node, ())})
+            column = {v: i for i, v in enumerate(src)}
+            weight = np.zeros((len(layer), len(src)))
+            bias, response, activations = [], [], []
+            for row, node in enumerate(layer):
+                for key in incoming.get(node, ()):
+                    weight[row, column[index[key[0]]]] = weights[key]
+                ng = genome.nodes[node]
+                if ng.aggregation != "sum":
+                    raise ValueError(f"Unsupported aggregation for flat networks: {ng.aggregation}")
+                if ng.activation not in cls.ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation for flat networks: {ng.activation}")
+                bias.append(ng.bias)
+                response.append(ng.response)
+                activations.append(ng.activation)
+            groups = [(name, np.array([a == name for a in activations])) for name in sorted(set(activations))]
+            if len(groups) == 1:
+                groups = [(groups[0][0], True)]
+            compiled.append((
+                np.array(src, dtype=np.intp), weight, np.array([index[n] for n in layer], dtype=np.intp),
+                np.array(bias, dtype=float), np.array(response, dtype=float), groups,
+            ))
+        outputs = np.array([index[key] for key in genome_config.output_keys], dtype=np.intp)
+        return cls(len(genome_config.input_keys), np.array([position[k] for k in inputs], dtype=np.intp),
+                   len(index), outputs, compiled)
+
+    def activate(self, inputs) -> np.ndarray:
+        """
+        Forward-feeds a single input vector.
+        :returns output values, in a buffer reused by the next activation
+        """
+        if len(inputs) != self.n_inputs:
+            raise RuntimeError("Expected {0:n} inputs, got {1:n}".format(self.n_inputs, len(inputs)))
+        values = self.values
+        np.take(inputs, self.inputs, out=values[:len(self.inputs)])
+        for (src, weight, nodes, bias, response, groups), (x, z) in zip(self.layers, self.buffers):
+            np.take(values, src, out=x)
+            np.dot(weight, x, out=z)
+            z *= response
+            z += bias
+            for name, where in groups:
+                self._activate(name, z, where)
+            values[nodes] = z
+        return np.take(values, self.outputs, out=self.out)
+
+    def activate_states(self, states: np.ndarray) -> np.ndarray:
+        """
+        Forward-feeds a matrix of input vectors, one per row.
+        :returns output values, one row per input vector
+        """
+        values = np.zeros((len(states), self.size))
+        values[:, :len(self.inputs)] = states[:, self.inputs]
+        for src, weight, nodes, bias, response, groups in self.layers:
+            z = values[:, src] @ weight.T
+            z *= response
+            z += bias
+            for name, where in groups:
+                self._activate(name, z, where)
+            values[:, nodes] = z
+        return values[:, self.outputs]
+
+    @staticmethod
+    def _activate(name: str, z: np.ndarray, where) -> None:
+        """
+        Applies a neat activation function in place, where selected.
+        """
+        if name == "sigmoid":
+            np.multiply(z, -5.0, out=z, where=where)
+            np.clip(z, -60.0, 60.0, out=z, where=where)
+            np.exp(z, out=z, where=where)
+            np.add(z, 1.0, out=z, where=where)
+            np.reciprocal(z, out=z, where=where)
+        elif name == "tanh":
+            np.multiply(z, 2.5, out=z, where=where)
+            np.clip(z, -60.0, 60.0, out=z, where=where)
+            np.tanh(z, out=z, where=where)
+        elif name == "relu":
+            np.maximum(z, 0.0, out=z, where=where)
+
+
+class BatchInferenceEngine:
+    """
+    Collects pending forward-feed requests from all connected clients into micro-batches.
+    A batch is evaluated when it reaches MAX_BATCH requests or its deadline expires.
+    Must be used from a single asyncio event loop.
+    """
+    MAX_BATCH = 64  # max requests per batch
+    DEADLINE = 0.002  # seconds a request may wait for its batch to fill
+
+    def __init__(self, max_batch: int = MAX_BATCH, deadline: float = DEADLINE):
+        self.max_batch = max_batch
+        self.deadline = deadline
+        self.pending = []  # [(net, inputs, future, submit time)]
+        self.flush_handle = None  # deadline timer of the pending batch
+        self.latencies = []  # per-request latency (seconds)
+        self.batch_sizes = []  # per-batch request count
+
+    async def activate(self, net: CompiledNetwork, inputs) -> np.ndarray:
+        """
+        Queues an input vector for the next batch and waits for the network outputs.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((net, inputs, future, time.perf_counter()))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.deadline, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """
+        Evaluates all pending requests as one batch.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            outputs = CompiledNetwork.activate_batch([b[0] for b in batch], [b[1] for b in batch])
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        now = time.perf_counter()
+        for (_, _, future, submitted), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+            self.latencies.append(now - submitted)
+        self.batch_sizes.append(len(batch))
+
+    def stats(self) -> dict:
+        """
+        Summarizes per-request latency (ms) and batch size statistics.
+        """
+        if not self.latencies:
+            return {"requests": 0, "batches": 0}
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "requests": len(self.latencies),
+            "batches": len(self.batch_sizes),
+            "batch_mean": float(np.mean(self.batch_sizes)),
+            "batch_max": int(np.max(self.batch_sizes)),
+            "latency_p50": float(np.percentile(latencies, 50)),
+            "latency_p95": float(np.percentile(latencies, 95)),
+            "latency_p99": float(np.percentile(latencies, 99)),
+        }
+
+    def reset_stats(self) -> None:
+        self.latencies = []
+        self.batch_sizes = []
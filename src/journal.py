@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from fitness_cache import FitnessCache
+
+
+class EvaluationJournal:
+    """
+    Append-only on-disk journal of per-genome evaluations, so a crashed generation resumes
+    where it stopped. Each line records (generation, genome key, genome digest, fitness); appends
+    are fsynced in batches of SYNC_EVERY records or every SYNC_INTERVAL seconds.
+    The digest guards against replaying records onto a population the journal was not written for.
+    """
+    SYNC_EVERY = 16  # records between fsyncs
+    SYNC_INTERVAL = 5.0  # max seconds between fsyncs
+    KEEP_GENERATIONS = 2  # generations of records kept when rotating
+
+    def __init__(self, path: str, sync_every: int = SYNC_EVERY, sync_interval: float = SYNC_INTERVAL):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.records = {}  # generation -> {genome key: (digest, fitness)}
+        self.lock = threading.Lock()  # records are appended from client threads
+        self.file = None
+        self.unsynced = 0  # records written since the last fsync
+        self.last_sync = time.monotonic()
+        self.load()
+
+    def load(self) -> None:
+        """
+        Reads all complete records from disk; torn lines from a crash are skipped.
+        """
+        self.records = {}
+        torn = False
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    torn = not line.endswith("\n")
+                    try:
+                        gen, key, digest, fitness = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.records.setdefault(gen, {})[key] = (digest, fitness)
+        self.file = open(self.path, "a")
+        if torn:
+            self.file.write("\n")  # terminate the torn line before appending
+
+    def record(self, generation: int, key: int, genome) -> None:
+        """
+        Appends an evaluated genome's fitness.
+        """
+        digest = FitnessCache.genome_digest(genome)
+        line = json.dumps([generation, key, digest, genome.fitness]) + "\n"
+        with self.lock:
+            self.records.setdefault(generation, {})[key] = (digest, genome.fitness)
+            self.file.write(line)
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                self._sync()
+
+    def apply(self, genomes, generation: int) -> list:
+        """
+        Assigns journaled fitness to genomes already evaluated this generation.
+        :returns (genome ID, genome) pairs that still need an evaluation
+        """
+        records = self.records.get(generation)
+        if not records:
+            return genomes
+        remaining = []
+        for _id, genome in genomes:
+            record = records.get(_id)
+            if record is not None and record[0] == FitnessCache.genome_digest(genome):
+                genome.fitness = record[1]
+            else:
+                remaining.append((_id, genome))
+        return remaining
+
+    def rotate(self, generation: int) -> None:
+        """
+        Atomically rewrites the journal, dropping records older than the last KEEP_GENERATIONS generations.
+        """
+        with self.lock:
+            self.records = {g: r for g, r in self.records.items() if g > generation - self.KEEP_GENERATIONS}
+            self.file.close()
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for gen, records in sorted(self.records.items()):
+                    for key, (digest, fitness) in records.items():
+                        f.write(json.dumps([gen, key, digest, fitness]) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, "a")
+            self.unsynced = 0
+
+    def sync(self) -> None:
+        with self.lock:
+            self._sync()
+
+    def close(self) -> None:
+        with self.lock:
+            self._sync()
+            self.file.close()
+
+    def _sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
@@ -0,0 +1,86 @@
+import atexit
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+_listeners = {}  # logger name -> running QueueListener
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+    Records are enqueued as-is, so logged arguments must not be mutated after logging.
+    """
+    def prepare(self, record):
+        return record
+
+
+def queue_logging(logger: logging.Logger, *handlers) -> logging.Logger:
+    """
+    Routes a logger's records through a queue to handlers served by a listener thread,
+    so formatting and disk I/O stay off the logging threads. Replaces any previous pipeline.
+    """
+    stop_queue_logging(logger)
+    records = queue.SimpleQueue()
+    logger.handlers.clear()
+    logger.addHandler(DeferredQueueHandler(records))
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[logger.name] = listener
+    return logger
+
+
+def stop_queue_logging(logger: logging.Logger) -> None:
+    """
+    Flushes and stops a logger's listener thread, closing its handlers.
+    """
+    listener = _listeners.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+@atexit.register
+def _stop_all() -> None:
+    for name in list(_listeners):
+        stop_queue_logging(logging.getLogger(name))
+
+
+class TraceFormatter(logging.Formatter):
+    """
+    Formats trace records as compact JSON lines.
+    """
+    def format(self, record) -> str:
+        gen_id, genome_id, turn, state, reply = record.msg
+        return json.dumps({
+            "gen": gen_id, "genome": genome_id, "turn": turn,
+            "state": state.decode(errors="replace"), "reply": reply.decode(errors="replace"),
+        }, separators=(",", ":"))
+
+
+class TraceSampler:
+    """
+    Samples per-turn game state traces: a GENOME_RATE fraction of genomes is traced, and a
+    TURN_RATE fraction of each traced genome's turns is written.
+    """
+    GENOME_RATE = 0.05  # fraction of genomes traced
+    TURN_RATE = 0.2  # fraction of a traced genome's turns written
+
+    def __init__(self, logger: logging.Logger, genome_rate: float = GENOME_RATE, turn_rate: float = TURN_RATE):
+        self.logger = logger
+        self.genome_rate = genome_rate
+        self.turn_rate = turn_rate
+        self.rng = random.Random()  # keeps NEAT's global random state untouched
+
+    def sample_genome(self) -> bool:
+        return self.genome_rate > 0 and self.rng.random() < self.genome_rate
+
+    def trace(self, gen_id: int, genome_id: int, turn: int, state: bytes, reply: bytes) -> None:
+        """
+        Writes a turn's state message and reply, subject to turn sampling.
+        """
+        if self.rng.random() < self.turn_rate:
+            self.logger.info((gen_id, genome_id, turn, state, reply))
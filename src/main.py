@@ -1,8 +1,22 @@
 import os
+import time
 import neat
 from eval_server import EvaluationServer
+from async_server import AsyncEvaluationServer
+from pool_server import PooledEvaluationServer
+from process_server import ProcessEvaluationServer
+from coordinator import CoordinatorServer
 import logging
 import reporter
+from checkpointer import IncrementalCheckpointer
+from fitness_cache import FitnessCache
+from journal import EvaluationJournal
+from scheduler import LPTScheduler
+from racing import SuccessiveHalving, RacingException
+from behavior import StateCorpus, BehaviorScreen
+from neat_config import load_config
+from speciation import VectorizedSpeciesSet
+from genome import ArrayGenome
 
 
 class Trainer:
@@ -14,27 +28,42 @@ class Trainer:
         self.config = config
         self.t = 100  # number of generations
         self.restore_ckpt = True  # restore from the last checkpoint?
-        self.ckpt_prefix = "./checkpoints/neat-ckpt-"
+        self.ckpt_dir = "./checkpoints/"
+        self.ckpt_prefix = "./checkpoints/neat-ckpt-"  # legacy neat.Checkpointer files
+        self.fitness_cache = FitnessCache("./checkpoints/fitness-cache.json")  # skips unchanged genomes
+        self.journal = EvaluationJournal("./checkpoints/eval-journal.jsonl")  # resumes crashed generations
+        self.eval_server.journal = self.journal
+        self.scheduler = LPTScheduler("./checkpoints/durations.json")  # longest-expected-first dispatch
+        self.racing = SuccessiveHalving(budget=None)  # genome evaluations per generation over multiple seeds, e.g. 500
+        self.screen = BehaviorScreen(StateCorpus("./checkpoints/state-corpus.f32"),
+                                     self.eval_server.net_cache)  # skips behavioral clones
+        self.eval_server.corpus = self.screen.corpus
         self.p = None  # population instance
         self.logger = self._init_logger()  # trainer logger
 
     def run(self):
         # Create or restore the population, which is the top-level object for a NEAT run.
         if self.restore_ckpt:
-            last_ckpt = self.get_last_ckpt()
+            last_ckpt = IncrementalCheckpointer.latest_checkpoint(self.ckpt_dir)
             if last_ckpt >= 0:
                 self.logger.debug(f"Restoring population from checkpoint {last_ckpt}...")
+                self.p = IncrementalCheckpointer.restore_checkpoint(self.ckpt_dir, last_ckpt)
+                self.p.generation += 1
+            elif (last_ckpt := self.get_last_ckpt()) >= 0:
+                self.logger.debug(f"Restoring population from legacy checkpoint {last_ckpt}...")
                 self.p = neat.Checkpointer.restore_checkpoint(f'{self.ckpt_prefix}{last_ckpt}')
                 self.p.generation += 1
         if not self.p:
             self.logger.debug("Creating initial population...")
             self.p = neat.Population(self.config)
 
+        # replay evaluations journaled before a crash; _eval() dispatches only the rest
+        remaining = self.journal.apply(list(self.p.population.items()), self.p.generation)
+        if len(remaining) < len(self.p.population):
+            self.logger.debug(f"Replayed {len(self.p.population) - len(remaining)} journaled evaluations.")
+
         # init checkpointer
-        checkpointer = neat.Checkpointer(
-            generation_interval=1,
-            filename_prefix=self.ckpt_prefix
-        )
+        checkpointer = IncrementalCheckpointer(self.ckpt_dir, generation_interval=1, reproduction=self.p.reproduction)
 
         # Add a stdout reporter to show progress in the terminal.
         self.p.add_reporter(reporter.ResultsReporter(self.logger))
@@ -47,6 +76,9 @@ class Trainer:
         # Run for up to 300 generations.
         self.logger.debug("Starting run...\n")
         winner = self.p.run(self._eval, self.t)
+        self.eval_server.close()
+        checkpointer.close()
+        self.journal.close()
 
         # Display the winning genome.
         # print('\nBest genome:\n{!s}'.format(winner))
@@ -70,12 +102,84 @@ class Trainer:
         """
         Wrapper function for EvaluationServer evaluate_generation().
         """
+        # drop journal records of older generations
+        self.journal.rotate(self.p.generation)
+
+        # redraw the behavior screen's probe states when due
+        self.screen.refresh(self.p.generation)
+
+        # race genomes over successive seeds; without a budget, every genome plays one seed
+        n_seeds = self.eval_server.N_SEEDS
+        seeds = [self.eval_server.eval_seed(self.p.generation + k) for k in range(n_seeds)]
+        for round_id, seed, entrants in self.racing.race(genomes, seeds):
+            self.eval_server.race_seed = seed
+            # only the first round is journaled; a crashed race resumes from there
+            if round_id == 0:
+                entrants = self.journal.apply(entrants, self.p.generation)
+            self.eval_server.journal = self.journal if round_id == 0 else None
+
+            # assign cached fitness to unchanged genomes
+            entrants = self.fitness_cache.apply(entrants, seed)
+            # share fitness among genomes ranking the probe states alike
+            entrants = self.screen.apply(entrants, seed, config)
+            self.eval_server.seeded = set()
+            self._eval_round(entrants, config)
+            self._check_seeded(entrants)
+            self.screen.update(entrants)
+            self.fitness_cache.update(entrants)
+        self.eval_server.race_seed = None
+        self.eval_server.journal = self.journal
+        if self.racing.budget is not None:
+            self.logger.info(self.racing.summary())
+
+        # log server performance
+        perf_summary = self.eval_server.metrics.report(self.p.generation)
+        if perf_summary:
+            self.logger.info(perf_summary)
+        self.logger.info(self.eval_server.net_cache_summary())
+
+        # persist evaluated fitness
+        self.fitness_cache.save()
+        self.logger.info(self.fitness_cache.summary())
+        self.screen.corpus.save()
+        self.logger.info(self.screen.summary())
+
+    def _check_seeded(self, genomes) -> None:
+        """
+        Fails a race whose emulator clients play every seed alike: clients that do not request their
+        evaluation seed (ADD_RNG in eval_battlefactory.lua) replay the same evaluation each round.
+        """
+        if self.racing.budget is not None and genomes and not self.eval_server.seeded:
+            raise RacingException(f"No client requested its evaluation seed among {len(genomes)} genomes; "
+                                  f"racing needs clients that randomize by seed (ADD_RNG = true)")
+
+    def _eval_round(self, genomes, config):
+        """
+        Evaluates genomes on the server's current seed, longest expected evaluations first.
+        """
+        if not genomes:
+            return
+        species_of = self.p.species.genome_to_species.get
+        genomes = self.scheduler.order(genomes, self.p.reproduction.ancestors, species_of)
+
+        start = time.perf_counter()
         success = False
         while not success:
             success = self.eval_server.eval_genomes(genomes, config, self.p.generation)
+        wall_s = time.perf_counter() - start
+        self.journal.sync()
+
+        # learn evaluation durations
+        durations, self.eval_server.durations = self.eval_server.durations, {}
+        self.scheduler.update(genomes, durations, species_of)
+        self.scheduler.save()
+        self.logger.info(self.scheduler.summary(durations, wall_s, self.eval_server.emulator_slots()))
 
     @classmethod
     def get_last_ckpt(cls) -> int:
+        """
+        Finds the last legacy neat.Checkpointer checkpoint by listing the checkpoint directory.
+        """
         highest_idx = -1
         for f in os.listdir("./checkpoints/"):
             split = f.split("neat-ckpt-")
@@ -108,16 +212,24 @@ class Trainer:
 if __name__ == "__main__":
     # TODO parse env vars
     game_mode = "battle_factory"
+    server_mode = "pool"  # pool, asyncio, process, coordinator (remote worker agents), or threaded as a fallback
+    genome_type = ArrayGenome  # ArrayGenome or neat.DefaultGenome
+    species_set_type = VectorizedSpeciesSet  # VectorizedSpeciesSet or neat.DefaultSpeciesSet
 
     # load configuration for game mode
     config_path = os.path.join(os.curdir, f'src/neat_{game_mode.replace("_","")}.cfg')
-    _config = neat.Config(
-        neat.DefaultGenome, neat.DefaultReproduction,
-        neat.DefaultSpeciesSet, neat.DefaultStagnation,
-        config_path
-    )
+    _config = load_config(config_path, species_set_type, genome_type)
 
     # init trainer & run
-    _eval_server = EvaluationServer(game_mode=game_mode)
+    if server_mode == "pool":
+        _eval_server = PooledEvaluationServer(game_mode=game_mode)
+    elif server_mode == "asyncio":
+        _eval_server = AsyncEvaluationServer(game_mode=game_mode)
+    elif server_mode == "process":
+        _eval_server = ProcessEvaluationServer(game_mode=game_mode)
+    elif server_mode == "coordinator":
+        _eval_server = CoordinatorServer(game_mode=game_mode)
+    else:
+        _eval_server = EvaluationServer(game_mode=game_mode)
     trainer = Trainer(_config, _eval_server)
     trainer.run()
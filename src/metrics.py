@@ -0,0 +1,227 @@
+import json
+import math
+import threading
+import time
+
+
+class Histogram:
+    """
+    Log-scale latency histogram with BUCKETS_PER_OCTAVE buckets per doubling above MIN_SECONDS.
+    Percentiles are reported as bucket upper bounds (within ~19% of the true value).
+    """
+    MIN_SECONDS = 1e-6
+    BUCKETS_PER_OCTAVE = 4
+    N_BUCKETS = 112  # up to ~4.5 minutes
+
+    def __init__(self):
+        self.counts = [0] * self.N_BUCKETS
+        self.count = 0
+        self.total = 0.0  # seconds
+        self.max = 0.0  # seconds
+
+    def record(self, seconds: float) -> None:
+        idx = int(math.log2(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_OCTAVE) if seconds > self.MIN_SECONDS else 0
+        self.counts[min(idx, self.N_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """
+        :returns upper bound (seconds) of the bucket holding the q-th percentile
+        """
+        rank = q / 100 * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self.max, self.MIN_SECONDS * 2 ** ((idx + 1) / self.BUCKETS_PER_OCTAVE))
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class GenomeCounters:
+    """
+    Per-genome evaluation counters.
+    """
+    __slots__ = ("genome", "turns", "seeds", "bytes_in", "bytes_out", "idle", "start")
+
+    def __init__(self, genome: int):
+        self.genome = genome
+        self.turns = 0  # game states forward-fed
+        self.seeds = 0  # evaluation seed requests
+        self.bytes_in = 0  # client message bytes received
+        self.bytes_out = 0  # reply bytes sent
+        self.idle = 0.0  # seconds waiting for the emulator
+        self.start = time.perf_counter()
+
+    def count(self, msg: bytes, reply, idle: float, turn: bool) -> None:
+        self.bytes_in += len(msg)
+        if reply:
+            self.bytes_out += len(reply)
+        self.idle += idle
+        self.turns += turn
+
+    def elapsed(self) -> float:
+        """
+        :returns seconds since the evaluation started
+        """
+        return time.perf_counter() - self.start
+
+    def summary(self) -> dict:
+        return {
+            "genome": self.genome, "turns": self.turns, "seeds": self.seeds, "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "idle_s": self.idle, "eval_s": self.elapsed(),
+        }
+
+
+class ClientMetrics:
+    """
+    Stage latency histograms and finished genome counters of one client thread (or event loop).
+    Only its owner thread records into it, so recording takes no locks.
+    """
+    def __init__(self):
+        self.stages = {}  # stage name -> Histogram
+        self.genomes = []  # per-genome counter summaries
+        self.client_stats = {}  # client-reported counter name -> sum over genomes
+
+    now = staticmethod(time.perf_counter)
+
+    def stage(self, name: str, start: float) -> float:
+        """
+        Records the time since start for a stage.
+        :returns the current time, to start the next stage
+        """
+        now = time.perf_counter()
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = Histogram()
+        hist.record(now - start)
+        return now
+
+    def add_genome(self, counters: GenomeCounters) -> None:
+        self.genomes.append(counters.summary())
+
+    def add_client_stats(self, stats: dict) -> None:
+        for name, value in stats.items():
+            self.client_stats[name] = self.client_stats.get(name, 0) + value
+
+    def add_remote_genome(self, summary: dict) -> None:
+        """
+        Records the counter summary of a genome evaluated by a remote worker.
+        """
+        self.genomes.append(summary)
+
+
+class NullMetrics:
+    """
+    Disabled ClientMetrics; every call is a no-op.
+    """
+    @staticmethod
+    def now() -> float:
+        return 0.0
+
+    @staticmethod
+    def stage(name: str, start: float) -> float:
+        return 0.0
+
+    @staticmethod
+    def add_genome(counters: GenomeCounters) -> None:
+        return
+
+    @staticmethod
+    def add_client_stats(stats: dict) -> None:
+        return
+
+    @staticmethod
+    def add_remote_genome(summary: dict) -> None:
+        return
+
+
+class Instrumentation:
+    """
+    Per-generation server performance instrumentation.
+    Each client thread records into its own ClientMetrics; at generation end report() merges them
+    into a summary block and appends a JSON line to the metrics file.
+    """
+    NULL = NullMetrics()
+
+    def __init__(self, enabled: bool, path: str = "./logs/perf.jsonl"):
+        self.enabled = enabled
+        self.path = path
+        self.local = threading.local()  # per-thread ClientMetrics
+        self.clients = []  # all ClientMetrics of this generation
+        self.lock = threading.Lock()  # guards client registration only
+
+    def client(self):
+        """
+        :returns the calling thread's ClientMetrics, or a no-op NullMetrics if disabled
+        """
+        if not self.enabled:
+            return self.NULL
+        metrics = getattr(self.local, "metrics", None)
+        if metrics is None:
+            metrics = self.local.metrics = ClientMetrics()
+            with self.lock:
+                self.clients.append(metrics)
+        return metrics
+
+    def report(self, gen_id: int):
+        """
+        Merges and resets the generation's client metrics, and appends them to the metrics file.
+        :returns summary text block, or None if nothing was recorded
+        """
+        with self.lock:
+            clients, self.clients = self.clients, []
+            self.local = threading.local()
+        if not clients:
+            return None
+
+        stages = {}
+        genomes = []
+        client_stats = {}
+        for metrics in clients:
+            for name, hist in metrics.stages.items():
+                stages.setdefault(name, Histogram()).merge(hist)
+            genomes.extend(metrics.genomes)
+            for name, value in metrics.client_stats.items():
+                client_stats[name] = client_stats.get(name, 0) + value
+        totals = {k: sum(g[k] for g in genomes) for k in ("turns", "bytes_in", "bytes_out", "idle_s", "eval_s")}
+        record = {
+            "generation": gen_id, "time": time.time(), "genomes": len(genomes), "totals": totals,
+            "stages": {name: hist.summary() for name, hist in stages.items()}, "per_genome": genomes,
+            "client": client_stats,
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+        lines = [f"Server performance (generation {gen_id}):",
+                 "   stage        count   mean ms    p50 ms    p95 ms    p99 ms   total s"]
+        for name, hist in stages.items():
+            s = hist.summary()
+            lines.append(f"   {name: <10} {s['count']: >7} {s['mean_ms']: >9.3f} {s['p50_ms']: >9.3f} "
+                         f"{s['p95_ms']: >9.3f} {s['p99_ms']: >9.3f} {s['total_s']: >9.2f}")
+        lines.append(f"   genomes={len(genomes)}, turns={totals['turns']}, bytes in/out={totals['bytes_in']}/"
+                     f"{totals['bytes_out']}, emulator idle={totals['idle_s']:.1f}s of {totals['eval_s']:.1f}s")
+        if client_stats:
+            lines.append("   client: " + ", ".join(f"{k}={v:g} ({v / max(len(genomes), 1):.1f}/genome)"
+                                             for k, v in client_stats.items()))
+        return "\n".join(lines)
@@ -0,0 +1,234 @@
+"""
+Headless stand-in for a BizHawk client running eval_battlefactory.lua.
+Speaks the same socket protocol (READY handshake, SEED request, LOG chatter, BF_STATE or BF_BIN
+input states and FITNESS completion) over synthetic battles, without an emulator or ROM.
+Usage: python src/mock_client.py (--port PORT | --shm NAME) [--turns N] [--think-time S] [--packed]
+                                  [--buffer-logs] [--variable-turns]
+"""
+import argparse
+import json
+import random
+import socket
+import time
+import zlib
+from framing import FramedReader
+from protocol import PackedProtocol
+from shm_transport import SharedMemoryChannel
+
+BOOSTS = ("ATK", "DEF", "SPA", "SPD", "EVA", "SPEED")
+
+
+def random_pokemon(rng: random.Random, active: int = 0) -> dict:
+    """
+    Generates a random, internally consistent Battle Factory pokemon state.
+    """
+    max_hp = rng.randrange(100, 316)
+    return {
+        "ID": rng.randrange(1, 494), "HeldItem": rng.randrange(328), "Ability": rng.randrange(124),
+        "Active": active,
+        "Moves": {str(i): {"ID": rng.randrange(1, 468), "PP": rng.randrange(5, 41)} for i in range(1, 5)},
+        "Stats": dict(
+            {k: rng.randrange(40, 256) for k in ("ATK", "DEF", "SPEED", "SPA", "SPD")},
+            MaxHP=max_hp, HP=max_hp, Status=0, Confused=0, **{k + "_Boost": 6 for k in BOOSTS},
+        ),
+    }
+
+
+def random_state(rng: random.Random) -> bytes:
+    """
+    Generates a random Battle Factory input state message payload.
+    """
+    state = {
+        "State": rng.randrange(3),
+        "AllyParty": {str(i): random_pokemon(rng, rng.randrange(2)) for i in range(1, 7)},
+        "EnemyParty": {str(i): random_pokemon(rng, rng.randrange(2)) for i in range(1, 4)},
+    }
+    return json.dumps(state).encode()
+
+
+class MockBattle:
+    """
+    Synthetic battle producing one input state per turn: the active pokemon trade damage, spend PP
+    and shift stat boosts, and fainted pokemon are replaced by the next party member.
+    """
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.state = {
+            "State": 1,  # STATE_BATTLE
+            "AllyParty": {str(i): random_pokemon(rng, int(i == 1)) for i in range(1, 7)},
+            "EnemyParty": {str(i): random_pokemon(rng, int(i == 1)) for i in range(1, 4)},
+        }
+        self.fainted = 0  # enemy pokemon fainted
+
+    def next_turn(self, action: int) -> dict:
+        """
+        Advances the battle by one turn using the chosen action (1-4: moves, 5-7: switches).
+        :returns the input state for the next turn
+        """
+        rng = self.rng
+        ally = self._active("AllyParty", 3)
+        enemy = self._active("EnemyParty", 3)
+        if 1 <= action <= 4 and ally["Moves"][str(action)]["PP"] > 0:
+            ally["Moves"][str(action)]["PP"] -= 1
+        for pokemon in (ally, enemy):
+            stats = pokemon["Stats"]
+            stats["HP"] = max(0, stats["HP"] - rng.randrange(stats["MaxHP"] // 3))
+            boost = rng.choice(BOOSTS) + "_Boost"
+            stats[boost] = min(12, max(0, stats[boost] + rng.choice((-1, 0, 1))))
+            if rng.random() < 0.05:
+                stats["Status"] = rng.randrange(1, 256)
+            stats["Confused"] = int(rng.random() < 0.1)
+        if enemy["Stats"]["HP"] == 0:
+            self.fainted += 1
+        return self.state
+
+    def _active(self, party: str, size: int) -> dict:
+        """
+        :returns the active pokemon of a party, sending in the next one if it fainted
+        """
+        members = [self.state[party][str(i)] for i in range(1, size + 1)]
+        active = next((p for p in members if p["Active"]), members[0])
+        if active["Stats"]["HP"] == 0:
+            alive = [p for p in members if p["Stats"]["HP"] > 0] or members
+            active["Active"] = 0
+            active = alive[0]
+            active["Active"] = 1
+        return active
+
+
+class MockClient:
+    """
+    Mock Battle Factory client evaluating genomes until the server sends FINISHED.
+    Records the server round-trip latency of every turn.
+    """
+    TURNS = 30  # turns per evaluated genome
+    THINK_TIME = 0.0  # seconds of simulated emulation between turns
+    LOGS_PER_TURN = 2  # LOG messages sent per turn
+
+    def __init__(self, host: str, port: int, turns: int = TURNS, think_time: float = THINK_TIME,
+                 packed: bool = False, logs_per_turn: int = LOGS_PER_TURN, seed: int = None,
+                 buffer_logs: bool = False, variable_turns: bool = False, shm: str = None):
+        self.host = host
+        self.port = port
+        self.turns = turns
+        self.think_time = think_time
+        self.packed = packed
+        self.logs_per_turn = logs_per_turn
+        self.buffer_logs = buffer_logs  # flush LOG lines with the FITNESS message, as BUFFER_LOGS does
+        self.log_buffer = []
+        self.variable_turns = variable_turns  # battle length depends on the genome, up to 2x turns
+        self.rng = random.Random(seed)
+        self.shm = shm  # shared-memory channel name, as passed to BizHawk with --mmf
+        self.sock = None
+        self.reader = FramedReader()
+        self.genomes = 0  # genomes evaluated
+        self.latencies = []  # per-turn server round-trip latency (seconds)
+
+    def run(self) -> dict:
+        """
+        Connects to the server and evaluates genomes until finished.
+        :returns client statistics
+        """
+        if self.shm:
+            self.sock = SharedMemoryChannel(self.shm, create=False)
+        else:
+            self.sock = socket.create_connection((self.host, self.port))
+            # LOG chatter precedes each state; without TCP_NODELAY Nagle's algorithm holds the state
+            # until the server's delayed ACK, adding ~40ms to every measured turn
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            ready = f"READY:{PackedProtocol.READY_TAG}" if self.packed else "READY"
+            while True:
+                self._send(ready)
+                reply = self._recv()
+                if reply == b"FINISHED":
+                    break
+                if reply in (b"READY", b"READY:" + PackedProtocol.READY_TAG.encode()):
+                    self._play(packed=reply != b"READY")
+        finally:
+            self.sock.close(unlink=False) if self.shm else self.sock.close()
+        return {"genomes": self.genomes, "turns": len(self.latencies), "latencies": self.latencies}
+
+    def _play(self, packed: bool) -> None:
+        """
+        Plays one synthetic battle for the current genome and reports its fitness.
+        """
+        self._log("Beginning game loop...")
+        self._send("SEED")
+        seed = int(self._recv())
+        self._log(f"Randomizing seed: waiting {seed} frames...")
+
+        # with variable turns, the opening depends only on the seed and the length on the genome's first reply
+        battle = MockBattle(random.Random(seed) if self.variable_turns else self.rng)
+        state = battle.state
+        turns = self.turns
+        turn = 0
+        while turn < turns:
+            turn += 1
+            if self.think_time:
+                time.sleep(self.think_time)
+            for _ in range(self.logs_per_turn):
+                self._log(f"Battle turn #: {turn}")
+            msg = b"BF_BIN" + PackedProtocol.encode_state(state) if packed else \
+                b"BF_STATE" + json.dumps(state).encode()
+            start = time.perf_counter()
+            self._send(msg)
+            reply = self._recv()
+            self.latencies.append(time.perf_counter() - start)
+            if self.variable_turns and turn == 1:
+                turns = max(1, round(2 * self.turns * zlib.crc32(reply) / 2 ** 32))
+            state = battle.next_turn(self._best_action(reply, packed))
+
+        self._log("Finished game loop.")
+        fitness = f"FITNESS:{battle.fainted * 100.0 + self.rng.random()}"
+        if self.log_buffer:
+            fitness += "\n" + "\n".join(self.log_buffer)
+            self.log_buffer = []
+        self._send(fitness)
+        self.genomes += 1
+
+    @staticmethod
+    def _best_action(reply: bytes, packed: bool) -> int:
+        """
+        :returns the best ranked action (1-7) of a server reply
+        """
+        if packed:
+            return int(reply[:2], 16)
+        outputs = [float(x) for x in reply.strip(b"{} ").split(b",")][:7]
+        return outputs.index(max(outputs)) + 1
+
+    def _log(self, msg: str) -> None:
+        if self.buffer_logs:
+            self.log_buffer.append(msg)
+        else:
+            self._send("LOG:" + msg)
+
+    def _send(self, msg) -> None:
+        msg = msg.encode() if isinstance(msg, str) else msg
+        if self.shm:
+            self.sock.send(msg)
+        else:
+            self.sock.sendall(FramedReader.frame(msg))
+
+    def _recv(self) -> bytes:
+        msg = self.sock.recv() if self.shm else self.reader.recv_msg(self.sock)
+        if msg is None:
+            raise ConnectionError("Server closed the connection.")
+        return bytes(msg)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless mock Battle Factory client.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--shm", help="shared-memory channel name, instead of the socket server")
+    parser.add_argument("--turns", type=int, default=MockClient.TURNS)
+    parser.add_argument("--think-time", type=float, default=MockClient.THINK_TIME)
+    parser.add_argument("--packed", action="store_true", help="negotiate the packed wire protocol")
+    parser.add_argument("--buffer-logs", action="store_true", help="flush LOG lines with the FITNESS message")
+    parser.add_argument("--variable-turns", action="store_true", help="vary battle length per genome")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    stats = MockClient(args.host, args.port, args.turns, args.think_time, args.packed, seed=args.seed,
+                       buffer_logs=args.buffer_logs, variable_turns=args.variable_turns, shm=args.shm).run()
+    print(json.dumps(stats))
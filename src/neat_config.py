@@ -0,0 +1,30 @@
+"""
+Loads the NEAT configs with a chosen genome and species set type.
+neat.Config reads each type's section by its class name. The config files keep neat's standard section
+names, so they also load with neat's own types (e.g. neat.Checkpointer or external scripts); a replacement
+type is read from its standard section.
+"""
+import os
+import tempfile
+import neat
+
+
+def load_config(path: str, species_set_type=neat.DefaultSpeciesSet, genome_type=neat.DefaultGenome) -> neat.Config:
+    """
+    :param path: NEAT config file with standard section names
+    :param species_set_type: DefaultSpeciesSet or a drop-in replacement configured by [DefaultSpeciesSet]
+    :param genome_type: DefaultGenome or a drop-in replacement configured by [DefaultGenome]
+    :returns the loaded config
+    """
+    with open(path) as f:
+        text = f.read()
+    for standard, chosen in ((neat.DefaultGenome, genome_type), (neat.DefaultSpeciesSet, species_set_type)):
+        if chosen is not standard and f"[{chosen.__name__}]" not in text:
+            text = text.replace(f"[{standard.__name__}]", f"[{chosen.__name__}]")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".cfg", delete=False) as f:
+        f.write(text)
+    try:
+        return neat.Config(genome_type, neat.DefaultReproduction, species_set_type, neat.DefaultStagnation, f.name)
+    finally:
+        os.remove(f.name)
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+import neat
+from fitness_cache import FitnessCache
+
+
+class NetworkCache:
+    """
+    LRU cache of compiled genome networks keyed by the genome's content hash, so elites and
+    structural clones skip compilation across turns and generations. Networks with their own
+    buffers are handed out as clones, so concurrent clients can share a compiled genome. Genomes
+    the compiler rejects fall back to neat.nn.FeedForwardNetwork if fallback is set. Thread-safe.
+    """
+    MAX_ENTRIES = 1000  # max compiled networks held
+
+    def __init__(self, compiler, fallback=neat.nn.FeedForwardNetwork.create, max_entries: int = MAX_ENTRIES):
+        self.compiler = compiler  # (genome, config) -> network
+        self.fallback = fallback  # (genome, config) -> network for genomes the compiler rejects, or None
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # genome digest -> compiled network, least recent first
+        self.lock = threading.Lock()  # acquired from client threads
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def acquire(self, genome, config):
+        """
+        :returns the genome's network, compiled once per distinct genome
+        """
+        digest = FitnessCache.genome_digest(genome)
+        with self.lock:
+            net = self.entries.get(digest)
+            if net is not None:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+        if net is None:
+            try:
+                net = self.compiler(genome, config)
+            except ValueError:
+                if self.fallback is None:
+                    raise
+                with self.lock:
+                    self.fallbacks += 1
+                return self.fallback(genome, config)
+            with self.lock:
+                self.misses += 1
+                self.entries[digest] = net
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return net.clone() if hasattr(net, "clone") else net
+
+    def stats(self) -> tuple:
+        """
+        Takes and resets this generation's cache statistics.
+        :returns (hits, misses, fallbacks, entries)
+        """
+        with self.lock:
+            stats = (self.hits, self.misses, self.fallbacks, len(self.entries))
+            self.hits, self.misses, self.fallbacks = 0, 0, 0
+        return stats
+
+    def summary(self) -> str:
+        """
+        Summarizes and resets this generation's cache statistics.
+        """
+        return self.format_stats(*self.stats())
+
+    @staticmethod
+    def format_stats(hits: int, misses: int, fallbacks: int, entries: int) -> str:
+        total = hits + misses + fallbacks
+        rate = hits / total if total else 0.0
+        return (f"Network cache: hits={hits}, misses={misses}, fallbacks={fallbacks}, "
+                f"hit rate={rate:.1%}, entries={entries}")
@@ -0,0 +1,274 @@
+import asyncio
+import sys
+import threading
+from async_server import AsyncEvaluationServer
+from eval_server import ConnectionClosedException
+from metrics import GenomeCounters
+
+
+class PooledEvaluationServer(AsyncEvaluationServer):
+    """
+    Persistent warm emulator pool reused across generations.
+    The socket server and its event loop live on a background thread with a stable port, so
+    connected emulator clients stay warm between generations and simply receive the next
+    generation's genomes after READY. Exited clients are replaced by a periodic health check,
+    and genomes lost with a client are requeued.
+    With TAIL_CLIENTS, extra clients are spawned once the queue is down to one genome per client,
+    so the generation's last genomes do not wait behind busy clients.
+    """
+    HEALTH_INTERVAL = 5.0  # seconds between client process health checks
+    MAX_REQUEUES = 2  # max times a genome is requeued after losing its client
+    CLOSE_TIMEOUT = 30.0  # seconds to wait for idle clients to finish on close
+    TAIL_CLIENTS = 0  # extra clients spawned for the generation's tail, finished after it (0 disables)
+    TAIL_POLL = 0.5  # seconds between queue length checks for the tail split
+
+    def __init__(self, game_mode: str):
+        super().__init__(game_mode)
+        self.loop = None  # pool event loop
+        self.loop_thread = None  # thread running the pool event loop
+        self.server = None  # persistent socket server
+        self.health_task = None  # client health check task
+        self.requeues = None  # genome ID -> number of requeues this generation
+
+    def eval_genomes(self, genomes, config, gen_id) -> bool:
+        """
+        Evaluates a population of genomes on the warm emulator pool.
+        """
+        # set generation vars
+        self.logger = self._init_logger(gen_id)  # init the logger for this generation
+        self.config = config
+        self.genomes = genomes
+        self.gen_id = gen_id
+
+        # initial gen logs
+        self.logger.info(f"****** Evaluating Generation {gen_id} ******")
+        self.logger.info(f"completed={len(self.evaluated_genomes)}, total={len(genomes)}")
+
+        # start pool on first use
+        if self.loop is None:
+            self._start_pool()
+
+        # evaluate genomes
+        future = asyncio.run_coroutine_threadsafe(self._eval_generation(), self.loop)
+        try:
+            future.result()
+            self._log_inference_stats()
+        except KeyboardInterrupt:  # TODO move outside of eval_server
+            self.logger.error("KeyboardInterrupt")
+            self.kill_clients()
+            sys.exit()
+
+        # exit program if an evaluation failure occurred
+        if self.eval_failure:
+            self.logger.error("An evaluation exception occurred!")
+            self.close()
+            sys.exit()
+
+        # exit program if debugging
+        if self.DEBUG_ID >= 0:
+            self.logger.info("Finished debugging genome.")
+            self.close()
+            sys.exit()
+
+        # successful generation evaluation
+        self.evaluated_genomes = set()  # reset evaluated genomes
+        return True
+
+    def close(self) -> None:
+        """
+        Finishes idle clients, closes the socket server and stops the pool.
+        """
+        if self.loop is None:
+            return
+        self.logger.debug("Closing emulator pool...")
+        future = asyncio.run_coroutine_threadsafe(self._close_pool(), self.loop)
+        try:
+            future.result(self.CLOSE_TIMEOUT)
+        except Exception as e:
+            self.logger.error(f"Emulator pool did not close cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.kill_clients()
+        self.loop = None
+
+    def _start_pool(self) -> None:
+        """
+        Starts the pool event loop thread, socket server and emulator clients.
+        """
+        self.client_ps = []
+        self.handlers = []
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_server(), self.loop).result()
+
+    async def _start_server(self) -> None:
+        """
+        Binds the persistent socket server and spawns all emulator clients concurrently.
+        """
+        self.queue = asyncio.Queue()
+        self.logger.debug("Initializing socket server...")
+        self.server = await asyncio.start_server(self._accept_client, self.HOST, self.PORT)
+        self.PORT = self.server.sockets[0].getsockname()[1]  # stable for the lifetime of the pool
+        self.logger.debug(f'Socket server: listening on port {self.PORT}')
+
+        # spawn client processes; connections are accepted concurrently
+        for _ in range(self.N_CLIENTS):
+            self.spawn_client()
+        self.health_task = asyncio.ensure_future(self._health_check())
+
+    async def _eval_generation(self) -> None:
+        """
+        Queues the generation's genomes and waits until all are evaluated or evaluation fails.
+        """
+        self.failure = asyncio.Event()
+        self.requeues = {}
+        for idx, (_id, genome) in enumerate(self.genomes):
+            if _id not in self.evaluated_genomes and not (0 <= self.DEBUG_ID != _id):
+                self.queue.put_nowait((idx, _id, genome))
+
+        # wait for all genomes to finish, or for an evaluation failure
+        tail = asyncio.ensure_future(self._split_tail()) if self.TAIL_CLIENTS > 0 else None
+        finished = asyncio.ensure_future(self.queue.join())
+        failed = asyncio.ensure_future(self.failure.wait())
+        await asyncio.wait({finished, failed}, return_when=asyncio.FIRST_COMPLETED)
+        finished.cancel()
+        failed.cancel()
+        if tail is not None:
+            tail.cancel()
+            self._trim_pool()
+
+    async def _split_tail(self) -> None:
+        """
+        Spawns TAIL_CLIENTS extra clients once at most one queued genome per client remains.
+        """
+        while self.queue.qsize() > self.N_CLIENTS:
+            await asyncio.sleep(self.TAIL_POLL)
+        self.logger.debug(f"Splitting tail of {self.queue.qsize()} genomes across {self.TAIL_CLIENTS} extra clients...")
+        for _ in range(self.TAIL_CLIENTS):
+            self.spawn_client()
+
+    def _trim_pool(self) -> None:
+        """
+        Finishes idle clients beyond N_CLIENTS, such as the tail's extra clients.
+        """
+        for _ in range(len(self.client_ps) - self.N_CLIENTS):
+            self.queue.put_nowait(None)  # finish sentinel, taken by the next idle client
+
+    async def _close_pool(self) -> None:
+        """
+        Sends the finish state to all idle clients and closes the socket server.
+        """
+        self.health_task.cancel()
+        for _ in self.handlers:
+            self.queue.put_nowait(None)  # finish sentinel per client
+        await asyncio.wait_for(asyncio.gather(*self.handlers, return_exceptions=True), self.CLOSE_TIMEOUT)
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _health_check(self) -> None:
+        """
+        Periodically replaces emulator client processes that have exited.
+        """
+        while True:
+            await asyncio.sleep(self.HEALTH_INTERVAL)
+            for ps in list(self.client_ps):
+                if ps.poll() is not None:
+                    self.client_ps.remove(ps)
+                    if len(self.client_ps) < self.N_CLIENTS:
+                        self.logger.warning(f"Emulator client {ps.pid} exited ({ps.returncode}), replacing it...")
+                        self.spawn_client()
+
+    async def _accept_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Registers and handles a newly connected client for the lifetime of its connection.
+        """
+        self.logger.debug(f"Connected by {writer.get_extra_info('peername')}.")
+        task = asyncio.current_task()
+        self.handlers.append(task)
+        try:
+            await self._handle_stream(reader, writer)
+        except Exception as e:
+            self.logger.warning(f"Client connection lost: {e!r}")
+        finally:
+            self.handlers.remove(task)
+            writer.close()
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles the client process in evaluating queued genomes across generations.
+        """
+        while True:
+            # wait for client to be ready
+            ready = None
+            while not ready:
+                ready = self._ready_reply(await self._read_msg(reader))
+
+            # wait for next genome, possibly from a later generation
+            item = await self._next_item()
+            if item is None:
+                self.queue.task_done()  # finish sentinel
+                break
+            if writer.is_closing() or reader.at_eof():
+                # client exited while idle; hand genome to another client
+                self.queue.put_nowait(item)
+                self.queue.task_done()
+                raise ConnectionClosedException
+
+            idx, _id, genome = item
+            try:
+                # create NN from genome
+                net = self._create_net(genome)
+                self.logger.info(
+                    f"[Gen #: {self.gen_id}, Index #: {idx}/{len(self.genomes) - 1}, Genome #: {_id}]")
+                writer.write(ready)
+
+                # begin genome evaluation
+                self.logger.debug("Evaluating genome...")
+                fitness = await self._eval_stream(reader, writer, net, GenomeCounters(_id))
+            except (ConnectionClosedException, ConnectionError, asyncio.TimeoutError):
+                self._requeue(item)
+                raise
+            except Exception as e:
+                self._fail(item, e)
+                raise
+            genome.fitness = fitness
+            self._record_fitness(_id, genome)  # successful evaluation
+            self.logger.info(f"Genome #{_id} fitness: {genome.fitness}")
+            self.queue.task_done()
+
+        # send finish state to client
+        writer.write(self.FINISH_STATE)
+        await writer.drain()
+
+    async def _next_item(self):
+        """
+        Waits for the next queued genome.
+        :returns (index, genome ID, genome), or None to finish the client
+        """
+        return await self.queue.get()
+
+    def _fail(self, item, e: Exception) -> None:
+        """
+        Fails the generation on a genome whose evaluation raised other than by losing its client.
+        """
+        _, _id, _ = item
+        self.logger.error(f"Genome #{_id} evaluation failed: {e!r}")
+        self.eval_failure = True
+        self.failure.set()
+        self.queue.task_done()
+
+    def _requeue(self, item) -> None:
+        """
+        Requeues a genome whose client was lost mid-evaluation, failing the generation after MAX_REQUEUES.
+        """
+        _, _id, _ = item
+        self.requeues[_id] = self.requeues.get(_id, 0) + 1
+        if self.requeues[_id] > self.MAX_REQUEUES:
+            self.logger.error(f"Genome #{_id} lost its client {self.requeues[_id]} times.")
+            self.eval_failure = True
+            self.failure.set()
+        else:
+            self.logger.warning(f"Requeueing genome #{_id} after losing its client...")
+            self.queue.put_nowait(item)
+        self.queue.task_done()
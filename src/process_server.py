@@ -0,0 +1,215 @@
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+from encoder import StateEncoder
+from eval_server import EvaluationServer
+from inference import FlatNetwork
+from net_cache import NetworkCache
+from protocol import PackedProtocol
+
+
+def _worker_main(conn, config) -> None:
+    """
+    Activation worker process loop.
+    Holds the networks of genomes pinned to this worker, and decodes, encodes and forward-feeds
+    raw game state bytes for them. Only the network outputs are sent back, one reply per
+    activation or STATS request; LOAD and UNLOAD are unanswered, so a failed LOAD is reported by
+    the network's next activation.
+    """
+    nets = {}  # token -> network, or the exception raised building it
+    net_cache = NetworkCache(FlatNetwork.create)  # compiled networks of genomes seen by this worker
+    encoder = StateEncoder()
+    while True:
+        op, token, payload = conn.recv()
+        if op == ActivationWorkerPool.OP_LOAD:
+            try:
+                nets[token] = net_cache.acquire(payload, config)
+            except Exception as e:
+                nets[token] = e
+            continue
+        elif op == ActivationWorkerPool.OP_UNLOAD:
+            nets.pop(token, None)
+            continue
+        elif op == ActivationWorkerPool.OP_STATS:
+            conn.send((True, net_cache.stats()))
+            continue
+        elif op == ActivationWorkerPool.OP_CLOSE:
+            return
+        try:
+            net = nets[token]
+            if isinstance(net, Exception):
+                raise net
+            if op == ActivationWorkerPool.OP_STATE:
+                input_layer = encoder.vectorize_state(json.loads(payload))
+            else:  # OP_PACKED
+                input_layer = encoder.vectorize_packed(*PackedProtocol.decode_state(payload))
+            conn.send((True, net.activate(input_layer)))
+        except Exception as e:
+            conn.send((False, repr(e)))
+
+
+class ActivationWorkerPool:
+    """
+    Pool of activation worker processes that run decode, encode and forward-feed off the GIL.
+    Each genome's network is built once inside one worker and pinned there for its evaluation.
+    """
+    # worker ops
+    OP_LOAD = 0
+    OP_UNLOAD = 1
+    OP_STATE = 2
+    OP_PACKED = 3
+    OP_CLOSE = 4
+    OP_STATS = 5
+
+    def __init__(self, config, n_workers: int = None):
+        self.n_workers = n_workers or os.cpu_count()
+        self.conns = []  # parent pipe ends, per worker
+        self.locks = []  # serializes request/response pairs on each pipe
+        self.processes = []
+        self.tokens = itertools.count()
+        for _ in range(self.n_workers):
+            parent, child = multiprocessing.Pipe()
+            ps = multiprocessing.Process(target=_worker_main, args=(child, config), daemon=True)
+            ps.start()
+            self.conns.append(parent)
+            self.locks.append(threading.Lock())
+            self.processes.append(ps)
+
+    def load(self, genome):
+        """
+        Builds the genome's network in the next worker, round-robin.
+        :returns network handle for forward feeds
+        """
+        token = next(self.tokens)
+        worker = token % self.n_workers
+        with self.locks[worker]:
+            self.conns[worker].send((self.OP_LOAD, token, genome))
+        return WorkerNetwork(self, worker, token)
+
+    def activate(self, worker: int, token: int, op: int, payload: bytes) -> list:
+        """
+        Ships raw game state bytes to the pinned worker.
+        :returns network outputs
+        """
+        with self.locks[worker]:
+            self.conns[worker].send((op, token, payload))
+            ok, result = self.conns[worker].recv()
+        if not ok:
+            raise WorkerException(result)
+        return result
+
+    def unload(self, worker: int, token: int) -> None:
+        with self.locks[worker]:
+            self.conns[worker].send((self.OP_UNLOAD, token, None))
+
+    def cache_stats(self) -> tuple:
+        """
+        Takes and resets the NetworkCache statistics of every worker.
+        :returns (hits, misses, fallbacks, entries) summed over the workers
+        """
+        stats = []
+        for conn, lock in zip(self.conns, self.locks):
+            with lock:
+                conn.send((self.OP_STATS, None, None))
+                stats.append(conn.recv()[1])
+        return tuple(sum(column) for column in zip(*stats))
+
+    def close(self) -> None:
+        for conn, lock in zip(self.conns, self.locks):
+            with lock:
+                conn.send((self.OP_CLOSE, None, None))
+        for ps in self.processes:
+            ps.join()
+
+
+class WorkerNetwork:
+    """
+    Handle to a genome network pinned in an ActivationWorkerPool worker.
+    """
+    def __init__(self, pool: ActivationWorkerPool, worker: int, token: int):
+        self.pool = pool
+        self.worker = worker
+        self.token = token
+
+    def activate_state(self, state: bytes) -> list:
+        return self.pool.activate(self.worker, self.token, ActivationWorkerPool.OP_STATE, state)
+
+    def activate_packed(self, state: bytes) -> list:
+        return self.pool.activate(self.worker, self.token, ActivationWorkerPool.OP_PACKED, state)
+
+    def release(self) -> None:
+        self.pool.unload(self.worker, self.token)
+
+
+class ProcessEvaluationServer(EvaluationServer):
+    """
+    Threaded EvaluationServer that runs game state decoding, encoding and forward feeds in a
+    pool of worker processes. Socket handling is unchanged.
+    """
+    N_WORKERS = None  # activation worker processes (None: one per CPU core)
+
+    def __init__(self, game_mode: str):
+        super().__init__(game_mode)
+        self.workers = None  # activation worker pool
+
+    def eval_genomes(self, genomes, config, gen_id) -> bool:
+        """
+        Evaluates a population of genomes.
+        """
+        if self.workers is None:
+            self.workers = ActivationWorkerPool(config, self.N_WORKERS)
+        return super().eval_genomes(genomes, config, gen_id)
+
+    def close(self) -> None:
+        if self.workers is not None:
+            self.workers.close()
+            self.workers = None
+
+    def net_cache_summary(self) -> str:
+        """
+        Summarizes and resets the generation's network cache statistics, summed over the workers that
+        compile the evaluated networks and this server's own cache.
+        """
+        stats = self.net_cache.stats()
+        if self.workers is not None:
+            stats = tuple(a + b for a, b in zip(stats, self.workers.cache_stats()))
+        return NetworkCache.format_stats(*stats)
+
+    def _create_net(self, genome):
+        return self.workers.load(genome)
+
+    def _release_net(self, net) -> None:
+        net.release()
+
+    def _ff_game_state(self, state: bytes, net: WorkerNetwork) -> str:
+        """
+        Forward-feeds game state bytes through the genome's pinned worker network.
+        """
+        self.logger.debug("Evaluating game state...")
+        metrics = self.metrics.client()
+        t = metrics.now()
+        output_layer = net.activate_state(state)
+        t = metrics.stage("activate", t)
+        output_msg = self._format_game_state(output_layer)
+        metrics.stage("format", t)
+        return output_msg
+
+    def _ff_packed_state(self, state: bytes, net: WorkerNetwork) -> str:
+        """
+        Forward-feeds packed game state bytes through the genome's pinned worker network.
+        """
+        metrics = self.metrics.client()
+        t = metrics.now()
+        output_layer = net.activate_packed(state)
+        t = metrics.stage("activate", t)
+        output_msg = PackedProtocol.encode_reply(output_layer)
+        metrics.stage("format", t)
+        return output_msg
+
+
+class WorkerException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
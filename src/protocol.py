@@ -0,0 +1,119 @@
+import struct
+import numpy as np
+
+
+class PackedProtocol:
+    """
+    Fixed-layout binary wire protocol for Battle Factory input states and action replies.
+    Negotiated at the READY handshake; the JSON text protocol remains the default for debugging.
+
+    State message:  BF_BIN<hex payload>
+        header  <2sBBBB  magic b"BF", version, game state, ally count, enemy count
+        parties ally records then enemy records, each POKEMON_FORMAT (little-endian)
+    Reply message:  <hex payload>
+        one byte per action, holding the 1-based action indices ranked best first
+
+    Payloads are hex-armoured because BizHawk's comm.socketServer* functions pass messages
+    through .NET strings, which are not byte-clean for values above 0x7F.
+    """
+    VERSION = 1
+    MAGIC = b"BF"
+    READY_TAG = f"BIN{VERSION}"
+
+    # packed header
+    HEADER_FORMAT = "<2sBBBB"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    N_ALLIES = 6
+    N_ENEMIES = 3
+
+    # packed pokemon record fields, in wire order (path within the pokemon state, struct code)
+    POKEMON_FIELDS = (
+        (("ID",), "H"),
+        (("HeldItem",), "H"),
+        (("Ability",), "B"),
+        (("Active",), "B"),
+        (("Moves", "1", "ID"), "H"),
+        (("Moves", "2", "ID"), "H"),
+        (("Moves", "3", "ID"), "H"),
+        (("Moves", "4", "ID"), "H"),
+        (("Moves", "1", "PP"), "B"),
+        (("Moves", "2", "PP"), "B"),
+        (("Moves", "3", "PP"), "B"),
+        (("Moves", "4", "PP"), "B"),
+        (("Stats", "Status"), "B"),
+        (("Stats", "Confused"), "B"),
+        (("Stats", "HP"), "H"),
+        (("Stats", "MaxHP"), "H"),
+        (("Stats", "ATK"), "H"),
+        (("Stats", "DEF"), "H"),
+        (("Stats", "SPEED"), "H"),
+        (("Stats", "SPA"), "H"),
+        (("Stats", "SPD"), "H"),
+        (("Stats", "ATK_Boost"), "B"),
+        (("Stats", "DEF_Boost"), "B"),
+        (("Stats", "SPA_Boost"), "B"),
+        (("Stats", "SPD_Boost"), "B"),
+        (("Stats", "EVA_Boost"), "B"),
+        (("Stats", "SPEED_Boost"), "B"),
+    )
+    POKEMON_FORMAT = "<" + "".join(code for _, code in POKEMON_FIELDS)
+    POKEMON_SIZE = struct.calcsize(POKEMON_FORMAT)
+    POKEMON_DTYPE = np.dtype([(str(i), "<u" + ("2" if code == "H" else "1")) for i, (_, code) in enumerate(POKEMON_FIELDS)])
+
+    # party record rows, in wire order
+    PARTY_ROWS = tuple(("AllyParty", str(i)) for i in range(1, N_ALLIES + 1)) + \
+        tuple(("EnemyParty", str(i)) for i in range(1, N_ENEMIES + 1))
+    MESSAGE_SIZE = HEADER_SIZE + POKEMON_SIZE * len(PARTY_ROWS)
+
+    @classmethod
+    def decode_state(cls, payload: bytes) -> (int, np.ndarray):
+        """
+        Decodes a hex-armoured packed state message.
+        :returns (game state, party records as an int array of shape (rows, fields))
+        """
+        data = bytes.fromhex(payload.decode("ascii"))
+        if len(data) != cls.MESSAGE_SIZE:
+            raise ProtocolException(f"Expected {cls.MESSAGE_SIZE} bytes, received {len(data)}.")
+        magic, version, state, n_allies, n_enemies = struct.unpack_from(cls.HEADER_FORMAT, data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ProtocolException(f"Unsupported packed state: magic={magic}, version={version}.")
+        if (n_allies, n_enemies) != (cls.N_ALLIES, cls.N_ENEMIES):
+            raise ProtocolException(f"Unexpected party sizes: allies={n_allies}, enemies={n_enemies}.")
+
+        # view party records without copying, then widen to a uniform int array
+        records = np.frombuffer(data, dtype=cls.POKEMON_DTYPE, count=len(cls.PARTY_ROWS), offset=cls.HEADER_SIZE)
+        parties = np.empty((len(cls.PARTY_ROWS), len(cls.POKEMON_FIELDS)), dtype=np.int64)
+        for i, name in enumerate(cls.POKEMON_DTYPE.names):
+            parties[:, i] = records[name]
+        return state, parties
+
+    @classmethod
+    def encode_state(cls, state: dict) -> bytes:
+        """
+        Encodes an input state as a hex-armoured packed state message payload, as the Lua client does.
+        """
+        parts = [struct.pack(cls.HEADER_FORMAT, cls.MAGIC, cls.VERSION, state["State"], cls.N_ALLIES, cls.N_ENEMIES)]
+        for party, idx in cls.PARTY_ROWS:
+            pokemon = state[party][idx]
+            values = []
+            for path, _ in cls.POKEMON_FIELDS:
+                value = pokemon
+                for key in path:
+                    value = value[key]
+                values.append(value)
+            parts.append(struct.pack(cls.POKEMON_FORMAT, *values))
+        return b"".join(parts).hex().upper().encode("ascii")
+
+    @classmethod
+    def encode_reply(cls, outputs) -> str:
+        """
+        Encodes network outputs as hex-armoured action indices, ranked best first.
+        """
+        ranks = np.argsort(-np.asarray(outputs), kind="stable") + 1
+        return bytes(ranks.astype(np.uint8)).hex().upper()
+
+
+class ProtocolException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
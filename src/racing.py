@@ -0,0 +1,86 @@
+class SuccessiveHalving:
+    """
+    Multi-seed racing of a generation within a budget of genome evaluations.
+    Every genome plays the first seed; after each round only the best KEEP fraction of the round's
+    entrants (ranked by aggregate fitness over the seeds they played) advances to the next seed.
+    KEEP is derived from the budget, so the rounds use as much of it as the seeds allow. A genome's
+    final fitness is the aggregate (mean or min) over its seeds, so promising genomes get less noisy
+    fitness for a fraction of the cost of playing every seed.
+    """
+    AGGREGATE = "mean"  # mean or min fitness over a genome's seeds
+
+    def __init__(self, budget: int = None, aggregate: str = AGGREGATE):
+        self.budget = budget  # genome evaluations per generation, None for one seed per genome
+        self.aggregate = min if aggregate == "min" else (lambda samples: sum(samples) / len(samples))
+        self.samples = {}  # genome ID -> fitness per seed played this generation
+        self.sizes = []  # entrants per round of the last race
+        self.first = {}  # genome ID -> fitness of the first seed
+
+    def round_sizes(self, n: int, n_seeds: int) -> list:
+        """
+        Entrants per round: n * keep^k genomes in round k, with keep chosen so the rounds fit the budget.
+        :returns a list of at most n_seeds decreasing round sizes
+        """
+        budget = n if self.budget is None else max(self.budget, n)
+        if n == 0:
+            return []
+        if budget >= n * n_seeds:
+            return [n] * n_seeds
+
+        def sizes_for(keep):
+            sizes = [n]
+            while len(sizes) < n_seeds and round(sizes[0] * keep ** len(sizes)) >= 1:
+                sizes.append(round(sizes[0] * keep ** len(sizes)))
+            return sizes
+
+        # bisect the largest keep fraction within budget
+        lo, hi = 0.0, 1.0
+        for _ in range(30):
+            keep = (lo + hi) / 2
+            if sum(sizes_for(keep)) <= budget:
+                lo = keep
+            else:
+                hi = keep
+        return sizes_for(lo)
+
+    def race(self, genomes, seeds: list):
+        """
+        Runs the rounds of a generation's race. The caller evaluates each yielded round's entrants on
+        its seed, setting their fitness, before resuming; the aggregate fitness is assigned at the end.
+        :param seeds: distinct evaluation seeds, in the order played
+        :returns generator of (round index, seed, (genome ID, genome) entrants) rounds
+        """
+        self.samples = {}
+        self.sizes = self.round_sizes(len(genomes), len(seeds))
+        entrants = list(genomes)
+        for round_id, (seed, size) in enumerate(zip(seeds, self.sizes)):
+            if size < len(entrants):
+                entrants = sorted(entrants, key=lambda g: self.aggregate(self.samples[g[0]]), reverse=True)[:size]
+            yield round_id, seed, entrants
+            for _id, genome in entrants:
+                self.samples.setdefault(_id, []).append(genome.fitness)
+
+        self.first = {_id: samples[0] for _id, samples in self.samples.items()}
+        for _id, genome in genomes:
+            if _id in self.samples:
+                genome.fitness = self.aggregate(self.samples[_id])
+
+    def summary(self) -> str:
+        """
+        Summarizes the last race; "reranked" counts finalists whose first seed alone would not have
+        placed them among the finalists.
+        """
+        if len(self.sizes) < 2:
+            return f"Race: 1 round, evaluations={sum(self.sizes)}"
+        k = self.sizes[-1]
+        by_first = set(sorted(self.first, key=self.first.get, reverse=True)[:k])
+        finalists = [_id for _id, samples in self.samples.items() if len(samples) == len(self.sizes)]
+        reranked = sum(_id not in by_first for _id in finalists)
+        return (f"Race: rounds={len(self.sizes)}, entrants={self.sizes}, evaluations={sum(self.sizes)}, "
+                f"reranked finalists={reranked}/{k}")
+
+
+class RacingException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,120 @@
+import json
+import os
+from collections import OrderedDict
+from fitness_cache import FitnessCache
+
+
+class LPTScheduler:
+    """
+    Straggler-aware genome scheduler: orders each generation longest-expected-first (LPT), so long
+    evaluations start early and short ones fill the tail instead of leaving emulators idle.
+    A genome's expected duration is, in order of preference: its own measured duration (keyed by
+    network digest, so elites and structural clones carry over), the mean measured duration of its
+    parents, the mean duration of its species last generation, or the last generation's mean.
+    Durations are persisted as JSON with least-recently-used eviction.
+    """
+    MAX_ENTRIES = 20000  # max cached genome digests
+    SMOOTHING = 0.5  # weight of a new measurement in a digest's running duration
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # genome digest -> expected seconds, least recent first
+        self.by_key = OrderedDict()  # genome ID -> measured seconds, for looking up parents
+        self.by_species = {}  # species ID -> mean seconds last generation
+        self.mean = None  # mean seconds last generation
+        self.predicted = {}  # genome ID -> predicted seconds of the ordered generation
+        self.load()
+
+    def order(self, genomes, ancestors: dict, species_of) -> list:
+        """
+        Sorts genomes by expected duration, longest first.
+        :param ancestors: genome ID -> parent genome IDs (neat.DefaultReproduction.ancestors)
+        :param species_of: genome ID -> species ID, or None if unknown
+        :returns (genome ID, genome) pairs in dispatch order
+        """
+        self.predicted = {_id: self.predict(_id, genome, ancestors, species_of) for _id, genome in genomes}
+        known = [t for t in self.predicted.values() if t is not None]
+        default = sum(known) / len(known) if known else 0.0
+        for _id, t in self.predicted.items():
+            if t is None:
+                self.predicted[_id] = default
+        return sorted(genomes, key=lambda g: self.predicted[g[0]], reverse=True)  # stable for ties
+
+    def predict(self, _id: int, genome, ancestors: dict, species_of):
+        """
+        :returns expected evaluation seconds of a genome, or None without any history
+        """
+        expected = self.entries.get(FitnessCache.genome_digest(genome))
+        if expected is not None:
+            return expected
+        parents = [self.by_key[p] for p in ancestors.get(_id, ()) if p in self.by_key]
+        if parents:
+            return sum(parents) / len(parents)
+        expected = self.by_species.get(species_of(_id))
+        if expected is not None:
+            return expected
+        return self.mean
+
+    def update(self, genomes, durations: dict, species_of) -> None:
+        """
+        Records the measured evaluation durations of a generation's genomes.
+        :param durations: genome ID -> evaluation seconds
+        """
+        species = {}
+        for _id, genome in genomes:
+            seconds = durations.get(_id)
+            if seconds is None:
+                continue
+            digest = FitnessCache.genome_digest(genome)
+            previous = self.entries.pop(digest, None)
+            self.entries[digest] = seconds if previous is None else \
+                self.SMOOTHING * seconds + (1 - self.SMOOTHING) * previous
+            self.by_key.pop(_id, None)
+            self.by_key[_id] = seconds
+            species.setdefault(species_of(_id), []).append(seconds)
+        if species:
+            self.by_species = {sid: sum(s) / len(s) for sid, s in species.items()}
+            self.mean = sum(sum(s) for s in species.values()) / sum(len(s) for s in species.values())
+
+        # evict least recently used entries
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        while len(self.by_key) > self.max_entries:
+            self.by_key.popitem(last=False)
+
+    def summary(self, durations: dict, wall_s: float, slots: int) -> str:
+        """
+        Summarizes a generation's emulator utilization and prediction error.
+        :param durations: genome ID -> evaluation seconds
+        :param wall_s: generation evaluation wall time
+        :param slots: concurrent emulator clients
+        """
+        busy = sum(durations.values())
+        capacity = wall_s * slots
+        idle = max(capacity - busy, 0.0)
+        msg = (f"Scheduler: wall={wall_s:.1f}s, busy={busy:.1f}s over {slots} emulators, "
+               f"idle emulator time={idle:.1f}s ({idle / capacity if capacity else 0.0:.1%}), "
+               f"longest={max(durations.values(), default=0.0):.1f}s")
+        errors = [abs(self.predicted[_id] - t) for _id, t in durations.items() if _id in self.predicted]
+        if errors:
+            msg += f", mean abs prediction error={sum(errors) / len(errors):.1f}s"
+        return msg
+
+    def load(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.entries = OrderedDict(data["entries"])
+            self.by_key = OrderedDict((int(k), v) for k, v in data["by_key"])
+            self.mean = data["mean"]
+
+    def save(self) -> None:
+        """
+        Atomically writes the duration history to disk.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"entries": list(self.entries.items()), "by_key": list(self.by_key.items()),
+                       "mean": self.mean}, f)
+        os.replace(tmp_path, self.path)
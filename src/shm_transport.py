@@ -0,0 +1,186 @@
+import mmap
+import os
+import platform
+import socket
+import tempfile
+import time
+
+
+class SharedMemoryChannel:
+    """
+    Request/response transport between one emulator client and its server thread over two
+    memory-mapped regions, in place of a loopback TCP connection.
+    Written only through BizHawk's comm.mmfWrite, which writes whole ASCII strings at offset 0, so
+    counters are fixed-width hex and a trailing copy of the request sequence detects torn writes.
+
+    Request region (client -> server):  <seq:8><len:8><payload><seq:8>
+    Response region (server -> client): <ack:8><seq:8><len:8><payload>
+
+    The server acks every request as soon as it is read, and the client waits for the ack of its
+    last request before writing the next one, so LOG messages without replies are never overwritten.
+    Duck-types the socket (sendall) and FramedReader (recv_msg) interfaces of the socket handler.
+    """
+    REQUEST_SIZE = 1 << 20  # bytes of the request region, holds flushed client logs
+    RESPONSE_SIZE = 4096  # bytes of the response region
+    FIELD = 8  # hex digits per counter
+    SPIN_POLLS = 20  # empty polls before sleeping between polls
+    POLL_INTERVAL = 100e-6  # initial seconds between polls after spinning
+    MAX_POLL_INTERVAL = 1e-3  # seconds between polls after backing off, e.g. while the emulator plays
+    LIVENESS_INTERVAL = 1.0  # seconds between checks that the client process is alive
+
+    def __init__(self, name: str, create: bool = True):
+        self.name = name  # base name passed to the emulator with --mmf
+        self.ps = None  # client process, polled for liveness
+        self.timeout = socket.getdefaulttimeout()
+        self.req_seq = 0  # last request sequence read (server) or written (client)
+        self.resp_seq = 0  # last response sequence written (server) or read (client)
+        self.files = []
+        self.request = self._map(name + "_req", self.REQUEST_SIZE, create)
+        self.response = self._map(name + "_resp", self.RESPONSE_SIZE, create)
+        if create:
+            self.response[0:3 * self.FIELD] = b"0" * (3 * self.FIELD)  # nothing acked or replied yet
+
+    @classmethod
+    def create(cls, prefix: str = "bf_shm"):
+        """
+        Creates a channel with a unique name.
+        """
+        if platform.system() == 'Windows':
+            base = f"{prefix}_{os.getpid()}_{time.monotonic_ns()}"
+        else:
+            shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            base = os.path.join(shm_dir, f"{prefix}_{os.getpid()}_{time.monotonic_ns()}")
+        return cls(base)
+
+    def _map(self, name: str, size: int, create: bool) -> mmap.mmap:
+        """
+        Maps a named region: a named kernel mapping on Windows, a file in /dev/shm elsewhere.
+        """
+        if platform.system() == 'Windows':
+            return mmap.mmap(-1, size, tagname=name)
+        if create:
+            with open(name, "wb") as f:
+                f.truncate(size)
+        f = open(name, "r+b")
+        self.files.append(f)
+        return mmap.mmap(f.fileno(), size)
+
+    # server side
+
+    def recv_msg(self, sock=None):
+        """
+        Waits for the next client request and acks it.
+        :returns request payload, or None if the client process exited
+        """
+        msg = self._poll(self._read_request)
+        if msg is not None:
+            self.response[0:self.FIELD] = b"%08X" % self.req_seq
+        return msg
+
+    def sendall(self, data: bytes) -> None:
+        """
+        Writes a framed `<len> <payload>` reply to the response region.
+        """
+        payload = data[data.index(b" ") + 1:]
+        self._write(self.response, 3 * self.FIELD, payload)
+        self.resp_seq = (self.resp_seq + 1) & 0xFFFFFFFF
+        self.response[2 * self.FIELD:3 * self.FIELD] = b"%08X" % len(payload)
+        self.response[self.FIELD:2 * self.FIELD] = b"%08X" % self.resp_seq  # publish last
+
+    def _read_request(self):
+        seq = self._read_hex(self.request, 0)
+        if seq != (self.req_seq + 1) & 0xFFFFFFFF:
+            return None
+        length = self._read_hex(self.request, self.FIELD)
+        if length is None or 3 * self.FIELD + length > self.REQUEST_SIZE:
+            return None  # write in progress
+        end = 2 * self.FIELD + length
+        if self._read_hex(self.request, end) != seq:
+            return None  # write in progress
+        self.req_seq = seq
+        return self.request[2 * self.FIELD:end]
+
+    # client side, as the Lua client does
+
+    def send(self, payload: bytes) -> None:
+        """
+        Writes a request once the server has read the previous one.
+        """
+        self._poll(lambda: True if self._read_hex(self.response, 0) == self.req_seq else None)
+        self.req_seq = (self.req_seq + 1) & 0xFFFFFFFF
+        seq = b"%08X" % self.req_seq
+        self._write(self.request, 0, seq + b"%08X" % len(payload) + payload + seq)
+
+    def recv(self):
+        """
+        Waits for the server's next reply.
+        :returns reply payload
+        """
+        return self._poll(self._read_response)
+
+    def _read_response(self):
+        seq = self._read_hex(self.response, self.FIELD)
+        if seq != (self.resp_seq + 1) & 0xFFFFFFFF:
+            return None
+        self.resp_seq = seq
+        length = self._read_hex(self.response, 2 * self.FIELD)
+        return self.response[3 * self.FIELD:3 * self.FIELD + length]
+
+    # shared
+
+    def _poll(self, read):
+        """
+        Polls read() until it returns a message: spinning first, then sleeping with exponential backoff.
+        :returns the message, or None if the client process exited
+        """
+        spins = 0
+        interval = self.POLL_INTERVAL
+        last_check = start = time.monotonic()
+        while True:
+            msg = read()
+            if msg is not None:
+                return msg
+            spins += 1
+            if spins < self.SPIN_POLLS:
+                continue
+            time.sleep(interval)
+            interval = min(2 * interval, self.MAX_POLL_INTERVAL)
+            now = time.monotonic()
+            if now - last_check >= self.LIVENESS_INTERVAL:
+                last_check = now
+                if self.ps is not None and self.ps.poll() is not None:
+                    return None
+                if self.timeout is not None and now - start >= self.timeout:
+                    raise socket.timeout(f"No message on {self.name} for {self.timeout}s.")
+
+    def _write(self, region: mmap.mmap, offset: int, payload: bytes) -> None:
+        if offset + len(payload) > len(region):
+            raise SharedMemoryException(f"{len(payload)} byte message exceeds {self.name}.")
+        region[offset:offset + len(payload)] = payload
+
+    def _read_hex(self, region: mmap.mmap, offset: int):
+        try:
+            return int(region[offset:offset + self.FIELD], 16)
+        except ValueError:
+            return None  # unwritten region
+
+    def close(self, unlink: bool = True) -> None:
+        """
+        Unmaps the regions, removing their backing files.
+        """
+        for region in (self.request, self.response):
+            region.close()
+        for f in self.files:
+            f.close()
+            if unlink:
+                try:
+                    os.remove(f.name)
+                except OSError:
+                    pass
+        self.files = []
+
+
+class SharedMemoryException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,272 @@
+import weakref
+import numpy as np
+from neat.species import DefaultSpeciesSet, GenomeDistanceCache, Species
+from neat.math_util import mean, stdev
+from genome import ArrayGenome
+
+
+class VectorizedDistanceCache(GenomeDistanceCache):
+    """
+    GenomeDistanceCache whose misses are served from distances prefetched in vectorized batches of
+    one representative against many genomes. Prefetched distances enter the cache only when looked
+    up, so the cache and its reported statistics are identical to neat's.
+    """
+
+    def __init__(self, config, encoder, carried: dict):
+        super().__init__(config)
+        self.encoder = encoder
+        self.prefetched = carried  # (key0, key1) -> genome0.distance(genome1), e.g. from the last generation
+        self.computed = {}  # (key0, key1) -> genome0.distance(genome1) looked up this generation
+
+    def __call__(self, genome0, genome1):
+        g0 = genome0.key
+        g1 = genome1.key
+        d = self.distances.get((g0, g1))
+        if d is None:
+            d = self.prefetched.get((g0, g1))
+            if d is None:
+                d = genome0.distance(genome1, self.config)
+            self.distances[g0, g1] = d
+            self.distances[g1, g0] = d
+            self.computed[g0, g1] = d
+            self.misses += 1
+        else:
+            self.hits += 1
+        return d
+
+    def prefetch(self, genome0, genomes) -> None:
+        """
+        Computes genome0.distance(g) for the genomes not already cached, in one batch.
+        """
+        g0 = genome0.key
+        todo = [g for g in genomes if (g0, g.key) not in self.distances and (g0, g.key) not in self.prefetched]
+        for g, d in zip(todo, self.encoder.distances(genome0, todo, self.config)):
+            self.prefetched[g0, g.key] = d
+
+
+class GeneEncoder:
+    """
+    Encodes genomes' node and connection genes as arrays, and computes DefaultGenome.distance()
+    from one genome to many with the same per-gene arithmetic and summation order, so distances
+    are bit-identical. Encodings are memoized per genome object; neat never mutates a genome once
+    created.
+    """
+    MAX_BATCH = 1 << 20  # max genome x gene elements per vectorized batch
+
+    def __init__(self):
+        self.innovations = {}  # connection key -> dense integer ID
+        self.functions = {}  # activation or aggregation name -> integer code
+        self.encodings = weakref.WeakKeyDictionary()  # genome -> (nodes, connections)
+
+    def encode(self, genome):
+        """
+        :returns (node genes, connection genes) of the genome, each a tuple of (IDs in dict order,
+            float columns in dict order, IDs sorted, float columns sorted)
+        """
+        encoding = self.encodings.get(genome)
+        if encoding is None and isinstance(genome, ArrayGenome):
+            # read the columns directly, keyed by the packed innovation IDs
+            node_cols = np.column_stack([genome.bias, genome.response,
+                                         [self._code(name) for name in genome.activation.tolist()],
+                                         [self._code(name) for name in genome.aggregation.tolist()]])
+            innovations = self.innovations
+            conn_ids = np.fromiter((innovations.setdefault(k, len(innovations)) for k in genome.conn_ids.tolist()),
+                                   dtype=np.int64, count=len(genome.conn_ids))
+            conn_cols = np.column_stack([genome.weight, genome.enabled]).astype(np.float64)
+            encoding = (self._sorted(genome.node_keys, node_cols.reshape(-1, 4)), self._sorted(conn_ids, conn_cols))
+            self.encodings[genome] = encoding
+        elif encoding is None:
+            nodes = genome.nodes
+            node_ids = np.fromiter(nodes, dtype=np.int64, count=len(nodes))
+            node_cols = np.array([(n.bias, n.response, self._code(n.activation), self._code(n.aggregation))
+                                  for n in nodes.values()], dtype=np.float64).reshape(-1, 4)
+            conns = genome.connections
+            innovations = self.innovations
+            conn_ids = np.fromiter((innovations.setdefault(k, len(innovations)) for k in conns),
+                                   dtype=np.int64, count=len(conns))
+            conn_cols = np.empty((len(conns), 2))
+            conn_cols[:, 0] = np.fromiter((c.weight for c in conns.values()), dtype=np.float64, count=len(conns))
+            conn_cols[:, 1] = np.fromiter((c.enabled for c in conns.values()), dtype=np.float64, count=len(conns))
+            encoding = (self._sorted(node_ids, node_cols), self._sorted(conn_ids, conn_cols))
+            self.encodings[genome] = encoding
+        return encoding
+
+    def distances(self, genome0, genomes, config) -> list:
+        """
+        :returns [genome0.distance(g, config) for g in genomes]
+        """
+        if not genomes:
+            return []
+        nodes0, conns0 = self.encode(genome0)
+        encoded = [self.encode(g) for g in genomes]
+        batch = max(1, self.MAX_BATCH // max(len(nodes0[0]), len(conns0[0]), 1))
+        out = []
+        for start in range(0, len(genomes), batch):
+            chunk = encoded[start:start + batch]
+            node_d = self._component(nodes0, [e[0] for e in chunk], self._node_terms, config)
+            conn_d = self._component(conns0, [e[1] for e in chunk], self._connection_terms, config)
+            out.extend((node_d + conn_d).tolist())
+        return out
+
+    @staticmethod
+    def _component(genes0, others, terms, config) -> np.ndarray:
+        """
+        Node or connection distance component from genes0 to each of the other genomes' genes.
+        """
+        ids0, cols0 = genes0[0], genes0[1]
+        sizes = np.array([len(g[0]) for g in others], dtype=np.int64)
+        if len(ids0) == 0 and not sizes.any():
+            return np.zeros(len(others))
+
+        # offset each genome's sorted IDs into one globally sorted array
+        span = int(max(ids0.max(initial=0), max(g[2].max(initial=0) for g in others))) + 1
+        offsets = np.arange(len(others), dtype=np.int64)[:, None] * span
+        keys = np.concatenate([g[2] + off for g, off in zip(others, offsets[:, 0])])
+        cols = np.concatenate([g[3] for g in others])
+
+        # homologous genes of genes0, in genes0's dict order
+        total = np.zeros(len(others))
+        matches = np.zeros(len(others), dtype=np.int64)
+        if len(ids0) and len(keys):
+            query = offsets + ids0[None, :]
+            pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+            matched = keys[pos] == query
+            d = np.where(matched, terms(cols0[None, :, :], cols[pos]), 0.0)
+            d *= config.compatibility_weight_coefficient
+            # sequential left-to-right sums, as in DefaultGenome.distance()
+            total = np.cumsum(d, axis=1)[:, -1]
+            matches = matched.sum(axis=1)
+
+        disjoint = len(ids0) + sizes - 2 * matches
+        size = np.maximum(len(ids0), sizes)
+        component = total + config.compatibility_disjoint_coefficient * disjoint
+        return np.divide(component, size, out=np.zeros(len(others)), where=size > 0)
+
+    @staticmethod
+    def _node_terms(a, b) -> np.ndarray:
+        d = np.abs(a[..., 0] - b[..., 0]) + np.abs(a[..., 1] - b[..., 1])
+        d += a[..., 2] != b[..., 2]
+        d += a[..., 3] != b[..., 3]
+        return d
+
+    @staticmethod
+    def _connection_terms(a, b) -> np.ndarray:
+        d = np.abs(a[..., 0] - b[..., 0])
+        d += a[..., 1] != b[..., 1]
+        return d
+
+    @staticmethod
+    def _sorted(ids, cols) -> tuple:
+        order = np.argsort(ids, kind="stable")
+        return ids, cols, ids[order], cols[order]
+
+    def _code(self, name) -> int:
+        code = self.functions.get(name)
+        if code is None:
+            code = self.functions[name] = len(self.functions)
+        return code
+
+
+class VectorizedSpeciesSet(DefaultSpeciesSet):
+    """
+    Drop-in DefaultSpeciesSet with vectorized genome distances. Each representative's distances to
+    all genomes it will be compared with are computed in one batch, and distances between genomes
+    that survive into the next generation (elites and representatives) are carried over. The
+    species, representatives and reported distance statistics match DefaultSpeciesSet exactly.
+    """
+
+    def __init__(self, config, reporters):
+        super().__init__(config, reporters)
+        self.encoder = GeneEncoder()
+        self.carried = {}  # (key0, key1) -> distance between genomes alive last generation
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["encoder"] = None  # rebuilt on restore
+        state["carried"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.encoder = GeneEncoder()
+
+    def speciate(self, config, population, generation):
+        """
+        Place genomes into species by genetic similarity; DefaultSpeciesSet.speciate() with
+        representatives' distances prefetched in batches.
+        """
+        assert isinstance(population, dict)
+
+        compatibility_threshold = self.species_set_config.compatibility_threshold
+
+        # Find the best representatives for each existing species.
+        unspeciated = set(population.keys())  # built from a view like neat's, for the same iteration order
+        distances = VectorizedDistanceCache(config.genome_config, self.encoder, self.carried)
+        new_representatives = {}
+        new_members = {}
+        for sid, s in self.species.items():
+            distances.prefetch(s.representative, [population[gid] for gid in unspeciated])
+            candidates = []
+            for gid in unspeciated:
+                g = population[gid]
+                d = distances(s.representative, g)
+                candidates.append((d, g))
+
+            # The new representative is the genome closest to the current representative.
+            ignored_rdist, new_rep = min(candidates, key=lambda x: x[0])
+            new_rid = new_rep.key
+            new_representatives[sid] = new_rid
+            new_members[sid] = [new_rid]
+            unspeciated.remove(new_rid)
+
+        # every genome is compared with every representative created before it is placed
+        for rid in new_representatives.values():
+            distances.prefetch(population[rid], [population[gid] for gid in unspeciated])
+
+        # Partition population into species based on genetic similarity.
+        while unspeciated:
+            gid = unspeciated.pop()
+            g = population[gid]
+
+            # Find the species with the most similar representative.
+            candidates = []
+            for sid, rid in new_representatives.items():
+                rep = population[rid]
+                d = distances(rep, g)
+                if d < compatibility_threshold:
+                    candidates.append((d, sid))
+
+            if candidates:
+                ignored_sdist, sid = min(candidates, key=lambda x: x[0])
+                new_members[sid].append(gid)
+            else:
+                # No species is similar enough, create a new species, using
+                # this genome as its representative.
+                sid = next(self.indexer)
+                new_representatives[sid] = gid
+                new_members[sid] = [gid]
+                distances.prefetch(g, [population[other] for other in unspeciated])
+
+        # Update species collection based on new speciation.
+        self.genome_to_species = {}
+        for sid, rid in new_representatives.items():
+            s = self.species.get(sid)
+            if s is None:
+                s = Species(sid, generation)
+                self.species[sid] = s
+
+            members = new_members[sid]
+            for gid in members:
+                self.genome_to_species[gid] = sid
+
+            member_dict = dict((gid, population[gid]) for gid in members)
+            s.update(population[rid], member_dict)
+
+        # carry over computed distances between genomes that may survive reproduction
+        self.carried = {pair: d for pair, d in distances.computed.items()
+                        if pair[0] in population and pair[1] in population}
+
+        gdmean = mean(distances.distances.values())
+        gdstdev = stdev(distances.distances.values())
+        self.reporters.info(
+            'Mean genetic distance {0:.3f}, standard deviation {1:.3f}'.format(gdmean, gdstdev))
@@ -0,0 +1,96 @@
+import io
+import numpy as np
+from PIL import Image
+from numpy.lib.stride_tricks import as_strided
+
+
+class VisionPipeline:
+    """
+    Screenshot front-end of the open world mode: grayscale, 3x3 edge filter and 4x4 average pooling.
+    Numerically equivalent to PIL's convert('L'), scipy.signal.correlate(mode='full') with the kernel,
+    then skimage's block_reduce(np.average) with zero padding, but fused into one integer pass over
+    preallocated buffers: the full correlation followed by 4x4 pooling is a stride-4 correlation of the
+    zero-padded grayscale image with a single 6x6 kernel, evaluated as one einsum over a strided view.
+    Optionally stacks the last STACK pooled frames, newest first, as the network input.
+    """
+    GRAY_WEIGHTS = (19595, 38470, 7471)  # PIL's fixed-point ITU-R 601-2 luma weights (>> 16)
+    BLOCK = 4  # pooling block size
+    STACK = 1  # pooled frames stacked as network input
+
+    def __init__(self, width: int, height: int, kernel: np.ndarray, stack: int = STACK):
+        self.width = width
+        self.height = height
+        self.stack = stack
+        k = kernel.shape[0]
+        block = self.BLOCK
+        span = block + k - 1  # padded-image window of one pooled output
+
+        # pooled shape of the full correlation, (height + k - 1) x (width + k - 1) zero-padded to whole blocks
+        self.rows = -(-(height + k - 1) // block)
+        self.cols = -(-(width + k - 1) // block)
+
+        # 6x6 kernel: sum over a block of the kernel's correlations, i.e. the kernel correlated with a box
+        self.window_kernel = np.zeros((span, span), dtype=np.int64)
+        for i in range(block):
+            for j in range(block):
+                self.window_kernel[i:i + k, j:j + k] += kernel
+
+        # zero-padded grayscale image and its stride-4 window view (no copy)
+        self.padded = np.zeros((block * (self.rows - 1) + span, block * (self.cols - 1) + span), dtype=np.int64)
+        self.pad = k - 1
+        self.image = self.padded[self.pad:self.pad + height, self.pad:self.pad + width]
+        s0, s1 = self.padded.strides
+        self.windows = as_strided(self.padded, shape=(self.rows, self.cols, span, span),
+                                  strides=(block * s0, block * s1, s0, s1), writeable=False)
+
+        self.sums = np.empty((self.rows, self.cols), dtype=np.int64)
+        self.frames = np.zeros((stack, self.rows * self.cols))  # pooled frames, newest first
+        self.n_frames = 0  # frames seen since reset()
+
+    @property
+    def n_inputs(self) -> int:
+        return self.stack * self.rows * self.cols
+
+    def reset(self) -> None:
+        """
+        Forgets stacked frames, e.g. at the start of a genome's evaluation.
+        """
+        self.n_frames = 0
+
+    def from_raw(self, frame, channels: str = "BGRA") -> np.ndarray:
+        """
+        Processes a raw uncompressed framebuffer, e.g. BizHawk's 32-bit pixels as little-endian bytes.
+        :param frame: height * width * len(channels) bytes
+        :param channels: byte order of a pixel's channels
+        :returns network input vector
+        """
+        pixels = np.frombuffer(frame, dtype=np.uint8).reshape(self.height, self.width, len(channels))
+        weights = np.zeros(len(channels), dtype=np.int64)
+        for c, w in zip("RGB", self.GRAY_WEIGHTS):
+            weights[channels.index(c)] = w
+        np.einsum("hwc,c->hw", pixels, weights, out=self.image)
+        self.image += 0x8000
+        self.image >>= 16
+        return self._pool()
+
+    def from_png(self, png: bytes) -> np.ndarray:
+        """
+        Processes a PNG screenshot.
+        :returns network input vector
+        """
+        self.image[...] = np.asarray(Image.open(io.BytesIO(png)).convert('L'))
+        return self._pool()
+
+    def _pool(self) -> np.ndarray:
+        """
+        Edge-filters and pools the grayscale image, and stacks the result.
+        """
+        np.einsum("pqij,ij->pq", self.windows, self.window_kernel, out=self.sums)
+        if self.stack == 1:
+            return self.sums.reshape(-1) / self.BLOCK ** 2
+        self.frames[1:] = self.frames[:-1]
+        np.divide(self.sums.reshape(-1), self.BLOCK ** 2, out=self.frames[0])
+        if self.n_frames == 0:
+            self.frames[1:] = self.frames[0]  # repeat the first frame until the stack fills
+        self.n_frames += 1
+        return self.frames.reshape(-1).copy()
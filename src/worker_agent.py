@@ -0,0 +1,236 @@
+"""
+Worker agent of a distributed evaluation run: supervises this host's emulator clients and evaluates
+genome work units pulled from the trainer's CoordinatorServer.
+Usage: python src/worker_agent.py --coordinator HOST:PORT [--clients N] [--name NAME]
+                                  [--mock] [--mock-turns N]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+from coordinator import CoordinatorServer
+from eval_server import ConnectionClosedException
+from pool_server import PooledEvaluationServer
+
+MOCK_CLIENT = os.path.join(os.path.dirname(__file__), 'mock_client.py')
+
+
+class WorkerAgent(PooledEvaluationServer):
+    """
+    Remote worker of a CoordinatorServer.
+    Runs a warm emulator pool on this host and feeds it the units sent by the coordinator, so
+    networks are activated next to the emulators and only genomes and results cross hosts.
+    Units are reported STARTED when an emulator picks them up; unstarted units can be revoked by
+    the coordinator for work stealing. Genomes whose emulator is lost are handed back (LOST) for
+    the coordinator to requeue. On SIGINT/SIGTERM the agent returns its unstarted units, finishes
+    the running ones and leaves.
+    """
+    RECONNECT_INTERVAL = 5.0  # seconds between attempts to reach the coordinator
+
+    def __init__(self, game_mode: str, coordinator: tuple, name: str, n_clients: int = PooledEvaluationServer.N_CLIENTS,
+                 mock_turns: int = None):
+        super().__init__(game_mode)
+        self.coordinator = coordinator  # (host, port)
+        self.name = name
+        self.N_CLIENTS = n_clients
+        self.mock_turns = mock_turns  # spawn headless mock clients instead of emulators, if set
+        self.writer = None  # coordinator link
+        self.units = {}  # genome ID -> unit held by this worker
+        self.started = set()  # genome IDs picked up by an emulator
+        self.telemetry = {}  # genome ID -> counter summary of its last evaluation
+        self.seed = None  # evaluation seed of the current generation
+        self.leaving = False
+
+    def run(self) -> None:
+        """
+        Starts the emulator pool and evaluates units until the coordinator finishes or the agent leaves.
+        """
+        self.logger = self._init_logger(f"worker-{self.name}")
+        self.requeues = {}
+        self._start_pool()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.loop.call_soon_threadsafe(self._leave))
+        try:
+            asyncio.run_coroutine_threadsafe(self._serve_coordinator(), self.loop).result()
+        finally:
+            self._report_metrics()
+            self.close()
+
+    def eval_seed(self, gen_id: int) -> int:
+        return self.seed
+
+    async def _serve_coordinator(self) -> None:
+        """
+        Connects to the coordinator and handles its messages until FINISHED.
+        """
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_connection(*self.coordinator)
+                break
+            except OSError as e:
+                self.logger.info(f"Waiting for coordinator {self.coordinator}: {e}")
+                await asyncio.sleep(self.RECONNECT_INTERVAL)
+        self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.logger.info(f"Connected to coordinator {self.coordinator} as {self.name}.")
+        self._send(("HELLO", self.name, self.N_CLIENTS))
+
+        try:
+            while True:
+                msg = await CoordinatorServer.read_message(reader)
+                kind = msg[0]
+                if kind == "GENERATION":
+                    self._start_generation(*msg[1:])
+                elif kind == "UNIT":
+                    _, gen_id, unit = msg
+                    if gen_id == self.gen_id and not self.leaving:
+                        self.units[unit[1]] = unit
+                        self.queue.put_nowait(unit)
+                    else:
+                        self._send(("REVOKED", unit[1]))
+                elif kind == "REVOKE":
+                    if msg[1] in self.units and msg[1] not in self.started:
+                        del self.units[msg[1]]  # dropped when dequeued
+                        self._send(("REVOKED", msg[1]))
+                elif kind == "FINISHED":
+                    self.logger.info("Coordinator finished.")
+                    return
+        except (ConnectionClosedException, ConnectionError) as e:
+            if not self.leaving:
+                self.logger.error(f"Lost coordinator link: {e!r}")
+        finally:
+            self.writer.close()
+
+    def _start_generation(self, gen_id: int, config, seed: int, size: int) -> None:
+        """
+        Switches to a new generation's config and seed.
+        """
+        if self.gen_id is not None and gen_id != self.gen_id:
+            self._report_metrics()
+        self.gen_id = gen_id
+        self.config = config
+        self.seed = seed
+        self.genomes = range(size)  # only sized, for index logs
+        self.units.clear()
+        self.started.clear()
+        self.requeues = {}
+        self.durations = {}  # measured by the coordinator's telemetry instead
+        self.logger.info(f"****** Evaluating Generation {gen_id} ******")
+
+    async def _next_item(self):
+        """
+        Waits for the next held unit, skipping units revoked while queued.
+        """
+        while True:
+            unit = await self.queue.get()
+            if unit is None:
+                return None
+            _id = unit[1]
+            if _id in self.units:
+                self.started.add(_id)
+                self._send(("STARTED", _id))
+                return unit
+            self.queue.task_done()
+
+    async def _eval_stream(self, reader, writer, net, counters) -> float:
+        fitness = await super()._eval_stream(reader, writer, net, counters)
+        self.telemetry[counters.genome] = counters.summary()
+        return fitness
+
+    def _record_fitness(self, _id: int, genome) -> None:
+        """
+        Streams a genome's fitness and telemetry back to the coordinator.
+        """
+        self.units.pop(_id, None)
+        self.started.discard(_id)
+        summary = self.telemetry.pop(_id, {})
+        summary["worker"] = self.name
+        self._send(("RESULT", self.gen_id, _id, genome.fitness, summary))
+        self._check_left()
+
+    def _requeue(self, item) -> None:
+        """
+        Hands a genome lost with its emulator back to the coordinator to requeue.
+        """
+        _, _id, _ = item
+        self.logger.warning(f"Returning genome #{_id} after losing its emulator...")
+        self.units.pop(_id, None)
+        self.started.discard(_id)
+        self._send(("LOST", _id))
+        self.queue.task_done()
+        self._check_left()
+
+    def _fail(self, item, e: Exception) -> None:
+        """
+        Hands a genome whose evaluation failed back to the coordinator, which fails the generation
+        once it runs out of requeues.
+        """
+        self.logger.error(f"Genome #{item[1]} evaluation failed: {e!r}")
+        self._requeue(item)
+
+    def _leave(self) -> None:
+        """
+        Returns unstarted units and leaves once the running ones are finished.
+        """
+        if self.leaving:
+            return
+        self.logger.info("Leaving: returning unstarted units...")
+        self.leaving = True
+        self._send(("LEAVING",))
+        for _id in [_id for _id in self.units if _id not in self.started]:
+            del self.units[_id]
+            self._send(("REVOKED", _id))
+        self._check_left()
+
+    def _check_left(self) -> None:
+        """
+        Says BYE once a leaving agent holds no units; the coordinator then closes the link.
+        """
+        if self.leaving and not self.units:
+            self._send(("BYE",))
+
+    def _send(self, msg: tuple) -> None:
+        if self.writer is not None and not self.writer.is_closing():
+            self.writer.write(CoordinatorServer.frame_message(msg))
+
+    def _report_metrics(self) -> None:
+        perf_summary = self.metrics.report(self.gen_id)
+        if perf_summary:
+            self.logger.info(perf_summary)
+        self.logger.info(self.net_cache.summary())
+
+    def spawn_client(self):
+        """
+        Spawns an emulator client, or a headless mock client if mock_turns is set.
+        """
+        if self.mock_turns is None:
+            return super().spawn_client()
+        ps = subprocess.Popen([sys.executable, MOCK_CLIENT, "--port", str(self.PORT), "--turns", str(self.mock_turns)],
+                              stdout=tempfile.TemporaryFile())
+        self.client_ps.append(ps)
+        return ps
+
+    def kill_client(self, ps):
+        if self.mock_turns is None:
+            return super().kill_client(ps)
+        ps.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed evaluation worker agent.")
+    parser.add_argument("--coordinator", required=True, help="coordinator HOST:PORT")
+    parser.add_argument("--clients", type=int, default=PooledEvaluationServer.N_CLIENTS, help="emulators on this host")
+    parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--game-mode", default="battle_factory")
+    parser.add_argument("--mock", action="store_true", help="run headless mock clients instead of BizHawk")
+    parser.add_argument("--mock-turns", type=int, default=30, help="turns per genome of mock clients")
+    args = parser.parse_args()
+
+    host, _, port = args.coordinator.rpartition(":")
+    os.makedirs("./logs", exist_ok=True)
+    agent = WorkerAgent(args.game_mode, (host, int(port)), args.name, args.clients,
+                        mock_turns=args.mock_turns if args.mock else None)
+    agent.run()
@@ -0,0 +1,22 @@
+import os
+import re
+import sys
+import neat
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+from neat_config import load_config  # noqa: E402
+
+
+def small_config(tmp_path, genome_type, species_set_type=neat.DefaultSpeciesSet, pop_size: int = 30,
+                 num_inputs: int = 12) -> neat.Config:
+    """
+    Loads the battle factory config with a smaller population and input layer.
+    """
+    with open(os.path.join(SRC, "neat_battlefactory.cfg")) as f:
+        text = f.read()
+    text = re.sub(r"(?m)^pop_size\s*=.*$", f"pop_size = {pop_size}", text)
+    text = re.sub(r"(?m)^num_inputs\s*=.*$", f"num_inputs = {num_inputs}", text)
+    path = tmp_path / f"{genome_type.__name__}.cfg"
+    path.write_text(text)
+    return load_config(str(path), species_set_type, genome_type)
@@ -0,0 +1,83 @@
+import copy
+import os
+import random
+import neat
+import pytest
+from conftest import small_config
+from checkpointer import IncrementalCheckpointer
+from genome import ArrayGenome
+
+
+def fitness(genomes, config):
+    for _id, genome in genomes:
+        genome.fitness = sum(c.weight for c in genome.connections.values() if c.enabled) + len(genome.nodes)
+
+
+def genes(genome) -> tuple:
+    return (genome.key, genome.fitness,
+            [(k, n.bias, n.response, n.activation, n.aggregation) for k, n in genome.nodes.items()],
+            [(k, c.weight, c.enabled) for k, c in genome.connections.items()])
+
+
+def signature(p: neat.Population) -> tuple:
+    return (p.generation, [genes(g) for g in p.population.values()],
+            {sid: (sorted(s.members), s.representative.key, s.created, s.last_improved, s.fitness_history)
+             for sid, s in p.species.species.items()},
+            all(m is p.population[k] for s in p.species.species.values() for k, m in s.members.items()),
+            random.getstate())
+
+
+@pytest.fixture(params=[neat.DefaultGenome, ArrayGenome], ids=lambda t: t.__name__)
+def run(request, tmp_path):
+    """
+    Runs 7 generations checkpointed by both neat.Checkpointer and IncrementalCheckpointer.
+    """
+    config = small_config(tmp_path, request.param, num_inputs=40)
+    random.seed(1)
+    p = neat.Population(config)
+    p.add_reporter(neat.Checkpointer(1, None, str(tmp_path / "neat-ckpt-")))
+    directory = str(tmp_path / "incremental")
+    os.makedirs(directory)
+    checkpointer = IncrementalCheckpointer(directory, full_interval=4, reproduction=p.reproduction)
+    p.add_reporter(checkpointer)
+    p.run(fitness, 7)
+    checkpointer.close()
+    return request.param, tmp_path, directory
+
+
+def test_restore_matches_neat(run):
+    _, tmp_path, directory = run
+    manifest = IncrementalCheckpointer.load_manifest(directory)
+    assert manifest["latest"] == 6
+    assert [c["base"] for c in manifest["checkpoints"].values()] == [0, 0, 0, 0, 4, 4, 4]
+    for generation in range(7):
+        # each restore sets the random state, so each population is continued right after its restore
+        expected = neat.Checkpointer.restore_checkpoint(str(tmp_path / f"neat-ckpt-{generation}"))
+        expected_restore = copy.deepcopy(signature(expected))
+        expected.run(fitness, 1)
+        restored = IncrementalCheckpointer.restore_checkpoint(directory, generation)
+        assert signature(restored) == expected_restore, generation
+        restored.run(fitness, 1)
+        assert signature(restored) == signature(expected), generation
+
+
+def test_deltas_store_gene_diffs(run):
+    # mutation changes most weights every generation, so a delta stores about one float per connection;
+    # ArrayGenome's full snapshots are already compact columns
+    genome_type, _, directory = run
+    max_ratio = {neat.DefaultGenome: 0.6, ArrayGenome: 0.9}[genome_type]
+    manifest = IncrementalCheckpointer.load_manifest(directory)
+    checkpoints = manifest["checkpoints"]
+    for generation in (1, 2, 3, 5, 6):
+        entry = checkpoints[str(generation)]
+        record = IncrementalCheckpointer._read(directory, entry["file"])
+        assert not record["genomes"]  # every genome is diffed from a survivor or parent
+        size = os.path.getsize(os.path.join(directory, entry["file"]))
+        full_size = os.path.getsize(os.path.join(directory, checkpoints[str(entry["base"])]["file"]))
+        assert size < max_ratio * full_size, generation
+
+        # survivors are diffed from themselves, with no gene changes
+        survivors = [diff for key, diff in record["diffs"].items() if diff[0] == key]
+        assert survivors
+        for _, nodes, conns in survivors:
+            assert nodes == (None, None, "keep", [None] * 4) and conns == (None, None, "keep", [None] * 2)
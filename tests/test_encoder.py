@@ -0,0 +1,65 @@
+import json
+import random
+import pytest
+from encoder import Encoder, StateEncoder
+from eval_server import EvaluationServer
+from protocol import PackedProtocol
+
+N_STATES = 200
+BOOSTS = ("ATK", "DEF", "SPA", "SPD", "EVA", "SPEED")
+
+
+def shuffled(d: dict, rng: random.Random) -> dict:
+    """
+    :returns the dict with its keys in random order, as the Lua client sends them
+    """
+    items = list(d.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def random_pokemon(rng: random.Random) -> dict:
+    """
+    Generates a random pokemon state over every encoded value range, including scaled values
+    beyond StateEncoder.TABLE_SIZE.
+    """
+    stats = {k: rng.randrange(2000) for k in ("ATK", "DEF", "SPEED", "SPA", "SPD")}
+    stats.update({k + "_Boost": rng.randrange(13) for k in BOOSTS})
+    stats.update(MaxHP=rng.randrange(2000), HP=rng.randrange(2000), Status=rng.randrange(256),
+                 Confused=rng.randrange(256))
+    moves = {str(i): shuffled({"ID": rng.randrange(468), "PP": rng.randrange(41)}, rng) for i in range(1, 5)}
+    return shuffled({
+        "ID": rng.randrange(494), "HeldItem": rng.randrange(328), "Ability": rng.randrange(124),
+        "Active": rng.randrange(2), "Moves": shuffled(moves, rng), "Stats": shuffled(stats, rng),
+    }, rng)
+
+
+def random_state(rng: random.Random) -> dict:
+    return shuffled({
+        "State": rng.randrange(3),
+        "AllyParty": shuffled({str(i): random_pokemon(rng) for i in range(1, 7)}, rng),
+        "EnemyParty": shuffled({str(i): random_pokemon(rng) for i in range(1, 4)}, rng),
+    }, rng)
+
+
+@pytest.fixture(scope="module")
+def states():
+    rng = random.Random(0)
+    return [random_state(rng) for _ in range(N_STATES)]
+
+
+def legacy(state: dict) -> bytes:
+    return Encoder.vectorize_state(EvaluationServer.sort_dict(json.loads(json.dumps(state)))).astype(float).tobytes()
+
+
+def test_vectorize_state_bit_identical(states):
+    encoder = StateEncoder()
+    for state in states:
+        assert encoder.vectorize_state(state).tobytes() == legacy(state)
+
+
+def test_vectorize_packed_bit_identical(states):
+    encoder = StateEncoder()
+    for state in states:
+        packed = PackedProtocol.decode_state(PackedProtocol.encode_state(state))
+        assert encoder.vectorize_packed(*packed).tobytes() == legacy(state)
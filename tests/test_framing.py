@@ -0,0 +1,109 @@
+import pytest
+from framing import FramedReader, FramingException
+
+PAYLOADS = [b"BF_STATE{\"turn\": 1}", b"", b"SEED", b"x" * 1234, b"READY 1 2"]
+
+
+class ChunkSocket:
+    """
+    Socket stub returning fixed chunks from recv(), then b"" for a closed connection.
+    """
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv(self, size: int) -> bytes:
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def stream(payloads) -> bytes:
+    return b"".join(FramedReader.frame(p) for p in payloads)
+
+
+def read_all(chunks) -> list:
+    reader = FramedReader()
+    msgs = []
+    for chunk in chunks:
+        reader.feed(chunk)
+        msgs.extend(reader.messages())
+    return msgs
+
+
+def test_frame():
+    assert FramedReader.frame(b"abc") == b"3 abc"
+    assert FramedReader.frame(b"") == b"0 "
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_split_at_every_offset(payload):
+    # offsets inside the length prefix, at the separator space and inside the payload
+    data = stream([payload])
+    for i in range(len(data) + 1):
+        assert read_all([data[:i], data[i:]]) == [payload]
+
+
+def test_split_twice_at_every_offset():
+    data = stream(PAYLOADS[:3])
+    for i in range(len(data) + 1):
+        for j in range(i, len(data) + 1):
+            assert read_all([data[:i], data[i:j], data[j:]]) == PAYLOADS[:3]
+
+
+def test_byte_at_a_time():
+    data = stream(PAYLOADS)
+    assert read_all([data[i:i + 1] for i in range(len(data))]) == PAYLOADS
+
+
+def test_back_to_back_in_one_chunk():
+    assert read_all([stream(PAYLOADS)]) == PAYLOADS
+
+
+def test_zero_length_payloads():
+    assert read_all([stream([b"", b"", b"a", b""])]) == [b"", b"", b"a", b""]
+
+
+def test_incomplete_frame_is_held():
+    reader = FramedReader()
+    reader.feed(b"5 abc")
+    assert reader.next_msg() is None
+    reader.feed(b"de3 f")
+    assert reader.next_msg() == b"abcde"
+    assert reader.next_msg() is None
+
+
+def test_compaction_keeps_partial_frame():
+    reader = FramedReader()
+    payload = b"y" * 1000
+    n = FramedReader.COMPACT_SIZE // len(FramedReader.frame(payload)) + 2
+    data = stream([payload] * n)
+    reader.feed(data[:-10])
+    assert len(list(reader.messages())) == n - 1
+    reader.feed(data[-10:])
+    assert reader.next_msg() == payload
+    assert len(reader.buffer) < len(data)
+
+
+def test_recv_msg_across_chunks():
+    data = stream(PAYLOADS)
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    reader = FramedReader()
+    sock = ChunkSocket(chunks)
+    assert [reader.recv_msg(sock) for _ in PAYLOADS] == PAYLOADS
+    assert reader.recv_msg(sock) is None
+
+
+@pytest.mark.parametrize("cut", [1, 2, 3, 8])
+def test_closed_mid_frame(cut):
+    # closed inside the length prefix, at the separator space and inside the payload
+    data = stream([b"SEED", b"abcdefgh"])
+    sock = ChunkSocket([data[:len(b"4 SEED") + cut]])
+    reader = FramedReader()
+    assert reader.recv_msg(sock) == b"SEED"
+    assert reader.recv_msg(sock) is None
+
+
+@pytest.mark.parametrize("data", [b"abc 1", b"-1 x", b" 1", b"12345678901 x"])
+def test_invalid_length_prefix(data):
+    reader = FramedReader()
+    reader.feed(data)
+    with pytest.raises(FramingException):
+        reader.next_msg()
@@ -0,0 +1,54 @@
+import random
+import neat
+import numpy as np
+import pytest
+from conftest import small_config
+from genome import ArrayGenome
+from inference import CompiledNetwork, FlatNetwork
+
+MUTATIONS = 20  # mutation rounds per genome, to grow hidden nodes and disabled connections
+
+
+def mutated_genomes(tmp_path, genome_type, n: int = 10) -> tuple:
+    """
+    :returns (config, genomes) of n genomes mutated MUTATIONS times each
+    """
+    random.seed(1)
+    config = small_config(tmp_path, genome_type, pop_size=n)
+    genomes = list(neat.Population(config).population.values())
+    for genome in genomes:
+        for _ in range(MUTATIONS):
+            genome.mutate(config.genome_config)
+    assert any(len(g.nodes) > config.genome_config.num_outputs for g in genomes)
+    return config, genomes
+
+
+def states(config, n: int = 50) -> np.ndarray:
+    return np.random.default_rng(0).uniform(-1.0, 1.0, (n, config.genome_config.num_inputs))
+
+
+@pytest.mark.parametrize("genome_type", [neat.DefaultGenome, ArrayGenome])
+@pytest.mark.parametrize("network_type", [CompiledNetwork, FlatNetwork])
+def test_matches_feed_forward_network(tmp_path, genome_type, network_type):
+    config, genomes = mutated_genomes(tmp_path, genome_type)
+    # zero some weights, which FlatNetwork prunes
+    for genome in genomes[::2]:
+        for cg in list(genome.connections.values())[::3]:
+            cg.weight = 0.0
+    inputs = states(config)
+    for genome in genomes:
+        expected = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = network_type.create(genome, config)
+        for x in inputs:
+            np.testing.assert_allclose(net.activate(x), expected.activate(list(x)), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("genome_type", [neat.DefaultGenome, ArrayGenome])
+@pytest.mark.parametrize("network_type", [CompiledNetwork, FlatNetwork])
+def test_activate_states_matches_activate(tmp_path, genome_type, network_type):
+    config, genomes = mutated_genomes(tmp_path, genome_type)
+    inputs = states(config)
+    for genome in genomes:
+        net = network_type.create(genome, config)
+        expected = np.array([np.array(net.activate(x)) for x in inputs])
+        np.testing.assert_allclose(net.activate_states(inputs), expected, rtol=1e-9, atol=1e-12)
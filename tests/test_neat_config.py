@@ -0,0 +1,27 @@
+import os
+import neat
+import pytest
+from conftest import SRC
+from neat_config import load_config
+from genome import ArrayGenome
+from speciation import VectorizedSpeciesSet
+
+CONFIGS = ["neat_battlefactory.cfg", "neat_openworld.cfg"]
+
+
+@pytest.mark.parametrize("name", CONFIGS)
+def test_loads_with_neat_types(name):
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                         neat.DefaultStagnation, os.path.join(SRC, name))
+    assert config.genome_config.num_inputs > 0
+
+
+@pytest.mark.parametrize("name", CONFIGS)
+def test_replacement_types_read_standard_sections(name):
+    path = os.path.join(SRC, name)
+    default = load_config(path)
+    config = load_config(path, VectorizedSpeciesSet, ArrayGenome)
+    assert config.genome_type is ArrayGenome and config.species_set_type is VectorizedSpeciesSet
+    for param in default.genome_config._params:
+        assert getattr(config.genome_config, param.name) == getattr(default.genome_config, param.name), param.name
+    assert config.species_set_config.compatibility_threshold == default.species_set_config.compatibility_threshold
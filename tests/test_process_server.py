@@ -0,0 +1,16 @@
+import neat
+from conftest import small_config
+from process_server import ActivationWorkerPool
+
+
+def test_cache_stats_summed_over_workers(tmp_path):
+    config = small_config(tmp_path, neat.DefaultGenome, pop_size=4)
+    genome = next(iter(neat.Population(config).population.values()))
+    pool = ActivationWorkerPool(config, n_workers=2)
+    try:
+        for _ in range(3):  # workers 0, 1, 0
+            pool.load(genome)
+        assert pool.cache_stats() == (1, 2, 0, 2)
+        assert pool.cache_stats() == (0, 0, 0, 2)  # reset by the previous request
+    finally:
+        pool.close()
@@ -0,0 +1,52 @@
+import random
+import neat
+import pytest
+from conftest import small_config
+from genome import ArrayGenome
+from speciation import VectorizedSpeciesSet
+
+GENERATIONS = 8
+THRESHOLD = 1.2  # compatibility threshold low enough to split the population into several species
+
+
+class SpeciesRecorder(neat.reporting.BaseReporter):
+    """
+    Records each generation's species, representatives and logged distance statistics.
+    """
+    def __init__(self):
+        self.generations = []
+        self.info_lines = []
+
+    def end_generation(self, config, population, species_set):
+        self.generations.append({
+            sid: (s.representative.key, sorted(s.members)) for sid, s in species_set.species.items()
+        })
+
+    def info(self, msg):
+        self.info_lines.append(msg)
+
+
+def fitness(genomes, config):
+    for _, genome in genomes:
+        genome.fitness = sum(c.weight for c in genome.connections.values() if c.enabled)
+
+
+def evolve(tmp_path, genome_type, species_set_type) -> SpeciesRecorder:
+    random.seed(0)
+    config = small_config(tmp_path, genome_type, species_set_type)
+    config.species_set_config.compatibility_threshold = THRESHOLD
+    p = neat.Population(config)
+    recorder = SpeciesRecorder()
+    p.add_reporter(recorder)
+    p.run(fitness, GENERATIONS)
+    return recorder
+
+
+@pytest.mark.parametrize("genome_type", [neat.DefaultGenome, ArrayGenome])
+def test_matches_default_species_set(tmp_path, genome_type):
+    expected = evolve(tmp_path, genome_type, neat.DefaultSpeciesSet)
+    actual = evolve(tmp_path, genome_type, VectorizedSpeciesSet)
+    assert len(expected.generations) == GENERATIONS
+    assert len(expected.generations[-1]) > 1
+    assert actual.generations == expected.generations
+    assert actual.info_lines == expected.info_lines
@@ -0,0 +1,65 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from bench_vision import legacy_pipeline, synthetic_frames, WIDTH, HEIGHT, KERNEL
+from eval_server import EvaluationServer
+from vision import VisionPipeline
+
+N_FRAMES = 8
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return synthetic_frames(N_FRAMES)
+
+
+def png(frame: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(frame[..., [2, 1, 0]]).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def pooled(frame: np.ndarray) -> np.ndarray:
+    return VisionPipeline(WIDTH, HEIGHT, KERNEL).from_raw(frame.tobytes())
+
+
+def test_png_matches_legacy(frames):
+    vision = VisionPipeline(WIDTH, HEIGHT, KERNEL)
+    for frame in frames:
+        data = png(frame)
+        assert np.array_equal(vision.from_png(data), legacy_pipeline(data))
+
+
+def test_raw_bgra_matches_legacy(frames):
+    vision = VisionPipeline(WIDTH, HEIGHT, KERNEL)
+    for frame in frames:
+        assert np.array_equal(vision.from_raw(frame.tobytes()), legacy_pipeline(png(frame)))
+
+
+def test_raw_channel_order(frames):
+    rgba = frames[0][..., [2, 1, 0, 3]]
+    vision = VisionPipeline(WIDTH, HEIGHT, KERNEL)
+    assert np.array_equal(vision.from_raw(rgba.tobytes(), channels="RGBA"), pooled(frames[0]))
+
+
+def test_stack_newest_first(frames):
+    vision = VisionPipeline(WIDTH, HEIGHT, KERNEL, stack=3)
+    a, b = pooled(frames[0]), pooled(frames[1])
+    assert np.array_equal(vision.from_raw(frames[0].tobytes()), np.concatenate([a, a, a]))
+    assert np.array_equal(vision.from_raw(frames[1].tobytes()), np.concatenate([b, a, a]))
+    assert vision.n_inputs == 3 * len(a)
+
+
+def test_server_resets_stack_between_evaluations(frames):
+    class Network:
+        pass
+
+    server = EvaluationServer("open_world")
+    server.VISION_STACK = 3
+    net = Network()
+    for frame in frames[:2]:
+        server._get_vision(net).from_raw(frame.tobytes())
+    server._reset_vision(net)  # start of the network's next evaluation
+    c = pooled(frames[2])
+    assert np.array_equal(server._get_vision(net).from_raw(frames[2].tobytes()), np.concatenate([c, c, c]))